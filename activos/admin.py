@@ -1,19 +1,65 @@
+from django import forms
 from django.contrib import admin
 
+from .inventario import StockInsuficiente, efecto, validar_existencias
 from .models import (
     Armamento,
     AsignacionActivo,
     Combustible,
+    ExistenciaRefaccion,
     InventarioMovimiento,
     Refaccion,
     RegistroCombustible,
     Vehiculo,
 )
 
+
+class InventarioMovimientoAdminForm(forms.ModelForm):
+    class Meta:
+        model = InventarioMovimiento
+        fields = "__all__"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        refaccion = cleaned_data.get("refaccion")
+        tipo = cleaned_data.get("tipo")
+        cantidad = cleaned_data.get("cantidad")
+        if refaccion is None or tipo is None or cantidad is None:
+            return cleaned_data
+        # Al editar, la existencia ya incluye el movimiento anterior.
+        cambios = {refaccion.pk: efecto(tipo, cantidad, 0)[0]}
+        if self.instance.pk:
+            previo = (
+                InventarioMovimiento.objects.filter(pk=self.instance.pk)
+                .values_list("refaccion_id", "tipo", "cantidad")
+                .first()
+            )
+            if previo:
+                cambios[previo[0]] = cambios.get(previo[0], 0) - efecto(previo[1], previo[2], 0)[0]
+        try:
+            validar_existencias(cambios)
+        except StockInsuficiente as exc:
+            self.add_error("cantidad" if exc.refaccion_id == refaccion.pk else None, str(exc))
+        return cleaned_data
+
+
+@admin.register(InventarioMovimiento)
+class InventarioMovimientoAdmin(admin.ModelAdmin):
+    form = InventarioMovimientoAdminForm
+
+
+@admin.register(Refaccion)
+class RefaccionAdmin(admin.ModelAdmin):
+    readonly_fields = ["costo_unitario"]
+
+
+@admin.register(Combustible)
+class CombustibleAdmin(admin.ModelAdmin):
+    readonly_fields = ["costo_promedio"]
+
+
 admin.site.register(Vehiculo)
 admin.site.register(Armamento)
-admin.site.register(Combustible)
-admin.site.register(Refaccion)
-admin.site.register(InventarioMovimiento)
+admin.site.register(ExistenciaRefaccion)
 admin.site.register(AsignacionActivo)
 admin.site.register(RegistroCombustible)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ActivosConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "activos"
+
+    def ready(self):
+        from . import combustible, inventario
+
+        inventario.conectar()
+        combustible.conectar()
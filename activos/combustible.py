@@ -0,0 +1,122 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .inventario import CENTAVOS
+from .models import Combustible, RegistroCombustible
+
+
+def promedio(litros, importe, respaldo):
+    if litros > 0:
+        return (Decimal(importe) / Decimal(litros)).quantize(CENTAVOS)
+    return respaldo
+
+
+def acumular(combustible_id, litros, importe):
+    """Suma (o resta) una carga al promedio ponderado del combustible.
+
+    Los acumulados de litros e importe hacen que cada carga, edicion o baja
+    cueste una actualizacion de una fila, sin releer el historial.
+    """
+    with transaction.atomic():
+        combustible = Combustible.objects.select_for_update().filter(pk=combustible_id).first()
+        if combustible is None:
+            return None
+        combustible.litros_acumulados += litros
+        combustible.importe_acumulado += importe
+        combustible.costo_promedio = promedio(
+            combustible.litros_acumulados, combustible.importe_acumulado, combustible.costo_promedio
+        )
+        combustible.save(update_fields=["litros_acumulados", "importe_acumulado", "costo_promedio"])
+        return combustible
+
+
+def _al_preparar(sender, instance, **kwargs):
+    instance._carga_previa = None
+    if instance.pk:
+        instance._carga_previa = (
+            RegistroCombustible.objects.filter(pk=instance.pk)
+            .values_list("combustible_id", "litros", "costo_total")
+            .first()
+        )
+
+
+def _al_guardar(sender, instance, **kwargs):
+    previa = getattr(instance, "_carga_previa", None)
+    actual = (instance.combustible_id, Decimal(instance.litros), Decimal(instance.costo_total))
+    if previa == actual:
+        return
+    if previa and previa[0]:
+        acumular(previa[0], -previa[1], -previa[2])
+    if actual[0]:
+        acumular(*actual)
+
+
+def _al_eliminar(sender, instance, **kwargs):
+    if instance.combustible_id:
+        acumular(instance.combustible_id, -instance.litros, -instance.costo_total)
+
+
+def conectar():
+    pre_save.connect(_al_preparar, sender=RegistroCombustible, dispatch_uid="activos-carga-pre-save")
+    post_save.connect(_al_guardar, sender=RegistroCombustible, dispatch_uid="activos-carga-save")
+    post_delete.connect(_al_eliminar, sender=RegistroCombustible, dispatch_uid="activos-carga-delete")
+
+
+def asignar_combustible(combustible_id=None):
+    """Liga al tipo de combustible las cargas que no lo tienen (historial previo al campo).
+
+    Cada vehiculo toma el combustible de su carga mas reciente que si lo
+    tenga. Las que sigan sin tipo reciben ``combustible_id``, o el unico
+    combustible registrado si no hay mas. Las demas quedan sin tipo y no
+    cuentan para ningun promedio. Se actualiza con ``update()``, sin
+    senales: despues hay que correr ``recalcular_promedios``. Regresa
+    ``(asignadas, sin_asignar)``.
+    """
+    sin_tipo = RegistroCombustible.objects.filter(combustible__isnull=True)
+    del_vehiculo = (
+        RegistroCombustible.objects.filter(vehiculo_id=OuterRef("vehiculo_id"), combustible__isnull=False)
+        .order_by("-fecha", "-id")
+        .values("combustible_id")[:1]
+    )
+    with transaction.atomic():
+        asignadas = 0
+        inferidos = list(
+            sin_tipo.annotate(inferido=Subquery(del_vehiculo))
+            .filter(inferido__isnull=False)
+            .values_list("vehiculo_id", "inferido")
+            .distinct()
+        )
+        for vehiculo_id, combustible in inferidos:
+            asignadas += sin_tipo.filter(vehiculo_id=vehiculo_id).update(combustible_id=combustible)
+        if combustible_id is None:
+            unicos = list(Combustible.objects.values_list("pk", flat=True)[:2])
+            combustible_id = unicos[0] if len(unicos) == 1 else None
+        if combustible_id is not None:
+            asignadas += sin_tipo.update(combustible_id=combustible_id)
+    return asignadas, sin_tipo.count()
+
+
+def recalcular_promedios():
+    """Reconstruye acumulados y promedio de cada combustible con una consulta agrupada."""
+    totales = {
+        fila["combustible_id"]: fila
+        for fila in RegistroCombustible.objects.filter(combustible__isnull=False)
+        .values("combustible_id")
+        .annotate(litros=Sum("litros"), importe=Sum("costo_total"))
+        .order_by()
+    }
+    combustibles = list(Combustible.objects.all())
+    for combustible in combustibles:
+        fila = totales.get(combustible.pk, {})
+        combustible.litros_acumulados = fila.get("litros") or 0
+        combustible.importe_acumulado = fila.get("importe") or 0
+        combustible.costo_promedio = promedio(
+            combustible.litros_acumulados, combustible.importe_acumulado, combustible.costo_promedio
+        )
+    Combustible.objects.bulk_update(
+        combustibles, ["litros_acumulados", "importe_acumulado", "costo_promedio"], batch_size=500
+    )
+    return len(combustibles)
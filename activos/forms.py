@@ -28,7 +28,8 @@ class ArmamentoForm(BaseBootstrapForm):
 class RefaccionForm(BaseBootstrapForm):
     class Meta:
         model = Refaccion
-        fields = "__all__"
+        # El costo es el promedio ponderado que mantiene el inventario.
+        exclude = ["costo_unitario"]
 
 
 class AsignacionActivoForm(BaseBootstrapForm):
@@ -0,0 +1,75 @@
+import heapq
+from datetime import datetime, time, timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+
+from mantenimiento.models import Inspeccion, OrdenMantenimiento
+
+from .models import AsignacionActivo, RegistroCombustible, Vehiculo
+
+
+def _fecha(valor):
+    return timezone.localdate(valor) if isinstance(valor, datetime) else valor
+
+
+def _rango(queryset, campo, desde, hasta):
+    if isinstance(queryset.model._meta.get_field(campo), models.DateTimeField):
+        # Limites como datetimes para no envolver la columna en ``__date``.
+        if desde:
+            queryset = queryset.filter(**{f"{campo}__gte": timezone.make_aware(datetime.combine(desde, time.min))})
+        if hasta:
+            fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+            queryset = queryset.filter(**{f"{campo}__lt": fin})
+    else:
+        if desde:
+            queryset = queryset.filter(**{f"{campo}__gte": desde})
+        if hasta:
+            queryset = queryset.filter(**{f"{campo}__lte": hasta})
+    return queryset.order_by(f"-{campo}", "-pk")
+
+
+def historial_activo(activo, desde=None, hasta=None):
+    """Linea de tiempo del activo, de lo mas reciente a lo mas antiguo.
+
+    Junta asignaciones, ordenes de mantenimiento, inspecciones y, para
+    vehiculos, cargas de combustible. Cada fuente sale de su indice
+    (content_type, object_id, fecha) ya ordenada, asi que la linea de tiempo
+    se arma con ``heapq.merge`` sin reordenar. Regresa dicts con ``fecha``,
+    ``tipo`` y ``objeto``.
+    """
+    content_type = ContentType.objects.get_for_model(activo)
+    genericos = {"content_type": content_type, "object_id": activo.pk}
+    fuentes = [
+        (
+            "asignacion",
+            "fecha_inicio",
+            AsignacionActivo.objects.filter(**genericos).select_related(
+                "asignacion__contrato__cliente", "asignacion__sitio", "asignacion__turno"
+            ),
+        ),
+        (
+            "orden",
+            "fecha_apertura",
+            OrdenMantenimiento.objects.filter(**genericos).select_related("tecnico"),
+        ),
+        ("inspeccion", "fecha", Inspeccion.objects.filter(**genericos).select_related("realizado_por")),
+    ]
+    if isinstance(activo, Vehiculo):
+        fuentes.append(
+            (
+                "combustible",
+                "fecha",
+                RegistroCombustible.objects.filter(vehiculo=activo).select_related("autorizado_por"),
+            )
+        )
+
+    lineas = [
+        [
+            {"fecha": _fecha(getattr(objeto, campo)), "tipo": tipo, "objeto": objeto}
+            for objeto in _rango(queryset, campo, desde, hasta)
+        ]
+        for tipo, campo, queryset in fuentes
+    ]
+    return list(heapq.merge(*lineas, key=lambda evento: evento["fecha"], reverse=True))
@@ -0,0 +1,281 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import ExistenciaRefaccion, InventarioMovimiento, Refaccion
+
+
+CENTAVOS = Decimal("0.01")
+
+# Quien escribe movimientos en bloque ajusta las existencias por su cuenta.
+_en_bloque = ContextVar("activos_inventario_en_bloque", default=False)
+
+
+class StockInsuficiente(Exception):
+    def __init__(self, refaccion_id, disponible, solicitado):
+        super().__init__(f"Stock insuficiente: hay {disponible} y se piden {solicitado}.")
+        self.refaccion_id = refaccion_id
+        self.disponible = disponible
+        self.solicitado = solicitado
+
+
+def efecto(tipo, cantidad, costo_unitario):
+    """``(cantidad, valor)`` con signo que el movimiento aporta a la existencia."""
+    cantidad = -cantidad if tipo == "salida" else cantidad
+    return cantidad, (Decimal(cantidad) * Decimal(costo_unitario)).quantize(CENTAVOS)
+
+
+def costo_promedio(cantidad, valor, respaldo):
+    """Costo promedio ponderado de la existencia; sin piezas se conserva el ultimo."""
+    if cantidad > 0:
+        return (Decimal(valor) / cantidad).quantize(CENTAVOS)
+    return respaldo
+
+
+def _bloquear(refaccion_id):
+    existencia, _ = ExistenciaRefaccion.objects.select_for_update().get_or_create(refaccion_id=refaccion_id)
+    return existencia
+
+
+def aplicar(refaccion_id, cantidad, valor):
+    """Suma el efecto a la existencia bajo ``select_for_update``.
+
+    El candado de fila serializa salidas concurrentes de la misma refaccion,
+    asi que la validacion de negativos no puede saltarse entre dos lecturas.
+    Despues actualiza ``Refaccion.costo_unitario`` con el promedio ponderado
+    que resulta, sin releer el historial. Debe llamarse dentro de una
+    transaccion; ``InventarioMovimiento.save()`` ya abre una.
+    """
+    existencia = _bloquear(refaccion_id)
+    if cantidad < 0 and existencia.cantidad + cantidad < 0:
+        raise StockInsuficiente(refaccion_id, existencia.cantidad, -cantidad)
+    existencia.cantidad += cantidad
+    existencia.valor += valor
+    existencia.save(update_fields=["cantidad", "valor", "actualizado"])
+    if existencia.cantidad > 0:
+        Refaccion.objects.filter(pk=refaccion_id).update(
+            costo_unitario=costo_promedio(existencia.cantidad, existencia.valor, None)
+        )
+    return existencia
+
+
+def validar_existencias(cambios):
+    """Lanza ``StockInsuficiente`` si algun cambio ``{refaccion_id: cantidad}`` deja la existencia en negativo.
+
+    Es una lectura sin candado para validar formularios; ``aplicar`` vuelve a
+    revisar bajo ``select_for_update`` al guardar.
+    """
+    salidas = {refaccion_id: cantidad for refaccion_id, cantidad in cambios.items() if cantidad < 0}
+    disponibles = dict(
+        ExistenciaRefaccion.objects.filter(refaccion_id__in=salidas).values_list("refaccion_id", "cantidad")
+    )
+    for refaccion_id in sorted(salidas):
+        disponible = disponibles.get(refaccion_id, 0)
+        if disponible + salidas[refaccion_id] < 0:
+            raise StockInsuficiente(refaccion_id, disponible, -salidas[refaccion_id])
+
+
+@contextmanager
+def en_bloque():
+    token = _en_bloque.set(True)
+    try:
+        yield
+    finally:
+        _en_bloque.reset(token)
+
+
+def bloquear_existencias(refaccion_ids):
+    """``{refaccion_id: existencia}`` bloqueadas con una sola lectura, junto con su refaccion.
+
+    Crea antes las filas que falten para que el candado las cubra a todas.
+    """
+    refaccion_ids = sorted(set(refaccion_ids))
+    ExistenciaRefaccion.objects.bulk_create(
+        [ExistenciaRefaccion(refaccion_id=refaccion_id) for refaccion_id in refaccion_ids],
+        ignore_conflicts=True,
+    )
+    return {
+        existencia.refaccion_id: existencia
+        for existencia in ExistenciaRefaccion.objects.select_for_update()
+        .select_related("refaccion")
+        .filter(refaccion_id__in=refaccion_ids)
+        .order_by("refaccion_id")
+    }
+
+
+def _al_preparar(sender, instance, **kwargs):
+    instance._efecto_previo = None
+    if _en_bloque.get():
+        return
+    if instance._state.adding:
+        # Lo que sale del almacen se valua al promedio vigente, no al costo capturado.
+        if instance.tipo == "salida" or instance.cantidad < 0:
+            existencia = _bloquear(instance.refaccion_id)
+            respaldo = Refaccion.objects.values_list("costo_unitario", flat=True).get(pk=instance.refaccion_id)
+            instance.costo_unitario = costo_promedio(existencia.cantidad, existencia.valor, respaldo)
+        return
+    if instance.pk:
+        previo = (
+            InventarioMovimiento.objects.filter(pk=instance.pk)
+            .values_list("refaccion_id", "tipo", "cantidad", "costo_unitario")
+            .first()
+        )
+        if previo:
+            instance._efecto_previo = (previo[0], *efecto(*previo[1:]))
+
+
+def _al_guardar(sender, instance, **kwargs):
+    if _en_bloque.get():
+        return
+    cambios = {}
+    previo = getattr(instance, "_efecto_previo", None)
+    if previo:
+        refaccion_id, cantidad, valor = previo
+        cambios[refaccion_id] = (-cantidad, -valor)
+    cantidad, valor = efecto(instance.tipo, instance.cantidad, instance.costo_unitario)
+    anterior = cambios.get(instance.refaccion_id, (0, Decimal("0")))
+    cambios[instance.refaccion_id] = (anterior[0] + cantidad, anterior[1] + valor)
+    # Orden fijo de candados para que dos ediciones cruzadas no se bloqueen.
+    for refaccion_id in sorted(cambios):
+        if any(cambios[refaccion_id]):
+            aplicar(refaccion_id, *cambios[refaccion_id])
+
+
+def _al_eliminar(sender, instance, origin=None, **kwargs):
+    # Al borrar la refaccion su existencia cae en la misma cascada.
+    if _en_bloque.get() or isinstance(origin, Refaccion):
+        return
+    cantidad, valor = efecto(instance.tipo, instance.cantidad, instance.costo_unitario)
+    aplicar(instance.refaccion_id, -cantidad, -valor)
+
+
+def conectar():
+    pre_save.connect(_al_preparar, sender=InventarioMovimiento, dispatch_uid="activos-movimiento-pre-save")
+    post_save.connect(_al_guardar, sender=InventarioMovimiento, dispatch_uid="activos-movimiento-save")
+    post_delete.connect(_al_eliminar, sender=InventarioMovimiento, dispatch_uid="activos-movimiento-delete")
+
+
+def saldos_libro():
+    """``{refaccion_id: (cantidad, valor)}`` recalculados del libro en una consulta agrupada."""
+    signo = Case(When(tipo="salida", then=Value(-1)), default=Value(1), output_field=IntegerField())
+    filas = (
+        InventarioMovimiento.objects.values("refaccion_id")
+        .annotate(
+            total=Sum(F("cantidad") * signo),
+            importe=Sum(
+                ExpressionWrapper(
+                    F("cantidad") * signo * F("costo_unitario"),
+                    output_field=DecimalField(max_digits=20, decimal_places=4),
+                )
+            ),
+        )
+        .order_by()
+    )
+    return {
+        fila["refaccion_id"]: (fila["total"] or 0, Decimal(fila["importe"] or 0).quantize(CENTAVOS))
+        for fila in filas
+    }
+
+
+def conciliar(guardar=True):
+    """Compara las existencias contra el libro; regresa las diferencias encontradas.
+
+    Cada diferencia es ``(refaccion_id, guardado, libro)`` con pares
+    ``(cantidad, valor)``. Con ``guardar`` se corrigen y se crean las filas
+    que falten.
+    """
+    libro = saldos_libro()
+    with transaction.atomic():
+        existencias = {
+            e.refaccion_id: e for e in ExistenciaRefaccion.objects.select_for_update().order_by("refaccion_id")
+        }
+        diferencias = []
+        nuevas = []
+        cambiadas = []
+        for refaccion_id in Refaccion.objects.order_by("pk").values_list("pk", flat=True):
+            esperado = libro.get(refaccion_id, (0, Decimal("0.00")))
+            existencia = existencias.get(refaccion_id)
+            guardado = (existencia.cantidad, existencia.valor) if existencia else (0, Decimal("0.00"))
+            if existencia is None:
+                nuevas.append(ExistenciaRefaccion(refaccion_id=refaccion_id, cantidad=esperado[0], valor=esperado[1]))
+            if guardado == esperado:
+                continue
+            diferencias.append((refaccion_id, guardado, esperado))
+            if existencia is not None:
+                existencia.cantidad, existencia.valor = esperado
+                cambiadas.append(existencia)
+        if guardar:
+            ExistenciaRefaccion.objects.bulk_create(nuevas, batch_size=500)
+            ExistenciaRefaccion.objects.bulk_update(cambiadas, ["cantidad", "valor"], batch_size=500)
+    return diferencias
+
+
+def recalcular_costos(chunk_size=2000):
+    """Reproduce el libro en orden cronologico para fijar costos promedio.
+
+    Cada salida (o ajuste negativo) queda valuada al promedio vigente en su
+    fecha y cada refaccion termina con el promedio de su existencia. Lee el
+    libro una vez en bloques y escribe con ``bulk_update``; al final
+    concilia las existencias contra los costos ya corregidos.
+    """
+    costos = dict(Refaccion.objects.values_list("pk", "costo_unitario"))
+    pendientes = []
+    corregidos = 0
+    actual = None
+    cantidad = valor = 0
+
+    def cerrar():
+        if actual is not None:
+            costos[actual] = costo_promedio(cantidad, valor, costos[actual])
+
+    for pk, refaccion_id, tipo, movido, costo in (
+        InventarioMovimiento.objects.order_by("refaccion_id", "fecha", "id")
+        .values_list("pk", "refaccion_id", "tipo", "cantidad", "costo_unitario")
+        .iterator(chunk_size=chunk_size)
+    ):
+        if refaccion_id != actual:
+            cerrar()
+            actual, cantidad, valor = refaccion_id, 0, Decimal("0")
+        movido, _ = efecto(tipo, movido, 0)
+        if movido < 0:
+            vigente = costo_promedio(cantidad, valor, costos[refaccion_id])
+            if vigente != costo:
+                pendientes.append(InventarioMovimiento(pk=pk, costo_unitario=vigente))
+            costo = vigente
+        cantidad += movido
+        valor += (Decimal(movido) * costo).quantize(CENTAVOS)
+        if len(pendientes) >= chunk_size:
+            InventarioMovimiento.objects.bulk_update(pendientes, ["costo_unitario"], batch_size=500)
+            corregidos += len(pendientes)
+            pendientes = []
+    cerrar()
+
+    with transaction.atomic():
+        InventarioMovimiento.objects.bulk_update(pendientes, ["costo_unitario"], batch_size=500)
+        corregidos += len(pendientes)
+        Refaccion.objects.bulk_update(
+            [Refaccion(pk=pk, costo_unitario=costo) for pk, costo in costos.items()],
+            ["costo_unitario"],
+            batch_size=500,
+        )
+        conciliar()
+    return corregidos
+
+
+def bajo_minimo(queryset=None):
+    """Refacciones en o bajo su ``stock_minimo``, leidas de la tabla de existencias.
+
+    Una refaccion sin fila de existencia aun no tiene movimientos: cuenta como cero.
+    """
+    queryset = Refaccion.objects.all() if queryset is None else queryset
+    return (
+        queryset.select_related("existencia")
+        .annotate(disponible=Coalesce("existencia__cantidad", 0))
+        .filter(stock_minimo__gt=0)
+        .filter(Q(existencia__isnull=True) | Q(existencia__cantidad__lte=F("stock_minimo")))
+    )
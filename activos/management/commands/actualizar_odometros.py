@@ -0,0 +1,31 @@
+import time as reloj
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from activos.odometro import actualizar_odometros
+
+
+class Command(BaseCommand):
+    help = (
+        "Actualiza el kilometraje de los vehiculos con la ultima carga de combustible "
+        "y, opcionalmente, con el recorrido GPS del conductor asignado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--gps",
+            action="store_true",
+            default=getattr(settings, "ACTIVOS_KM_GPS", False),
+            help="Suma la distancia de las ubicaciones del conductor asignado.",
+        )
+        parser.add_argument("--batch", type=int, default=500)
+
+    def handle(self, *args, **options):
+        inicio = reloj.monotonic()
+        cambiados = actualizar_odometros(gps=options["gps"], batch=options["batch"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Vehiculos actualizados: {cambiados} en {reloj.monotonic() - inicio:.2f}s."
+            )
+        )
@@ -0,0 +1,26 @@
+import time as reloj
+
+from django.core.management.base import BaseCommand
+
+from activos.inventario import conciliar
+from activos.models import Refaccion
+
+
+class Command(BaseCommand):
+    help = "Recalcula las existencias de refacciones desde los movimientos de inventario."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        inicio = reloj.monotonic()
+        diferencias = conciliar(guardar=not options["dry_run"])
+        nombres = Refaccion.objects.in_bulk([d[0] for d in diferencias])
+        for refaccion_id, guardado, libro in diferencias:
+            self.stdout.write(
+                f"{nombres[refaccion_id]}: existencia {guardado[0]} (${guardado[1]}), "
+                f"libro {libro[0]} (${libro[1]})"
+            )
+        accion = "encontradas" if options["dry_run"] else "corregidas"
+        estilo = self.style.WARNING if diferencias else self.style.SUCCESS
+        self.stdout.write(estilo(f"Diferencias {accion}: {len(diferencias)} en {reloj.monotonic() - inicio:.2f}s."))
@@ -0,0 +1,41 @@
+import time as reloj
+
+from django.core.management.base import BaseCommand, CommandError
+
+from activos.combustible import asignar_combustible, recalcular_promedios
+from activos.inventario import recalcular_costos
+from activos.models import Combustible
+
+
+class Command(BaseCommand):
+    help = "Reproduce el historial para fijar costos promedio de refacciones y combustibles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--combustible",
+            type=int,
+            help="Id de combustible para las cargas sin tipo que no se puedan inferir por vehiculo.",
+        )
+
+    def handle(self, *args, **options):
+        if options["combustible"] and not Combustible.objects.filter(pk=options["combustible"]).exists():
+            raise CommandError(f"No existe el combustible {options['combustible']}.")
+        inicio = reloj.monotonic()
+        corregidos = recalcular_costos(options["chunk_size"])
+        asignadas, sin_asignar = asignar_combustible(options["combustible"])
+        combustibles = recalcular_promedios()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Salidas revaluadas: {corregidos}; cargas ligadas a combustible: {asignadas}; "
+                f"combustibles recalculados: {combustibles}; "
+                f"en {reloj.monotonic() - inicio:.2f}s."
+            )
+        )
+        if sin_asignar:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{sin_asignar} cargas siguen sin combustible y no cuentan en los promedios; "
+                    "usa --combustible para asignarlas."
+                )
+            )
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activos', '0002_initial'),
+        ('asignaciones', '0008_asignacionempleado_empleado_fecha'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asignacionactivo',
+            index=models.Index(fields=['content_type', 'object_id', 'fecha_inicio'], name='activos_asi_content_4ad233_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrocombustible',
+            index=models.Index(fields=['vehiculo', 'fecha'], name='activos_reg_vehicul_9a62ec_idx'),
+        ),
+    ]
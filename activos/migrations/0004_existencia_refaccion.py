@@ -0,0 +1,39 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activos', '0003_indices_activo_fecha'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExistenciaRefaccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.IntegerField(default=0)),
+                ('valor', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='inventariomovimiento',
+            name='cantidad',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='inventariomovimiento',
+            constraint=models.CheckConstraint(condition=models.Q(('tipo', 'ajuste'), ('cantidad__gte', 0), _connector='OR'), name='inventario_movimiento_cantidad_no_negativa'),
+        ),
+        migrations.AddField(
+            model_name='existenciarefaccion',
+            name='refaccion',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='existencia', to='activos.refaccion'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    InventarioMovimiento = apps.get_model("activos", "InventarioMovimiento")
+    ExistenciaRefaccion = apps.get_model("activos", "ExistenciaRefaccion")
+    Refaccion = apps.get_model("activos", "Refaccion")
+
+    saldos = {}
+    for refaccion_id, tipo, cantidad, costo in InventarioMovimiento.objects.values_list(
+        "refaccion_id", "tipo", "cantidad", "costo_unitario"
+    ):
+        if tipo == "salida":
+            cantidad = -cantidad
+        total, valor = saldos.get(refaccion_id, (0, Decimal("0")))
+        saldos[refaccion_id] = (total + cantidad, valor + cantidad * costo)
+
+    ExistenciaRefaccion.objects.bulk_create(
+        [
+            ExistenciaRefaccion(
+                refaccion_id=refaccion_id,
+                cantidad=saldos.get(refaccion_id, (0, 0))[0],
+                valor=Decimal(saldos.get(refaccion_id, (0, 0))[1]).quantize(Decimal("0.01")),
+            )
+            for refaccion_id in Refaccion.objects.values_list("pk", flat=True)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("activos", "0004_existencia_refaccion"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
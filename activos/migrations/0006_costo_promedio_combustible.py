@@ -0,0 +1,29 @@
+# Generated by Django 5.2.11 on 2026-10-18 03:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activos', '0005_calcular_existencias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='combustible',
+            name='importe_acumulado',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='combustible',
+            name='litros_acumulados',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='registrocombustible',
+            name='combustible',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='activos.combustible'),
+        ),
+    ]
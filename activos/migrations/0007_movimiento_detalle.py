@@ -0,0 +1,20 @@
+# Generated by Django 5.2.11 on 2026-10-18 03:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activos', '0006_costo_promedio_combustible'),
+        ('mantenimiento', '0002_indices_activo_fecha'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventariomovimiento',
+            name='detalle',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='mantenimiento.detallemantenimiento'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activos', '0007_movimiento_detalle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiculo',
+            name='km_actualizado',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehiculo',
+            name='metros_gps',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-18 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activos', '0008_vehiculo_odometro'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiculo',
+            name='gps_ultimo_id',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehiculo',
+            name='gps_ultimo_punto',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
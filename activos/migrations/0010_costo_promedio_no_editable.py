@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activos', '0009_vehiculo_cursor_gps'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='combustible',
+            name='costo_promedio',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import models, transaction
 
 
 ESTATUS_CHOICES = [
@@ -33,6 +33,11 @@ class Vehiculo(models.Model):
     capacidad = models.CharField(max_length=60, blank=True)
     estatus = models.CharField(max_length=20, choices=ESTATUS_CHOICES, default="activo")
     km_actual = models.PositiveIntegerField(default=0)
+    km_actualizado = models.DateTimeField(null=True, blank=True, editable=False)
+    metros_gps = models.PositiveIntegerField(default=0, editable=False)
+    # Id de la ultima Ubicacion integrada y ese punto como [epoch, latitud, longitud].
+    gps_ultimo_id = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    gps_ultimo_punto = models.JSONField(null=True, blank=True, editable=False)
     fecha_alta = models.DateField(null=True, blank=True)
 
     def __str__(self):
@@ -56,7 +61,10 @@ class Armamento(models.Model):
 class Combustible(models.Model):
     tipo = models.CharField(max_length=40)
     unidad = models.CharField(max_length=20, default="litro")
-    costo_promedio = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Lo mantiene activos.combustible con cada carga.
+    costo_promedio = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    litros_acumulados = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    importe_acumulado = models.DecimalField(max_digits=16, decimal_places=2, default=0, editable=False)
 
     def __str__(self):
         return self.tipo
@@ -74,16 +82,52 @@ class Refaccion(models.Model):
         return self.nombre
 
 
+class ExistenciaRefaccion(models.Model):
+    refaccion = models.OneToOneField("Refaccion", on_delete=models.CASCADE, related_name="existencia")
+    cantidad = models.IntegerField(default=0)
+    valor = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.refaccion} - {self.cantidad}".strip()
+
+
 class InventarioMovimiento(models.Model):
     tipo = models.CharField(max_length=20, choices=TIPO_MOV_CHOICES)
     refaccion = models.ForeignKey("Refaccion", on_delete=models.CASCADE)
-    cantidad = models.PositiveIntegerField(default=0)
+    # Entradas y salidas son positivas; un ajuste lleva signo.
+    cantidad = models.IntegerField(default=0)
     costo_unitario = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     fecha = models.DateTimeField()
     referencia = models.CharField(max_length=120, blank=True)
     realizado_por = models.ForeignKey(
         settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
     )
+    detalle = models.ForeignKey(
+        "mantenimiento.DetalleMantenimiento",
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.CASCADE,
+        related_name="movimientos",
+    )
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(tipo="ajuste") | models.Q(cantidad__gte=0),
+                name="inventario_movimiento_cantidad_no_negativa",
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        # La existencia se ajusta en post_save; si no alcanza, el movimiento se revierte.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"{self.refaccion} - {self.tipo}".strip()
@@ -102,12 +146,16 @@ class AsignacionActivo(models.Model):
     fecha_fin = models.DateField(null=True, blank=True)
     estatus = models.CharField(max_length=20, choices=ESTATUS_CHOICES, default="activo")
 
+    class Meta:
+        indexes = [models.Index(fields=["content_type", "object_id", "fecha_inicio"])]
+
     def __str__(self):
         return f"{self.asignacion} - {self.activo}".strip()
 
 
 class RegistroCombustible(models.Model):
     vehiculo = models.ForeignKey("Vehiculo", on_delete=models.CASCADE)
+    combustible = models.ForeignKey("Combustible", null=True, blank=True, on_delete=models.SET_NULL)
     fecha = models.DateTimeField()
     litros = models.DecimalField(max_digits=10, decimal_places=2)
     costo_total = models.DecimalField(max_digits=12, decimal_places=2)
@@ -117,5 +165,8 @@ class RegistroCombustible(models.Model):
         settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["vehiculo", "fecha"])]
+
     def __str__(self):
         return f"{self.vehiculo} - {self.fecha}".strip()
@@ -0,0 +1,188 @@
+from datetime import datetime, time, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Greatest
+from django.utils import timezone
+
+from asignaciones.models import AsignacionEmpleado
+from operaciones.geohash import haversine_m
+from tracking.models import Ubicacion
+from tracking.simplificacion import douglas_peucker
+
+from .models import AsignacionActivo, RegistroCombustible, Vehiculo
+
+
+# Roles de AsignacionEmpleado cuyo recorrido GPS cuenta como el del vehiculo.
+ROLES_CONDUCTOR = getattr(settings, "ACTIVOS_ROLES_CONDUCTOR", ["vehiculo", "chofer", "conductor"])
+TOLERANCIA_METROS = getattr(settings, "TRACKING_TOLERANCIA_METROS", 10.0)
+# Tramos mas rapidos que esto (m/s) se descartan como saltos del GPS.
+VELOCIDAD_MAXIMA = getattr(settings, "ACTIVOS_GPS_VELOCIDAD_MAXIMA", 55.0)
+
+
+def distancia_recorrido(puntos, tolerancia_m=TOLERANCIA_METROS, velocidad_maxima=VELOCIDAD_MAXIMA):
+    """Metros recorridos por una lista de ``(timestamp, latitud, longitud)`` ordenada.
+
+    Primero se quitan los puntos a los que se llega a velocidad imposible
+    (saltos del GPS); despues se simplifica con Douglas-Peucker para que el
+    ruido de un equipo detenido no acumule distancia.
+    """
+    if len(puntos) < 2:
+        return 0.0
+    arreglo = np.array(
+        [(timestamp.timestamp(), latitud, longitud) for timestamp, latitud, longitud in puntos], dtype=np.float64
+    )
+    arreglo = arreglo[_alcanzables(arreglo, velocidad_maxima)]
+    arreglo = np.array(douglas_peucker(arreglo.tolist(), tolerancia_m), dtype=np.float64)
+    if len(arreglo) < 2:
+        return 0.0
+    tramos = haversine_m(arreglo[:-1, 1], arreglo[:-1, 2], arreglo[1:, 1], arreglo[1:, 2])
+    return float(tramos[_alcanzables(arreglo, velocidad_maxima)[1:]].sum())
+
+
+def _alcanzables(arreglo, velocidad_maxima):
+    tramos = haversine_m(arreglo[:-1, 1], arreglo[:-1, 2], arreglo[1:, 1], arreglo[1:, 2])
+    segundos = np.maximum(np.diff(arreglo[:, 0]), 0.0)
+    return np.r_[True, tramos <= segundos * velocidad_maxima]
+
+
+def _conductores(vehiculo_ids, desde, hasta):
+    """``{vehiculo_id: (empleado_id, inicio)}`` del conductor vigente de cada vehiculo.
+
+    ``inicio`` es la fecha desde la que ese empleado va en el vehiculo: la
+    mas reciente entre la asignacion del activo y la del empleado.
+    """
+    content_type = ContentType.objects.get_for_model(Vehiculo)
+    activos = (
+        AsignacionActivo.objects.filter(
+            content_type=content_type,
+            object_id__in=vehiculo_ids,
+            estatus="activo",
+            fecha_inicio__lte=hasta,
+        )
+        .filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=desde))
+        .order_by("object_id", "-fecha_inicio")
+        .values_list("object_id", "asignacion_id", "fecha_inicio")
+    )
+    por_vehiculo = {}
+    for vehiculo_id, asignacion_id, fecha_inicio in activos:
+        por_vehiculo.setdefault(vehiculo_id, (asignacion_id, fecha_inicio))
+
+    conductores = {}
+    for asignacion_id, empleado_id, fecha_inicio in (
+        AsignacionEmpleado.objects.filter(
+            asignacion_id__in={asignacion_id for asignacion_id, _ in por_vehiculo.values()},
+            rol__in=ROLES_CONDUCTOR,
+            estatus="activo",
+            fecha_inicio__lte=hasta,
+        )
+        .filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=desde))
+        .order_by("asignacion_id", "-fecha_inicio", "-id")
+        .values_list("asignacion_id", "empleado_id", "fecha_inicio")
+    ):
+        conductores.setdefault(asignacion_id, (empleado_id, fecha_inicio))
+
+    resultado = {}
+    for vehiculo_id, (asignacion_id, fecha_activo) in por_vehiculo.items():
+        if asignacion_id in conductores:
+            empleado_id, fecha_empleado = conductores[asignacion_id]
+            resultado[vehiculo_id] = (empleado_id, max(fecha_activo, fecha_empleado))
+    return resultado
+
+
+def _puntos_nuevos(empleado_id, ultimo_id, desde):
+    """Ubicaciones del empleado ingeridas despues de ``ultimo_id`` con timestamp desde ``desde``.
+
+    Regresa ``(id_mayor, puntos)`` con los puntos como ``(timestamp, latitud,
+    longitud)`` ordenados por timestamp. El filtro por id, y no por fecha,
+    alcanza tambien los puntos que llegan tarde con un timestamp ya pasado.
+    """
+    filas = list(
+        Ubicacion.objects.filter(empleado_id=empleado_id, id__gt=ultimo_id or 0, timestamp__gte=desde)
+        .order_by("timestamp", "id")
+        .values_list("id", "timestamp", Cast("latitud", FloatField()), Cast("longitud", FloatField()))
+    )
+    if not filas:
+        return ultimo_id, []
+    return max(fila[0] for fila in filas), [fila[1:] for fila in filas]
+
+
+def actualizar_odometros(gps=False, ahora=None, batch=500):
+    """Recalcula ``Vehiculo.km_actual`` de todos los vehiculos y guarda en bloque.
+
+    La lectura de odometro de la ultima carga de combustible es el piso del
+    kilometraje, que nunca baja. Con ``gps`` se suma ademas la distancia del
+    recorrido del conductor asignado desde la carga. Cada vehiculo guarda el
+    id de la ultima Ubicacion integrada y ese punto: la siguiente corrida
+    solo lee lo ingerido despues y lo encadena a ese punto, de modo que no
+    se pierde el tramo entre corridas ni los puntos atrasados. Los metros que
+    no completan un kilometro quedan en ``metros_gps`` para la siguiente.
+    ``km_actual`` se escribe como expresion sobre el valor de la base, asi
+    que una correccion manual guardada durante la corrida se conserva.
+    Regresa el numero de vehiculos modificados.
+    """
+    ahora = ahora or timezone.now()
+    ultima = RegistroCombustible.objects.filter(vehiculo_id=OuterRef("pk"), fecha__lte=ahora).order_by(
+        "-fecha", "-id"
+    )
+    campos = ["km_actual", "km_actualizado", "metros_gps", "gps_ultimo_id", "gps_ultimo_punto"]
+    vehiculos = list(
+        Vehiculo.objects.exclude(estatus="baja")
+        .annotate(
+            km_carga=Subquery(ultima.values("km")[:1]),
+            fecha_carga=Subquery(ultima.values("fecha")[:1]),
+        )
+        .only("pk", *campos)
+    )
+
+    conductores = {}
+    if gps and vehiculos:
+        desde = min(v.km_actualizado or v.fecha_carga or ahora for v in vehiculos)
+        conductores = _conductores([v.pk for v in vehiculos], timezone.localdate(desde), timezone.localdate(ahora))
+
+    cambiados = []
+    for vehiculo in vehiculos:
+        km, marca, metros = vehiculo.km_actual, vehiculo.km_actualizado, vehiculo.metros_gps
+        avance = 0
+        ultimo_id, ultimo_punto = vehiculo.gps_ultimo_id, vehiculo.gps_ultimo_punto
+        if vehiculo.km_carga is not None:
+            km = max(km, vehiculo.km_carga)
+            if marca is None or vehiculo.fecha_carga > marca:
+                # Lectura posterior a lo integrado: el recorrido se relee desde ahi.
+                marca, metros, ultimo_id, ultimo_punto = vehiculo.fecha_carga, 0, 0, None
+        if vehiculo.pk in conductores:
+            empleado_id, fecha_inicio = conductores[vehiculo.pk]
+            desde = timezone.make_aware(datetime.combine(fecha_inicio, time.min))
+            if vehiculo.fecha_carga is not None:
+                desde = max(desde, vehiculo.fecha_carga)
+            if ultimo_id is None:
+                # Primera corrida sin carga de referencia: se cuenta desde ahora.
+                desde = max(desde, marca or ahora)
+            ultimo_id, puntos = _puntos_nuevos(empleado_id, ultimo_id, desde)
+            if puntos:
+                if ultimo_punto:
+                    epoch, latitud, longitud = ultimo_punto
+                    puntos.append((datetime.fromtimestamp(epoch, tz=dt_timezone.utc), latitud, longitud))
+                    puntos.sort(key=lambda punto: punto[0])
+                metros += int(distancia_recorrido(puntos))
+                timestamp, latitud, longitud = puntos[-1]
+                ultimo_punto = [timestamp.timestamp(), latitud, longitud]
+            avance, metros = metros // 1000, metros % 1000
+            km += avance
+            marca = ahora
+        valores = (km, marca, metros, ultimo_id, ultimo_punto)
+        if valores != tuple(getattr(vehiculo, campo) for campo in campos):
+            for campo, valor in zip(campos, valores):
+                setattr(vehiculo, campo, valor)
+            actual = F("km_actual")
+            if vehiculo.km_carga is not None:
+                actual = Greatest(actual, Value(vehiculo.km_carga))
+            vehiculo.km_actual = actual + Value(avance)
+            cambiados.append(vehiculo)
+
+    with transaction.atomic():
+        Vehiculo.objects.bulk_update(cambiados, campos, batch_size=batch)
+    return len(cambiados)
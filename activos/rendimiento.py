@@ -0,0 +1,190 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import FloatField, OuterRef, Subquery
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import RegistroCombustible, Vehiculo
+
+
+VENTANA = getattr(settings, "ACTIVOS_RENDIMIENTO_VENTANA", 20)
+MINIMO_VENTANA = getattr(settings, "ACTIVOS_RENDIMIENTO_MINIMO", 8)
+UMBRAL_Z = getattr(settings, "ACTIVOS_RENDIMIENTO_UMBRAL_Z", 3.5)
+
+
+def _limites(desde, hasta):
+    inicio = timezone.make_aware(datetime.combine(desde, time.min))
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+    return inicio, fin
+
+
+def _km_previos(inicio, vehiculo_id=None):
+    """Odometro de la ultima carga anterior al periodo, por vehiculo."""
+    ultima = RegistroCombustible.objects.filter(vehiculo_id=OuterRef("pk"), fecha__lt=inicio).order_by(
+        "-fecha", "-id"
+    )
+    vehiculos = Vehiculo.objects.all()
+    if vehiculo_id:
+        vehiculos = vehiculos.filter(pk=vehiculo_id)
+    return dict(
+        vehiculos.annotate(km_previo=Subquery(ultima.values("km")[:1]))
+        .filter(km_previo__isnull=False)
+        .values_list("pk", "km_previo")
+    )
+
+
+def _redondeo(valor):
+    if valor is None or np.isnan(valor):
+        return None
+    return round(float(valor), 2)
+
+
+def z_movil(valores, grupos, ventana=VENTANA, minimo=MINIMO_VENTANA):
+    """z-score de cada valor contra las ``ventana`` observaciones previas de su grupo.
+
+    ``valores`` viene ordenado por grupo y fecha. Media y desviacion salen de
+    sumas acumuladas, sin recorrer las filas en Python; con menos de
+    ``minimo`` observaciones previas o desviacion cero el resultado es NaN.
+    """
+    n = len(valores)
+    z = np.full(n, np.nan)
+    if not n:
+        return z
+    posiciones = np.arange(n)
+    inicios = np.r_[True, grupos[1:] != grupos[:-1]]
+    inicio_grupo = np.maximum.accumulate(np.where(inicios, posiciones, 0))
+    desde = np.maximum(posiciones - ventana, inicio_grupo)
+    cuenta = posiciones - desde
+
+    suma = np.r_[0.0, np.cumsum(valores)]
+    cuadrados = np.r_[0.0, np.cumsum(valores * valores)]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = (suma[posiciones] - suma[desde]) / cuenta
+        varianza = (cuadrados[posiciones] - cuadrados[desde]) / cuenta - media * media
+        desviacion = np.sqrt(np.clip(varianza, 0.0, None))
+        validos = (cuenta >= minimo) & (desviacion > 1e-9)
+        z[validos] = (valores[validos] - media[validos]) / desviacion[validos]
+    return z
+
+
+def analizar_combustible(desde, hasta, vehiculo_id=None, detalle=False):
+    """Rendimiento (km/l) y costo por km de las cargas entre dos fechas.
+
+    El rendimiento de una carga es la distancia desde la carga anterior del
+    mismo vehiculo entre los litros cargados. Las cargas se leen con una sola
+    consulta ``values_list`` (con los importes ya convertidos a flotante en
+    la base, sin crear ``Decimal`` por fila) y el calculo se hace con
+    arreglos NumPy; fecha e importes exactos solo se leen para las cargas
+    que se regresan. Se marcan como anomalias las cargas cuyo odometro no
+    avanza y las que se alejan mas de ``UMBRAL_Z`` desviaciones del
+    rendimiento reciente del vehiculo: por debajo sugiere fuga o robo de
+    combustible, por encima un error de odometro.
+
+    Regresa un dict con ``vehiculos`` (resumen por vehiculo), ``anomalias``
+    y, con ``detalle``, ``cargas`` con la serie completa.
+    """
+    inicio, fin = _limites(desde, hasta)
+    registros = RegistroCombustible.objects.filter(fecha__gte=inicio, fecha__lt=fin)
+    if vehiculo_id:
+        registros = registros.filter(vehiculo_id=vehiculo_id)
+    filas = list(
+        registros.order_by("vehiculo_id", "fecha", "id").values_list(
+            "id",
+            "vehiculo_id",
+            Cast("litros", FloatField()),
+            Cast("costo_total", FloatField()),
+            "km",
+        )
+    )
+    resultado = {"vehiculos": [], "anomalias": [], "cargas": []}
+    if not filas:
+        return resultado
+    previos = _km_previos(inicio, vehiculo_id)
+
+    total = len(filas)
+    ids_registro = np.fromiter((f[0] for f in filas), dtype=np.int64, count=total)
+    vehiculos = np.fromiter((f[1] for f in filas), dtype=np.int64, count=total)
+    litros = np.fromiter((f[2] for f in filas), dtype=np.float64, count=total)
+    costos = np.fromiter((f[3] for f in filas), dtype=np.float64, count=total)
+    km = np.fromiter((f[4] for f in filas), dtype=np.float64, count=total)
+
+    inicios = np.r_[True, vehiculos[1:] != vehiculos[:-1]]
+    km_previo = np.r_[np.nan, km[:-1]]
+    km_previo[inicios] = [previos.get(int(v), np.nan) for v in vehiculos[inicios]]
+    distancia = km - km_previo
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medibles = (distancia > 0) & (litros > 0)
+        rendimiento = np.where(medibles, distancia / litros, np.nan)
+        costo_km = np.where(medibles, costos / distancia, np.nan)
+    odometro = ~np.isnan(km_previo) & (distancia <= 0)
+
+    z = np.full(total, np.nan)
+    indices = np.flatnonzero(medibles)
+    z[indices] = z_movil(rendimiento[indices], vehiculos[indices])
+    bajo = z < -UMBRAL_Z
+    alto = z > UMBRAL_Z
+    anomalas = odometro | bajo | alto
+
+    ids, grupo = np.unique(vehiculos, return_inverse=True)
+    grupos = len(ids)
+    recorrido = np.bincount(grupo, weights=np.where(medibles, distancia, 0.0), minlength=grupos)
+    litros_medidos = np.bincount(grupo, weights=np.where(medibles, litros, 0.0), minlength=grupos)
+    costo_medido = np.bincount(grupo, weights=np.where(medibles, costos, 0.0), minlength=grupos)
+    litros_totales = np.bincount(grupo, weights=litros, minlength=grupos)
+    costo_total = np.bincount(grupo, weights=costos, minlength=grupos)
+    conteo_cargas = np.bincount(grupo, minlength=grupos)
+    conteo_anomalias = np.bincount(grupo, weights=anomalas, minlength=grupos)
+
+    for indice, vehiculo in enumerate(ids):
+        resultado["vehiculos"].append(
+            {
+                "vehiculo_id": int(vehiculo),
+                "cargas": int(conteo_cargas[indice]),
+                "litros": round(float(litros_totales[indice]), 2),
+                "costo": round(float(costo_total[indice]), 2),
+                "km": int(recorrido[indice]),
+                "rendimiento": _redondeo(recorrido[indice] / litros_medidos[indice] if litros_medidos[indice] else None),
+                "costo_km": _redondeo(costo_medido[indice] / recorrido[indice] if recorrido[indice] else None),
+                "anomalias": int(conteo_anomalias[indice]),
+            }
+        )
+
+    salida = np.arange(total) if detalle else np.flatnonzero(anomalas)
+    leidos = {
+        fila["id"]: fila
+        for fila in RegistroCombustible.objects.filter(pk__in=ids_registro[salida].tolist()).values(
+            "id", "fecha", "litros", "costo_total"
+        )
+    }
+
+    def carga(i):
+        registro = leidos[int(ids_registro[i])]
+        motivo = ""
+        if odometro[i]:
+            motivo = "Odometro sin avance"
+        elif bajo[i]:
+            motivo = "Rendimiento bajo"
+        elif alto[i]:
+            motivo = "Rendimiento alto"
+        return {
+            "registro_id": registro["id"],
+            "vehiculo_id": int(vehiculos[i]),
+            "fecha": registro["fecha"],
+            "litros": registro["litros"],
+            "costo": registro["costo_total"],
+            "km": int(km[i]),
+            "distancia": None if np.isnan(distancia[i]) else int(distancia[i]),
+            "rendimiento": _redondeo(rendimiento[i]),
+            "costo_km": _redondeo(costo_km[i]),
+            "z": _redondeo(z[i]),
+            "motivo": motivo,
+        }
+
+    cargas = [carga(i) for i in salida]
+    resultado["anomalias"] = [c for c in cargas if c["motivo"]]
+    if detalle:
+        resultado["cargas"] = cargas
+    return resultado
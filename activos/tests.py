@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from django.utils import timezone
+
+from asignaciones.models import Asignacion, AsignacionEmpleado
+from operaciones.models import Cliente, Contrato
+from tracking.models import Dispositivo, Ubicacion
+from usuarios.models import Empleado
+
+from .models import AsignacionActivo, Vehiculo
+from .odometro import actualizar_odometros, distancia_recorrido
+
+
+class ActualizarOdometrosTests(TestCase):
+    # ~111 m por milesima de grado de latitud, un punto por minuto.
+    PASO_GRADOS = 0.005
+
+    def setUp(self):
+        self.inicio = timezone.now() - timedelta(hours=2)
+        hoy = timezone.localdate(self.inicio)
+        cliente = Cliente.objects.create(nombre="Cliente")
+        contrato = Contrato.objects.create(cliente=cliente, numero="C-1", fecha_inicio=hoy)
+        asignacion = Asignacion.objects.create(tipo="ruta", contrato=contrato, fecha_inicio=hoy)
+        self.vehiculo = Vehiculo.objects.create(clave="V-1", marca="M", modelo="X", anio=2020)
+        AsignacionActivo.objects.create(
+            content_type=ContentType.objects.get_for_model(Vehiculo),
+            object_id=self.vehiculo.pk,
+            asignacion=asignacion,
+            fecha_inicio=hoy,
+        )
+        self.empleado = Empleado.objects.create(nombres="E", apellidos="X")
+        AsignacionEmpleado.objects.create(asignacion=asignacion, empleado=self.empleado, rol="chofer", fecha_inicio=hoy)
+        self.dispositivo = Dispositivo.objects.create(empleado=self.empleado, plataforma="android")
+        self.vehiculo.km_actualizado = self.inicio
+        self.vehiculo.save()
+
+    def puntos(self, minutos):
+        Ubicacion.objects.bulk_create(
+            Ubicacion(
+                empleado=self.empleado,
+                dispositivo=self.dispositivo,
+                latitud=19 + minuto * self.PASO_GRADOS,
+                longitud=-99,
+                timestamp=self.inicio + timedelta(minutes=minuto),
+            )
+            for minuto in minutos
+        )
+
+    def metros(self):
+        self.vehiculo.refresh_from_db()
+        return self.vehiculo.km_actual * 1000 + self.vehiculo.metros_gps
+
+    def test_corridas_sucesivas_no_pierden_el_tramo_intermedio(self):
+        self.puntos(range(0, 50))
+        actualizar_odometros(gps=True, ahora=self.inicio + timedelta(minutes=50))
+        self.puntos(range(50, 100))
+        actualizar_odometros(gps=True, ahora=self.inicio + timedelta(minutes=100))
+
+        esperado = 99 * self.PASO_GRADOS * 111_195
+        self.assertAlmostEqual(self.metros(), esperado, delta=10)
+
+    def test_puntos_atrasados_se_integran(self):
+        self.puntos(range(0, 40))
+        actualizar_odometros(gps=True, ahora=self.inicio + timedelta(minutes=60))
+        # Llegan despues de la corrida con timestamps anteriores a ella.
+        self.puntos(range(40, 60))
+        actualizar_odometros(gps=True, ahora=self.inicio + timedelta(minutes=70))
+
+        esperado = 59 * self.PASO_GRADOS * 111_195
+        self.assertAlmostEqual(self.metros(), esperado, delta=10)
+
+    def test_conserva_captura_manual_durante_la_corrida(self):
+        self.puntos(range(0, 50))
+
+        def capturar_y_medir(puntos):
+            # Alguien corrige el odometro mientras la corrida calcula.
+            Vehiculo.objects.filter(pk=self.vehiculo.pk).update(km_actual=1000)
+            return distancia_recorrido(puntos)
+
+        with mock.patch("activos.odometro.distancia_recorrido", side_effect=capturar_y_medir):
+            actualizar_odometros(gps=True, ahora=self.inicio + timedelta(minutes=50))
+
+        self.vehiculo.refresh_from_db()
+        self.assertEqual(self.vehiculo.km_actual, 1000 + int(49 * self.PASO_GRADOS * 111_195) // 1000)
@@ -1,6 +1,8 @@
 from django.urls import path
 
+from .models import Armamento, Vehiculo
 from .views import (
+    ActivoHistorialView,
     ArmamentoCreateView,
     ArmamentoDeleteView,
     ArmamentoListView,
@@ -18,6 +20,7 @@ from .views import (
     RefaccionDeleteView,
     RefaccionListView,
     RefaccionUpdateView,
+    RendimientoCombustibleView,
     VehiculoCreateView,
     VehiculoDeleteView,
     VehiculoListView,
@@ -32,10 +35,20 @@ urlpatterns = [
     path("vehiculos/nuevo/", VehiculoCreateView.as_view(), name="vehiculo_create"),
     path("vehiculos/<int:pk>/editar/", VehiculoUpdateView.as_view(), name="vehiculo_update"),
     path("vehiculos/<int:pk>/eliminar/", VehiculoDeleteView.as_view(), name="vehiculo_delete"),
+    path(
+        "vehiculos/<int:pk>/historial/",
+        ActivoHistorialView.as_view(model=Vehiculo),
+        name="vehiculo_historial",
+    ),
     path("armamento/", ArmamentoListView.as_view(), name="armamento_list"),
     path("armamento/nuevo/", ArmamentoCreateView.as_view(), name="armamento_create"),
     path("armamento/<int:pk>/editar/", ArmamentoUpdateView.as_view(), name="armamento_update"),
     path("armamento/<int:pk>/eliminar/", ArmamentoDeleteView.as_view(), name="armamento_delete"),
+    path(
+        "armamento/<int:pk>/historial/",
+        ActivoHistorialView.as_view(model=Armamento),
+        name="armamento_historial",
+    ),
     path("refacciones/", RefaccionListView.as_view(), name="refaccion_list"),
     path("refacciones/nuevo/", RefaccionCreateView.as_view(), name="refaccion_create"),
     path("refacciones/<int:pk>/editar/", RefaccionUpdateView.as_view(), name="refaccion_update"),
@@ -61,6 +74,11 @@ urlpatterns = [
         RegistroCombustibleListView.as_view(),
         name="registro_combustible_list",
     ),
+    path(
+        "combustible/rendimiento/",
+        RendimientoCombustibleView.as_view(),
+        name="combustible_rendimiento",
+    ),
     path(
         "combustible/nuevo/",
         RegistroCombustibleCreateView.as_view(),
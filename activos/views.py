@@ -1,8 +1,12 @@
+from datetime import timedelta
+
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from django.urls import reverse_lazy
-from django.views.generic import CreateView, DeleteView, ListView, TemplateView, UpdateView
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.generic import CreateView, DeleteView, DetailView, ListView, TemplateView, UpdateView
 
 from .forms import (
     ArmamentoForm,
@@ -11,7 +15,10 @@ from .forms import (
     RegistroCombustibleForm,
     VehiculoForm,
 )
+from .historial import historial_activo
+from .inventario import bajo_minimo
 from .models import Armamento, AsignacionActivo, Refaccion, RegistroCombustible, Vehiculo
+from .rendimiento import analizar_combustible
 
 
 class HomeView(LoginRequiredMixin, TemplateView):
@@ -164,6 +171,28 @@ class VehiculoDeleteView(LoginRequiredMixin, ActivosPermissionMixin, DeleteView)
     success_url = reverse_lazy("activos:vehiculo_list")
 
 
+class ActivoHistorialView(LoginRequiredMixin, ActivosPermissionMixin, DetailView):
+    """Historial de un vehiculo o arma; ``model`` se fija en la URL."""
+
+    template_name = "activos/activo_historial.html"
+    context_object_name = "activo"
+
+    def get_permission_required(self):
+        return (f"activos.view_{self.model._meta.model_name}",)
+
+    def get_fecha(self, nombre):
+        try:
+            return parse_date(self.request.GET.get(nombre, ""))
+        except ValueError:
+            return None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["eventos"] = historial_activo(self.object, self.get_fecha("date_from"), self.get_fecha("date_to"))
+        context["lista_url"] = f"activos:{self.model._meta.model_name}_list"
+        return context
+
+
 class ArmamentoListView(LoginRequiredMixin, ActivosPermissionMixin, SearchableListView):
     model = Armamento
     permission_required = "activos.view_armamento"
@@ -221,6 +250,17 @@ class RefaccionListView(LoginRequiredMixin, ActivosPermissionMixin, SearchableLi
     )
     default_order = "nombre"
 
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related("existencia")
+        if self.request.GET.get("bajo_minimo"):
+            queryset = bajo_minimo(queryset)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["bajo_minimo"] = bool(self.request.GET.get("bajo_minimo"))
+        return context
+
 
 class RefaccionCreateView(LoginRequiredMixin, ActivosPermissionMixin, CreateView):
     model = Refaccion
@@ -252,7 +292,11 @@ class AsignacionActivoListView(LoginRequiredMixin, ActivosPermissionMixin, Searc
     search_fields = ("asignacion__contrato__numero", "asignacion__sitio__nombre")
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # prefetch_related sobre el GenericForeignKey agrupa por content_type:
+        # una consulta por tipo de activo en lugar de una por fila.
+        queryset = (
+            super().get_queryset().select_related("asignacion__contrato__cliente").prefetch_related("activo")
+        )
         vehiculo_id = self.request.GET.get("vehiculo")
         if vehiculo_id:
             content_type = ContentType.objects.get_for_model(Vehiculo)
@@ -322,6 +366,39 @@ class RegistroCombustibleListView(LoginRequiredMixin, ActivosPermissionMixin, Se
         return context
 
 
+class RendimientoCombustibleView(LoginRequiredMixin, ActivosPermissionMixin, TemplateView):
+    permission_required = "activos.view_registrocombustible"
+    template_name = "activos/rendimiento_combustible.html"
+
+    def get_fecha(self, nombre):
+        try:
+            return parse_date(self.request.GET.get(nombre, ""))
+        except ValueError:
+            return None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        hasta = self.get_fecha("date_to") or timezone.localdate()
+        desde = self.get_fecha("date_from") or hasta - timedelta(days=365)
+        valor = self.request.GET.get("vehiculo", "")
+        vehiculo_id = int(valor) if valor.isdigit() else None
+        analisis = analizar_combustible(desde, hasta, vehiculo_id, detalle=bool(vehiculo_id))
+        vehiculos = Vehiculo.objects.order_by("clave")
+        por_id = {vehiculo.pk: vehiculo for vehiculo in vehiculos}
+        for fila in analisis["vehiculos"] + analisis["anomalias"] + analisis["cargas"]:
+            fila["vehiculo"] = por_id.get(fila["vehiculo_id"])
+        context.update(
+            desde=desde,
+            hasta=hasta,
+            vehiculo=por_id.get(vehiculo_id),
+            vehiculos=vehiculos,
+            resumen=analisis["vehiculos"],
+            anomalias=sorted(analisis["anomalias"], key=lambda carga: carga["fecha"], reverse=True),
+            cargas=analisis["cargas"],
+        )
+        return context
+
+
 class RegistroCombustibleCreateView(LoginRequiredMixin, ActivosPermissionMixin, CreateView):
     model = RegistroCombustible
     permission_required = "activos.add_registrocombustible"
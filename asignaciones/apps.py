@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AsignacionesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "asignaciones"
+
+    def ready(self):
+        from .rutas import conectar
+
+        conectar()
@@ -0,0 +1,95 @@
+import heapq
+from datetime import date
+
+from django.db.models import Q
+
+from .models import AsignacionEmpleado
+
+
+MINUTOS_DIA = 24 * 60
+# Una asignacion sin fecha fin sigue vigente indefinidamente.
+SIN_FIN = date.max
+
+
+def ventana_turno(hora_inicio, hora_fin):
+    """Minutos ``(inicio, fin)`` del turno; si cruza la medianoche, fin pasa de 1440.
+
+    Sin turno la asignacion ocupa el dia completo.
+    """
+    if hora_inicio is None or hora_fin is None:
+        return 0, MINUTOS_DIA
+    inicio = hora_inicio.hour * 60 + hora_inicio.minute
+    fin = hora_fin.hour * 60 + hora_fin.minute
+    if fin <= inicio:
+        fin += MINUTOS_DIA
+    return inicio, fin
+
+
+def turnos_chocan(a, b):
+    # Un turno nocturno invade la manana siguiente, por eso tambien se
+    # compara contra el otro turno desplazado un dia.
+    return any(
+        a[0] < b[1] + desplazamiento and b[0] + desplazamiento < a[1]
+        for desplazamiento in (-MINUTOS_DIA, 0, MINUTOS_DIA)
+    )
+
+
+def barrer_conflictos(intervalos):
+    """Pares en conflicto dentro de intervalos ya ordenados por (empleado, inicio).
+
+    Cada intervalo es ``(pk, empleado_id, inicio, fin, ventana)``. Un barrido
+    con un heap de los intervalos abiertos da O(n log n + k), donde k son los
+    pares que se traslapan en fechas; solo esos se comparan por turno.
+    """
+    conflictos = []
+    empleado_actual = None
+    abiertos = []
+    for intervalo in intervalos:
+        pk, empleado_id, inicio, fin, ventana = intervalo
+        if empleado_id != empleado_actual:
+            empleado_actual, abiertos = empleado_id, []
+        while abiertos and abiertos[0][0] < inicio:
+            heapq.heappop(abiertos)
+        for _, _, otro in abiertos:
+            if turnos_chocan(otro[4], ventana):
+                conflictos.append((otro, intervalo))
+        heapq.heappush(abiertos, (fin, pk, intervalo))
+    return conflictos
+
+
+def _intervalos(queryset):
+    for pk, empleado_id, inicio, fin, hora_inicio, hora_fin in queryset.values_list(
+        "pk",
+        "empleado_id",
+        "fecha_inicio",
+        "fecha_fin",
+        "asignacion__turno__hora_inicio",
+        "asignacion__turno__hora_fin",
+    ):
+        yield pk, empleado_id, inicio, fin or SIN_FIN, ventana_turno(hora_inicio, hora_fin)
+
+
+def vigentes():
+    return AsignacionEmpleado.objects.filter(estatus="activo", asignacion__estatus="activo")
+
+
+def auditar(empleado_id=None):
+    """Todos los pares de asignaciones activas que se empalman, en una sola consulta."""
+    queryset = vigentes().order_by("empleado_id", "fecha_inicio", "pk")
+    if empleado_id:
+        queryset = queryset.filter(empleado_id=empleado_id)
+    return barrer_conflictos(_intervalos(queryset))
+
+
+def conflictos_para(empleado_id, fecha_inicio, fecha_fin, turno=None, excluir=None):
+    """Asignaciones activas del empleado que chocan con el rango y turno propuestos."""
+    queryset = vigentes().filter(empleado_id=empleado_id).filter(
+        Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=fecha_inicio)
+    )
+    if fecha_fin:
+        queryset = queryset.filter(fecha_inicio__lte=fecha_fin)
+    if excluir:
+        queryset = queryset.exclude(pk__in=excluir)
+    ventana = ventana_turno(turno.hora_inicio, turno.hora_fin) if turno else ventana_turno(None, None)
+    choques = [pk for pk, _, _, _, otra in _intervalos(queryset) if turnos_chocan(otra, ventana)]
+    return list(AsignacionEmpleado.objects.filter(pk__in=choques).select_related("asignacion"))
@@ -1,5 +1,6 @@
 from django import forms
 
+from .conflictos import conflictos_para
 from .models import Asignacion, AsignacionEmpleado, Equipo, Ruta, RutaPunto
 
 
@@ -28,7 +29,19 @@ class EquipoForm(BaseBootstrapForm):
 class RutaPuntoForm(BaseBootstrapForm):
     class Meta:
         model = RutaPunto
-        fields = ("orden", "nombre", "km_desde_anterior")
+        fields = ("orden", "nombre", "km_desde_anterior", "latitud", "longitud", "radio_metros")
+
+    def clean(self):
+        cleaned = super().clean()
+        latitud = cleaned.get("latitud")
+        longitud = cleaned.get("longitud")
+        if (latitud is None) != (longitud is None):
+            self.add_error("longitud" if longitud is None else "latitud", "Captura latitud y longitud.")
+        if latitud is not None and (latitud < -90 or latitud > 90):
+            self.add_error("latitud", "Latitud fuera de rango.")
+        if longitud is not None and (longitud < -180 or longitud > 180):
+            self.add_error("longitud", "Longitud fuera de rango.")
+        return cleaned
 
 
 class AsignacionForm(BaseBootstrapForm):
@@ -54,8 +67,27 @@ class AsignacionForm(BaseBootstrapForm):
             self.add_error("sitio", "Selecciona un sitio para asignaciones de tipo sitio.")
         if fecha_inicio and fecha_fin and fecha_fin < fecha_inicio:
             self.add_error("fecha_fin", "La fecha fin no puede ser menor a la fecha inicio.")
+        elif self.instance.pk and cleaned.get("estatus") == "activo":
+            self._validar_empalmes(cleaned.get("turno"))
         return cleaned
 
+    def _validar_empalmes(self, turno):
+        # Cambiar el turno de una asignacion existente puede empalmar a su personal.
+        for asignado in self.instance.asignacionempleado_set.filter(estatus="activo").select_related("empleado"):
+            choques = conflictos_para(
+                asignado.empleado_id,
+                asignado.fecha_inicio,
+                asignado.fecha_fin,
+                turno,
+                excluir=[asignado.pk],
+            )
+            choques = [c for c in choques if c.asignacion_id != self.instance.pk]
+            if choques:
+                self.add_error(
+                    "turno",
+                    f"{asignado.empleado} quedaria empalmado con {', '.join(str(c.asignacion) for c in choques)}.",
+                )
+
 
 class AsignacionEmpleadoForm(BaseBootstrapForm):
     class Meta:
@@ -72,4 +104,25 @@ class AsignacionEmpleadoForm(BaseBootstrapForm):
         fecha_fin = cleaned.get("fecha_fin")
         if fecha_inicio and fecha_fin and fecha_fin < fecha_inicio:
             self.add_error("fecha_fin", "La fecha fin no puede ser menor a la fecha inicio.")
+            return cleaned
+
+        empleado = cleaned.get("empleado")
+        asignacion = cleaned.get("asignacion")
+        if (
+            empleado
+            and asignacion
+            and fecha_inicio
+            and cleaned.get("estatus") == "activo"
+            and asignacion.estatus == "activo"
+        ):
+            choques = conflictos_para(
+                empleado.pk,
+                fecha_inicio,
+                fecha_fin,
+                asignacion.turno,
+                excluir=[self.instance.pk] if self.instance.pk else None,
+            )
+            if choques:
+                detalle = ", ".join(f"{c.asignacion} ({c.fecha_inicio} - {c.fecha_fin or 'abierta'})" for c in choques)
+                self.add_error(None, f"El empleado ya tiene asignaciones que se empalman: {detalle}.")
         return cleaned
@@ -0,0 +1,31 @@
+import time as reloj
+
+from django.core.management.base import BaseCommand
+
+from asignaciones.conflictos import SIN_FIN, auditar
+from asignaciones.models import AsignacionEmpleado
+
+
+class Command(BaseCommand):
+    help = "Reporta empleados con asignaciones activas que se empalman en fechas y turno."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--empleado", type=int)
+
+    def handle(self, *args, **options):
+        inicio = reloj.monotonic()
+        conflictos = auditar(options["empleado"])
+        ids = {intervalo[0] for par in conflictos for intervalo in par}
+        asignados = AsignacionEmpleado.objects.select_related("empleado", "asignacion").in_bulk(ids)
+
+        for a, b in conflictos:
+            primero, segundo = asignados[a[0]], asignados[b[0]]
+            desde = b[2]
+            hasta = min(a[3], b[3])
+            self.stdout.write(
+                f"{primero.empleado}: {primero.asignacion} / {segundo.asignacion} "
+                f"del {desde} al {'indefinido' if hasta == SIN_FIN else hasta} "
+                f"(#{primero.pk}, #{segundo.pk})"
+            )
+        estilo = self.style.WARNING if conflictos else self.style.SUCCESS
+        self.stdout.write(estilo(f"Conflictos: {len(conflictos)} en {reloj.monotonic() - inicio:.2f}s."))
@@ -0,0 +1,59 @@
+import time as reloj
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from asignaciones.plantilla import generar_plantilla
+from usuarios.models import Turno
+
+
+class Command(BaseCommand):
+    help = "Genera asignaciones de sitio para cubrir los requerimientos de guardias abiertos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", type=date.fromisoformat, default=None, help="Por omision, hoy.")
+        parser.add_argument("--hasta", type=date.fromisoformat)
+        parser.add_argument("--turno", type=int, action="append", help="Id de turno; se puede repetir.")
+        parser.add_argument("--contrato", type=int)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        options["desde"] = options["desde"] or timezone.localdate()
+        if options["hasta"] and options["hasta"] < options["desde"]:
+            raise CommandError("--hasta no puede ser anterior a --desde.")
+        turnos = Turno.objects.order_by("hora_inicio", "pk")
+        if options["turno"]:
+            turnos = turnos.filter(pk__in=options["turno"])
+        turnos = list(turnos)
+        if not turnos:
+            raise CommandError("No hay turnos para generar la plantilla.")
+
+        inicio = reloj.monotonic()
+        resultado = generar_plantilla(
+            options["desde"],
+            turnos,
+            fecha_fin=options["hasta"],
+            contrato_id=options["contrato"],
+            guardar=not options["dry_run"],
+        )
+        if options["verbosity"] > 1:
+            for requerimiento, turno, fin, elegidos in resultado["plan"]:
+                self.stdout.write(f"{requerimiento} / {requerimiento.sitio} / {turno}: {len(elegidos)} asignados")
+        faltan = 0
+        for requerimiento, turno, capacidad, cantidad in resultado["faltantes"]:
+            faltan += cantidad
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Faltan {cantidad} ({capacidad}): {requerimiento} / {requerimiento.sitio} / {turno}"
+                )
+            )
+        prefijo = "Simulacion: " if options["dry_run"] else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefijo}{resultado['asignados']} empleados asignados en "
+                f"{resultado['requerimientos']} requerimientos, "
+                f"{resultado['asignaciones_creadas']} asignaciones nuevas, "
+                f"{faltan} plazas sin cubrir, en {reloj.monotonic() - inicio:.2f}s."
+            )
+        )
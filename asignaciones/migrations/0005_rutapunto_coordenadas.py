@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asignaciones', '0004_migrate_ruta_points'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rutapunto',
+            name='latitud',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='rutapunto',
+            name='longitud',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='rutapunto',
+            name='radio_metros',
+            field=models.PositiveIntegerField(default=100),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asignaciones', '0005_rutapunto_coordenadas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ruta',
+            name='km_puntos',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='num_puntos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='punto_destino',
+            field=models.CharField(blank=True, editable=False, max_length=120),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='punto_origen',
+            field=models.CharField(blank=True, editable=False, max_length=120),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    Ruta = apps.get_model("asignaciones", "Ruta")
+    RutaPunto = apps.get_model("asignaciones", "RutaPunto")
+
+    puntos_por_ruta = {}
+    for ruta_id, nombre, km in RutaPunto.objects.order_by("ruta_id", "orden", "id").values_list(
+        "ruta_id", "nombre", "km_desde_anterior"
+    ):
+        puntos_por_ruta.setdefault(ruta_id, []).append((nombre, km))
+
+    rutas = []
+    for ruta in Ruta.objects.filter(pk__in=list(puntos_por_ruta)):
+        puntos = puntos_por_ruta[ruta.pk]
+        ruta.num_puntos = len(puntos)
+        ruta.km_puntos = sum((km for _, km in puntos), Decimal("0"))
+        ruta.punto_origen = puntos[0][0]
+        ruta.punto_destino = puntos[-1][0]
+        rutas.append(ruta)
+    Ruta.objects.bulk_update(
+        rutas, ["num_puntos", "km_puntos", "punto_origen", "punto_destino"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("asignaciones", "0006_ruta_resumen_puntos"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
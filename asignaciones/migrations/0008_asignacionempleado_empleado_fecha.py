@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asignaciones', '0007_calcular_resumen_rutas'),
+        ('usuarios', '0003_migrate_contrasena_temporal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asignacionempleado',
+            index=models.Index(fields=['empleado', 'fecha_inicio'], name='asignacione_emplead_c7976c_idx'),
+        ),
+    ]
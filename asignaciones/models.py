@@ -20,29 +20,30 @@ class Ruta(models.Model):
     destino = models.CharField(max_length=120)
     distancia_km = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     estatus = models.CharField(max_length=20, choices=ESTATUS_CHOICES, default="activo")
+    # Resumen de las paradas, mantenido por asignaciones.rutas al cambiar RutaPunto.
+    num_puntos = models.PositiveIntegerField(default=0, editable=False)
+    km_puntos = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    punto_origen = models.CharField(max_length=120, blank=True, editable=False)
+    punto_destino = models.CharField(max_length=120, blank=True, editable=False)
 
     def __str__(self):
         return self.nombre
 
     @property
     def total_km(self):
-        total = self.puntos.aggregate(total=models.Sum("km_desde_anterior"))["total"]
-        return total or 0
+        return self.km_puntos
 
     @property
     def origen_nombre(self):
-        primer = self.puntos.order_by("orden").first()
-        return primer.nombre if primer else "-"
+        return self.punto_origen or "-"
 
     @property
     def destino_nombre(self):
-        ultimo = self.puntos.order_by("orden").last()
-        return ultimo.nombre if ultimo else "-"
+        return self.punto_destino or "-"
 
     @property
     def total_paradas(self):
-        total = self.puntos.count()
-        return max(total - 1, 0)
+        return max(self.num_puntos - 1, 0)
 
 
 class RutaPunto(models.Model):
@@ -50,6 +51,9 @@ class RutaPunto(models.Model):
     orden = models.PositiveIntegerField(default=1)
     nombre = models.CharField(max_length=120)
     km_desde_anterior = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    latitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    radio_metros = models.PositiveIntegerField(default=100)
 
     class Meta:
         ordering = ["orden", "id"]
@@ -95,6 +99,9 @@ class AsignacionEmpleado(models.Model):
     fecha_fin = models.DateField(null=True, blank=True)
     estatus = models.CharField(max_length=20, choices=ESTATUS_CHOICES, default="activo")
 
+    class Meta:
+        indexes = [models.Index(fields=["empleado", "fecha_inicio"])]
+
     def __str__(self):
         return f"{self.asignacion} - {self.empleado}".strip()
 
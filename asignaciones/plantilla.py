@@ -0,0 +1,256 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from operaciones.models import Requerimiento
+from tracking.sincronizacion import registrar_cambios
+from usuarios.models import Empleado, EmpleadoCertificacion
+
+from .conflictos import SIN_FIN, _intervalos, turnos_chocan, ventana_turno, vigentes
+from .models import Asignacion, AsignacionEmpleado
+
+
+# Capacidad -> campo de Requerimiento con cuantas personas la necesitan.
+CAPACIDADES = {
+    "armamento": "armamento_requerido",
+    "canino": "cantidad_caninos",
+    "vehiculo": "vehiculos_requeridos",
+}
+# Capacidad -> nombres de Certificacion que la acreditan.
+CERTIFICACIONES = getattr(
+    settings,
+    "ASIGNACIONES_CERTIFICACIONES",
+    {
+        "armamento": ["Portacion de armas"],
+        "canino": ["Manejo canino"],
+        "vehiculo": ["Licencia de manejo"],
+    },
+)
+
+
+def _capacidades(fecha_hasta):
+    """``{empleado_id: {capacidad, ...}}`` con certificaciones vigentes hasta la fecha."""
+    por_nombre = defaultdict(set)
+    for capacidad, nombres in CERTIFICACIONES.items():
+        for nombre in nombres:
+            por_nombre[nombre.lower()].add(capacidad)
+    capacidades = defaultdict(set)
+    for empleado_id, nombre in (
+        EmpleadoCertificacion.objects.filter(
+            certificacion__nombre__in=[n for nombres in CERTIFICACIONES.values() for n in nombres]
+        )
+        .filter(Q(fecha_vencimiento__isnull=True) | Q(fecha_vencimiento__gte=fecha_hasta))
+        .values_list("empleado_id", "certificacion__nombre")
+    ):
+        capacidades[empleado_id] |= por_nombre[nombre.lower()]
+    return capacidades
+
+
+def _ocupacion(fecha_inicio, fecha_fin):
+    """Intervalos activos por empleado que tocan el rango, en una consulta."""
+    queryset = vigentes().filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=fecha_inicio))
+    if fecha_fin:
+        queryset = queryset.filter(fecha_inicio__lte=fecha_fin)
+    ocupacion = defaultdict(list)
+    for _, empleado_id, _, _, ventana in _intervalos(queryset):
+        ocupacion[empleado_id].append(ventana)
+    return ocupacion
+
+
+class _Bolsa:
+    """Candidatos en orden de preferencia; cada empleado se toma una sola vez."""
+
+    def __init__(self, empleados, tomados):
+        self.empleados = empleados
+        self.tomados = tomados
+        self.cursor = 0
+
+    def tomar(self):
+        # Los ya tomados nunca vuelven a estar libres, asi que el cursor solo avanza.
+        while self.cursor < len(self.empleados) and self.empleados[self.cursor] in self.tomados:
+            self.cursor += 1
+        if self.cursor == len(self.empleados):
+            return None
+        empleado_id = self.empleados[self.cursor]
+        self.tomados.add(empleado_id)
+        return empleado_id
+
+
+def generar_plantilla(fecha_inicio, turnos, fecha_fin=None, contrato_id=None, guardar=True):
+    """Cubre los requerimientos abiertos con empleados disponibles.
+
+    Para cada requerimiento y turno, la demanda es ``cantidad_guardias`` menos
+    el personal ya asignado a ese contrato, sitio y turno que no haya cubierto
+    ya otro requerimiento del mismo sitio; de ella, las plazas
+    con armamento, canino o vehiculo se cubren primero con personal que tenga
+    la certificacion vigente. Un empleado esta disponible si ninguna de sus
+    asignaciones activas se empalma con el turno en el rango, y recibe a lo
+    sumo una asignacion nueva por corrida. Todo se lee con unas cuantas
+    consultas y se escribe en bloque.
+    """
+    hasta = fecha_fin or fecha_inicio
+    requerimientos = (
+        Requerimiento.objects.filter(
+            contrato__estatus="activo",
+            sitio__estatus="activo",
+            contrato__fecha_inicio__lte=hasta,
+            cantidad_guardias__gt=0,
+        )
+        .filter(Q(contrato__fecha_fin__isnull=True) | Q(contrato__fecha_fin__gte=fecha_inicio))
+        .select_related("contrato", "servicio", "sitio")
+        .order_by("contrato_id", "sitio_id", "pk")
+    )
+    if contrato_id:
+        requerimientos = requerimientos.filter(contrato_id=contrato_id)
+    requerimientos = list(requerimientos)
+
+    capacidades = _capacidades(hasta)
+    ocupacion = _ocupacion(fecha_inicio, fecha_fin)
+
+    cubiertos = defaultdict(Counter)
+    for contrato, sitio, turno, empleado_id in (
+        vigentes()
+        .filter(asignacion__tipo="sitio", fecha_inicio__lte=hasta)
+        .filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=fecha_inicio))
+        .values_list("asignacion__contrato_id", "asignacion__sitio_id", "asignacion__turno_id", "empleado_id")
+    ):
+        clave = (contrato, sitio, turno)
+        cubiertos[clave]["total"] += 1
+        for capacidad in capacidades.get(empleado_id, ()):
+            cubiertos[clave][capacidad] += 1
+
+    empleados = list(
+        Empleado.objects.filter(estatus="activo")
+        .filter(Q(puesto__isnull=True) | Q(puesto__es_operativo=True))
+        .values_list("pk", "turno_preferido_id")
+    )
+    tomados = set()
+    bolsas = {}
+    for turno in turnos:
+        ventana = ventana_turno(turno.hora_inicio, turno.hora_fin)
+        libres = [
+            (pk, preferido)
+            for pk, preferido in empleados
+            if not any(turnos_chocan(otra, ventana) for otra in ocupacion.get(pk, ()))
+        ]
+        # Primero quien prefiere el turno; para plazas generales, quien tiene
+        # menos certificaciones, para no gastar personal escaso.
+        libres.sort(key=lambda e: (e[1] != turno.pk, len(capacidades.get(e[0], ())), e[0]))
+        bolsas[turno.pk] = {"general": _Bolsa([pk for pk, _ in libres], tomados)}
+        for capacidad in CAPACIDADES:
+            bolsas[turno.pk][capacidad] = _Bolsa(
+                [pk for pk, _ in libres if capacidad in capacidades.get(pk, ())], tomados
+            )
+
+    plan = []
+    faltantes = []
+    for requerimiento in requerimientos:
+        contrato = requerimiento.contrato
+        fin = min(fecha_fin or SIN_FIN, contrato.fecha_fin or SIN_FIN)
+        fin = None if fin == SIN_FIN else fin
+        for turno in turnos:
+            # El personal ya asignado al sitio se reparte entre sus
+            # requerimientos: lo que cubre uno ya no cuenta para el siguiente.
+            cubierto = cubiertos[(contrato.pk, requerimiento.sitio_id, turno.pk)]
+            previos = min(cubierto["total"], requerimiento.cantidad_guardias)
+            cubierto["total"] -= previos
+            abiertas = requerimiento.cantidad_guardias - previos
+            requeridas = {}
+            for capacidad, campo in CAPACIDADES.items():
+                previos = min(cubierto[capacidad], getattr(requerimiento, campo))
+                cubierto[capacidad] -= previos
+                requeridas[capacidad] = getattr(requerimiento, campo) - previos
+            if abiertas <= 0:
+                continue
+            elegidos = []
+            for capacidad in CAPACIDADES:
+                necesarias = min(requeridas[capacidad], abiertas - len(elegidos))
+                for restantes in range(max(necesarias, 0), 0, -1):
+                    empleado_id = bolsas[turno.pk][capacidad].tomar()
+                    if empleado_id is None:
+                        faltantes.append((requerimiento, turno, capacidad, restantes))
+                        break
+                    elegidos.append((empleado_id, capacidad))
+            while len(elegidos) < abiertas:
+                empleado_id = bolsas[turno.pk]["general"].tomar()
+                if empleado_id is None:
+                    faltantes.append((requerimiento, turno, "general", abiertas - len(elegidos)))
+                    break
+                elegidos.append((empleado_id, ""))
+            if elegidos:
+                plan.append((requerimiento, turno, fin, elegidos))
+
+    creadas = 0
+    if guardar and plan:
+        creadas = _guardar(plan, fecha_inicio)
+    return {
+        "requerimientos": len(requerimientos),
+        "asignados": sum(len(elegidos) for *_, elegidos in plan),
+        "asignaciones_creadas": creadas,
+        "plan": plan,
+        "faltantes": faltantes,
+    }
+
+
+def _guardar(plan, fecha_inicio):
+    with transaction.atomic():
+        existentes = {}
+        for asignacion in Asignacion.objects.filter(
+            tipo="sitio",
+            estatus="activo",
+            contrato_id__in={r.contrato_id for r, *_ in plan},
+            fecha_inicio__lte=fecha_inicio,
+        ).order_by("pk"):
+            existentes[(asignacion.contrato_id, asignacion.sitio_id, asignacion.turno_id, asignacion.fecha_fin)] = asignacion.pk
+
+        nuevas = {}
+        for requerimiento, turno, fin, _ in plan:
+            clave = (requerimiento.contrato_id, requerimiento.sitio_id, turno.pk, fin)
+            if clave not in existentes and clave not in nuevas:
+                nuevas[clave] = Asignacion(
+                    tipo="sitio",
+                    contrato_id=requerimiento.contrato_id,
+                    sitio_id=requerimiento.sitio_id,
+                    turno=turno,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fin,
+                    observaciones="Generada automaticamente desde requerimientos.",
+                )
+        # Son pocas (una por sitio y turno): save() regresa el id y dispara
+        # la senal de sincronizacion.
+        for clave, asignacion in nuevas.items():
+            asignacion.save()
+            existentes[clave] = asignacion.pk
+
+        filas = [
+            AsignacionEmpleado(
+                asignacion_id=existentes[(requerimiento.contrato_id, requerimiento.sitio_id, turno.pk, fin)],
+                empleado_id=empleado_id,
+                rol=capacidad,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fin,
+            )
+            for requerimiento, turno, fin, elegidos in plan
+            for empleado_id, capacidad in elegidos
+        ]
+        AsignacionEmpleado.objects.bulk_create(filas, batch_size=500)
+        # bulk_create no dispara senales ni regresa ids en MySQL. Cada empleado
+        # recibe una sola asignacion por corrida, asi que (asignacion, empleado,
+        # fecha_inicio) identifica su fila; el id mayor es el recien insertado.
+        claves = {(fila.asignacion_id, fila.empleado_id) for fila in filas}
+        ids = {}
+        for pk, asignacion_id, empleado_id in (
+            AsignacionEmpleado.objects.filter(
+                asignacion_id__in={asignacion_id for asignacion_id, _ in claves},
+                empleado_id__in={empleado_id for _, empleado_id in claves},
+                fecha_inicio=fecha_inicio,
+            )
+            .order_by("pk")
+            .values_list("pk", "asignacion_id", "empleado_id")
+        ):
+            if (asignacion_id, empleado_id) in claves:
+                ids[(asignacion_id, empleado_id)] = pk
+        registrar_cambios(AsignacionEmpleado, {pk: empleado_id for (_, empleado_id), pk in ids.items()})
+    return len(nuevas)
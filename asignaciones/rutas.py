@@ -0,0 +1,154 @@
+from collections import Counter
+from contextvars import ContextVar
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from tracking.sincronizacion import registrar_cambios
+
+from .forms import RutaPuntoForm
+from .models import Ruta, RutaPunto
+
+
+RESUMEN_CAMPOS = ["num_puntos", "km_puntos", "punto_origen", "punto_destino"]
+PARADA_CAMPOS = ["orden", "nombre", "km_desde_anterior", "latitud", "longitud", "radio_metros"]
+
+# Mientras guardar_paradas trabaja, el resumen se calcula una vez al final.
+_en_bloque = ContextVar("asignaciones_rutas_en_bloque", default=False)
+
+
+def calcular_resumen(puntos):
+    """Resumen a partir de ``(nombre, km_desde_anterior)`` ya ordenados por parada."""
+    puntos = list(puntos)
+    return {
+        "num_puntos": len(puntos),
+        "km_puntos": sum((km for _, km in puntos), Decimal("0")),
+        "punto_origen": puntos[0][0] if puntos else "",
+        "punto_destino": puntos[-1][0] if puntos else "",
+    }
+
+
+def actualizar_resumen(ruta_id):
+    """Recalcula el resumen de paradas de la ruta con una sola lectura de sus puntos.
+
+    Bloquea la fila de la ruta para que dos ediciones concurrentes de paradas
+    no dejen un resumen mezclado.
+    """
+    with transaction.atomic():
+        ruta = Ruta.objects.select_for_update().filter(pk=ruta_id).first()
+        if ruta is None:
+            return None
+        resumen = calcular_resumen(
+            RutaPunto.objects.filter(ruta_id=ruta_id).order_by("orden", "id").values_list("nombre", "km_desde_anterior")
+        )
+        if any(getattr(ruta, campo) != valor for campo, valor in resumen.items()):
+            for campo, valor in resumen.items():
+                setattr(ruta, campo, valor)
+            ruta.save(update_fields=RESUMEN_CAMPOS)
+        return ruta
+
+
+def _al_guardar_punto(sender, instance, **kwargs):
+    if _en_bloque.get():
+        return
+    actualizar_resumen(instance.ruta_id)
+
+
+def _al_eliminar_punto(sender, instance, origin=None, **kwargs):
+    # Al borrar la ruta completa sus paradas caen en cascada; no hay que resumir.
+    if _en_bloque.get() or isinstance(origin, Ruta):
+        return
+    actualizar_resumen(instance.ruta_id)
+
+
+def conectar():
+    post_save.connect(_al_guardar_punto, sender=RutaPunto, dispatch_uid="asignaciones-rutapunto-save")
+    post_delete.connect(_al_eliminar_punto, sender=RutaPunto, dispatch_uid="asignaciones-rutapunto-delete")
+
+
+class ParadasInvalidas(Exception):
+    def __init__(self, errores):
+        super().__init__("Paradas invalidas.")
+        self.errores = errores
+
+
+def validar_paradas(paradas):
+    """Valida la lista ordenada de paradas con RutaPuntoForm, fila por fila."""
+    if not isinstance(paradas, list):
+        raise ParadasInvalidas({"paradas": ["Se esperaba una lista de paradas."]})
+    limpias = []
+    errores = {}
+    for index, parada in enumerate(paradas):
+        if not isinstance(parada, dict):
+            errores[index] = {"__all__": ["La parada debe ser un objeto."]}
+            continue
+        pk = parada.get("id")
+        if pk is not None and (not isinstance(pk, int) or isinstance(pk, bool)):
+            errores[index] = {"id": ["Id invalido."]}
+            continue
+        data = {campo: parada.get(campo) for campo in PARADA_CAMPOS}
+        data["orden"] = index + 1
+        if data["km_desde_anterior"] is None:
+            data["km_desde_anterior"] = 0
+        if data["radio_metros"] is None:
+            data["radio_metros"] = 100
+        form = RutaPuntoForm(data={k: "" if v is None else v for k, v in data.items()})
+        if not form.is_valid():
+            errores[index] = form.errors.get_json_data()
+            continue
+        limpias.append((pk, {campo: form.cleaned_data[campo] for campo in PARADA_CAMPOS}))
+    if errores:
+        raise ParadasInvalidas(errores)
+    return limpias
+
+
+def guardar_paradas(ruta_id, paradas):
+    """Reemplaza las paradas de la ruta por la lista ordenada recibida.
+
+    Compara contra las filas actuales y aplica altas (``bulk_create``),
+    cambios (``bulk_update``) y bajas en una sola transaccion; el orden sale
+    de la posicion en la lista. Regresa ``{"creadas", "actualizadas", "eliminadas"}``.
+    """
+    limpias = validar_paradas(paradas)
+    with transaction.atomic():
+        Ruta.objects.select_for_update().filter(pk=ruta_id).values_list("pk", flat=True).get()
+        actuales = {punto.pk: punto for punto in RutaPunto.objects.filter(ruta_id=ruta_id)}
+
+        desconocidos = [pk for pk, _ in limpias if pk is not None and pk not in actuales]
+        if desconocidos:
+            raise ParadasInvalidas({"paradas": [f"Paradas que no pertenecen a la ruta: {desconocidos}."]})
+        repetidos = [pk for pk, veces in Counter(pk for pk, _ in limpias if pk is not None).items() if veces > 1]
+        if repetidos:
+            raise ParadasInvalidas({"paradas": [f"Paradas repetidas: {sorted(repetidos)}."]})
+
+        nuevas, cambiadas = [], []
+        for pk, valores in limpias:
+            if pk is None:
+                nuevas.append(RutaPunto(ruta_id=ruta_id, **valores))
+                continue
+            punto = actuales[pk]
+            if any(getattr(punto, campo) != valor for campo, valor in valores.items()):
+                for campo, valor in valores.items():
+                    setattr(punto, campo, valor)
+                cambiadas.append(punto)
+        conservadas = {pk for pk, _ in limpias if pk is not None}
+        eliminadas = [pk for pk in actuales if pk not in conservadas]
+
+        token = _en_bloque.set(True)
+        try:
+            if eliminadas:
+                RutaPunto.objects.filter(pk__in=eliminadas).delete()
+            if cambiadas:
+                RutaPunto.objects.bulk_update(cambiadas, PARADA_CAMPOS, batch_size=500)
+            if nuevas:
+                RutaPunto.objects.bulk_create(nuevas, batch_size=500)
+        finally:
+            _en_bloque.reset(token)
+
+        # bulk_create/bulk_update no disparan senales; MySQL tampoco regresa
+        # los ids creados, asi que se leen de nuevo.
+        creadas = RutaPunto.objects.filter(ruta_id=ruta_id).exclude(pk__in=list(actuales)).values_list("pk", flat=True)
+        registrar_cambios(RutaPunto, [p.pk for p in cambiadas] + list(creadas))
+        actualizar_resumen(ruta_id)
+    return {"creadas": len(nuevas), "actualizadas": len(cambiadas), "eliminadas": len(eliminadas)}
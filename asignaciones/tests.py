@@ -0,0 +1,71 @@
+from datetime import date, time
+
+from django.test import TestCase
+
+from operaciones.models import Cliente, Contrato, Requerimiento, Servicio, Sitio
+from tracking.models import CambioSync
+from usuarios.models import Empleado, Turno
+
+from .models import Asignacion, AsignacionEmpleado
+from .plantilla import generar_plantilla
+
+
+class GenerarPlantillaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cliente = Cliente.objects.create(nombre="Cliente")
+        cls.sitio = Sitio.objects.create(cliente=cliente, nombre="Sitio", direccion="Calle 1")
+        cls.contrato = Contrato.objects.create(cliente=cliente, numero="C-1", fecha_inicio=date(2024, 1, 1))
+        cls.servicio = Servicio.objects.create(nombre="Vigilancia")
+        cls.turno = Turno.objects.create(
+            nombre="Dia", hora_inicio=time(8), hora_fin=time(16), dias_semana="L-D"
+        )
+        cls.fecha = date(2024, 6, 1)
+
+    def requerimiento(self, guardias):
+        return Requerimiento.objects.create(
+            contrato=self.contrato, servicio=self.servicio, sitio=self.sitio, cantidad_guardias=guardias
+        )
+
+    def empleados(self, cantidad):
+        return [Empleado.objects.create(nombres=f"E{n}", apellidos="X") for n in range(cantidad)]
+
+    def test_varios_requerimientos_en_un_sitio(self):
+        self.requerimiento(5)
+        self.requerimiento(5)
+        existentes = self.empleados(3)
+        asignacion = Asignacion.objects.create(
+            tipo="sitio", contrato=self.contrato, sitio=self.sitio, turno=self.turno, fecha_inicio=self.fecha
+        )
+        for empleado in existentes:
+            AsignacionEmpleado.objects.create(asignacion=asignacion, empleado=empleado, fecha_inicio=self.fecha)
+        self.empleados(10)
+
+        resultado = generar_plantilla(self.fecha, [self.turno])
+
+        self.assertEqual(resultado["asignados"], 7)
+        self.assertEqual(resultado["faltantes"], [])
+        self.assertEqual(
+            AsignacionEmpleado.objects.filter(asignacion__sitio=self.sitio, estatus="activo").count(), 10
+        )
+
+    def test_registra_cambios_de_lo_creado(self):
+        self.requerimiento(2)
+        self.empleados(2)
+
+        resultado = generar_plantilla(self.fecha, [self.turno])
+
+        self.assertEqual(resultado["asignaciones_creadas"], 1)
+        nuevas = set(AsignacionEmpleado.objects.values_list("pk", flat=True))
+        self.assertEqual(len(nuevas), 2)
+        self.assertEqual(
+            set(
+                CambioSync.objects.filter(modelo="asignaciones.asignacionempleado").values_list("objeto_id", flat=True)
+            ),
+            nuevas,
+        )
+        self.assertTrue(
+            CambioSync.objects.filter(
+                modelo="asignaciones.asignacion", objeto_id=Asignacion.objects.get().pk
+            ).exists()
+        )
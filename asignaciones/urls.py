@@ -17,6 +17,7 @@ from .views import (
     RutaCreateView,
     RutaDeleteView,
     RutaListView,
+    RutaParadasView,
     RutaPuntoCreateView,
     RutaPuntoDeleteView,
     RutaPuntoListView,
@@ -33,6 +34,7 @@ urlpatterns = [
     path("rutas/<int:pk>/editar/", RutaUpdateView.as_view(), name="ruta_update"),
     path("rutas/<int:pk>/eliminar/", RutaDeleteView.as_view(), name="ruta_delete"),
     path("rutas/<int:ruta_id>/puntos/", RutaPuntoListView.as_view(), name="ruta_punto_list"),
+    path("rutas/<int:pk>/paradas/", RutaParadasView.as_view(), name="ruta_paradas"),
     path(
         "rutas/<int:ruta_id>/puntos/nuevo/",
         RutaPuntoCreateView.as_view(),
@@ -1,5 +1,9 @@
+import json
+
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.db.models import Q
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, DeleteView, ListView, TemplateView, UpdateView
 
@@ -11,6 +15,7 @@ from .forms import (
     RutaPuntoForm,
 )
 from .models import Asignacion, AsignacionEmpleado, Equipo, Ruta, RutaPunto
+from .rutas import PARADA_CAMPOS, ParadasInvalidas, guardar_paradas
 
 
 class HomeView(LoginRequiredMixin, TemplateView):
@@ -133,7 +138,8 @@ class RutaListView(LoginRequiredMixin, AsignacionesPermissionMixin, SearchableLi
     default_order = "nombre"
 
     def get_queryset(self):
-        return super().get_queryset().prefetch_related("puntos")
+        # La busqueda por nombre de parada repetiria la ruta por cada coincidencia.
+        return super().get_queryset().distinct()
 
 
 class RutaCreateView(LoginRequiredMixin, AsignacionesPermissionMixin, CreateView):
@@ -214,6 +220,41 @@ class RutaPuntoDeleteView(LoginRequiredMixin, AsignacionesPermissionMixin, Delet
         return reverse_lazy("asignaciones:ruta_punto_list", kwargs={"ruta_id": self.object.ruta_id})
 
 
+class RutaParadasView(LoginRequiredMixin, AsignacionesPermissionMixin, TemplateView):
+    permission_required = (
+        "asignaciones.add_rutapunto",
+        "asignaciones.change_rutapunto",
+        "asignaciones.delete_rutapunto",
+    )
+    template_name = "asignaciones/ruta_paradas.html"
+
+    def get_ruta(self):
+        # Se carga despues de login y permisos para no revelar que ids existen.
+        return get_object_or_404(Ruta, pk=self.kwargs.get("pk"))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        ruta = self.get_ruta()
+        context["ruta"] = ruta
+        context["paradas"] = [
+            {"id": punto.pk, **{campo: getattr(punto, campo) for campo in PARADA_CAMPOS}}
+            for punto in ruta.puntos.all()
+        ]
+        return context
+
+    def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body or b"null")
+        except ValueError:
+            return JsonResponse({"error": "JSON invalido."}, status=400)
+        paradas = data.get("paradas") if isinstance(data, dict) else data
+        try:
+            resultado = guardar_paradas(self.get_ruta().pk, paradas)
+        except ParadasInvalidas as exc:
+            return JsonResponse({"error": str(exc), "errores": exc.errores}, status=400)
+        return JsonResponse(resultado)
+
+
 class EquipoListView(LoginRequiredMixin, AsignacionesPermissionMixin, SearchableListView):
     model = Equipo
     permission_required = "asignaciones.view_equipo"
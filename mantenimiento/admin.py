@@ -1,8 +1,55 @@
+from django import forms
 from django.contrib import admin
 
+from activos.inventario import StockInsuficiente, validar_existencias
+from activos.models import InventarioMovimiento
+
+from .consumo import guardar_detalles
 from .models import DetalleMantenimiento, Inspeccion, OrdenMantenimiento, ProgramacionMantenimiento
 
+
+class DetalleMantenimientoAdminForm(forms.ModelForm):
+    class Meta:
+        model = DetalleMantenimiento
+        fields = ["orden", "refaccion", "cantidad"]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        refaccion = cleaned_data.get("refaccion")
+        cantidad = cleaned_data.get("cantidad")
+        if refaccion is None or cantidad is None:
+            return cleaned_data
+        # La salida anterior de la linea regresa al almacen antes de la nueva.
+        cambios = {refaccion.pk: -cantidad}
+        if self.instance.pk:
+            for refaccion_id, previa in InventarioMovimiento.objects.filter(detalle_id=self.instance.pk).values_list(
+                "refaccion_id", "cantidad"
+            ):
+                cambios[refaccion_id] = cambios.get(refaccion_id, 0) + previa
+        try:
+            validar_existencias(cambios)
+        except StockInsuficiente as exc:
+            self.add_error("cantidad", str(exc))
+        return cleaned_data
+
+
+@admin.register(DetalleMantenimiento)
+class DetalleMantenimientoAdmin(admin.ModelAdmin):
+    """Las lineas pasan por ``guardar_detalles`` para mover el inventario."""
+
+    form = DetalleMantenimientoAdminForm
+    readonly_fields = ["costo_unitario"]
+
+    def save_model(self, request, obj, form, change):
+        guardar_detalles([obj], usuario=request.user)
+
+    def delete_model(self, request, obj):
+        guardar_detalles([], [obj], usuario=request.user)
+
+    def delete_queryset(self, request, queryset):
+        guardar_detalles([], list(queryset), usuario=request.user)
+
+
 admin.site.register(OrdenMantenimiento)
-admin.site.register(DetalleMantenimiento)
 admin.site.register(ProgramacionMantenimiento)
 admin.site.register(Inspeccion)
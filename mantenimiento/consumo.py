@@ -0,0 +1,105 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from activos.inventario import (
+    CENTAVOS,
+    StockInsuficiente,
+    bloquear_existencias,
+    costo_promedio,
+    en_bloque,
+)
+from activos.models import ExistenciaRefaccion, InventarioMovimiento, Refaccion
+
+from .models import DetalleMantenimiento
+
+
+def guardar_detalles(detalles, eliminados=(), usuario=None):
+    """Guarda lineas de refacciones de ordenes y descuenta el inventario en la misma transaccion.
+
+    ``detalles`` son instancias nuevas o modificadas; ``eliminados``, las que
+    se quitan. Las salidas previas de esas lineas se devuelven al almacen y
+    se crea una salida por linea con ``bulk_create``. Todas las existencias
+    involucradas se leen y bloquean en una sola consulta antes de validar,
+    de modo que dos ordenes no pueden consumir la misma pieza. Cada linea se
+    valua al costo promedio vigente.
+    """
+    detalles = list(detalles)
+    eliminados = list(eliminados)
+    with transaction.atomic(), en_bloque():
+        previas = [d.pk for d in detalles + eliminados if d.pk]
+        salidas_previas = list(
+            InventarioMovimiento.objects.filter(detalle_id__in=previas).values_list(
+                "pk", "refaccion_id", "cantidad", "costo_unitario"
+            )
+        )
+        fecha = timezone.now()
+        existencias = bloquear_existencias(
+            [d.refaccion_id for d in detalles] + [s[1] for s in salidas_previas]
+        )
+
+        for _, refaccion_id, cantidad, costo in salidas_previas:
+            existencia = existencias[refaccion_id]
+            existencia.cantidad += cantidad
+            existencia.valor += (Decimal(cantidad) * costo).quantize(CENTAVOS)
+
+        demanda = Counter()
+        for detalle in detalles:
+            demanda[detalle.refaccion_id] += detalle.cantidad
+        for refaccion_id in sorted(demanda):
+            disponible = existencias[refaccion_id].cantidad
+            if demanda[refaccion_id] > disponible:
+                raise StockInsuficiente(refaccion_id, disponible, demanda[refaccion_id])
+
+        costos = {
+            refaccion_id: costo_promedio(e.cantidad, e.valor, e.refaccion.costo_unitario)
+            for refaccion_id, e in existencias.items()
+        }
+        for detalle in detalles:
+            detalle.costo_unitario = costos[detalle.refaccion_id]
+            existencia = existencias[detalle.refaccion_id]
+            existencia.cantidad -= detalle.cantidad
+            existencia.valor -= (Decimal(detalle.cantidad) * detalle.costo_unitario).quantize(CENTAVOS)
+        for existencia in existencias.values():
+            # bulk_update no aplica auto_now.
+            existencia.actualizado = fecha
+
+        InventarioMovimiento.objects.filter(pk__in=[s[0] for s in salidas_previas]).delete()
+        DetalleMantenimiento.objects.filter(pk__in=[d.pk for d in eliminados if d.pk]).delete()
+        DetalleMantenimiento.objects.bulk_update(
+            [d for d in detalles if d.pk], ["orden", "refaccion", "cantidad", "costo_unitario"], batch_size=500
+        )
+        for detalle in detalles:
+            if not detalle.pk:
+                # Pocas lineas por orden: save() deja el id para ligar su salida.
+                detalle.save()
+
+        InventarioMovimiento.objects.bulk_create(
+            [
+                InventarioMovimiento(
+                    tipo="salida",
+                    refaccion_id=detalle.refaccion_id,
+                    cantidad=detalle.cantidad,
+                    costo_unitario=detalle.costo_unitario,
+                    fecha=fecha,
+                    referencia=f"Orden de mantenimiento {detalle.orden_id}",
+                    realizado_por=usuario,
+                    detalle=detalle,
+                )
+                for detalle in detalles
+                if detalle.cantidad
+            ],
+            batch_size=500,
+        )
+        ExistenciaRefaccion.objects.bulk_update(existencias.values(), ["cantidad", "valor", "actualizado"])
+        Refaccion.objects.bulk_update(
+            [
+                Refaccion(pk=refaccion_id, costo_unitario=costo_promedio(e.cantidad, e.valor, None))
+                for refaccion_id, e in existencias.items()
+                if e.cantidad > 0
+            ],
+            ["costo_unitario"],
+        )
+    return detalles
@@ -30,7 +30,18 @@ class OrdenMantenimientoForm(BaseBootstrapForm):
 class DetalleMantenimientoForm(BaseBootstrapForm):
     class Meta:
         model = DetalleMantenimiento
-        fields = "__all__"
+        # El costo sale del promedio del inventario al guardar.
+        fields = ["orden", "refaccion", "cantidad"]
+
+
+DetalleFormSet = forms.inlineformset_factory(
+    OrdenMantenimiento,
+    DetalleMantenimiento,
+    form=DetalleMantenimientoForm,
+    fields=["refaccion", "cantidad"],
+    extra=3,
+    can_delete=True,
+)
 
 
 class ProgramacionMantenimientoForm(BaseBootstrapForm):
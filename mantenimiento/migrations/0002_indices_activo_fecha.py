@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('mantenimiento', '0001_initial'),
+        ('usuarios', '0003_migrate_contrasena_temporal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inspeccion',
+            index=models.Index(fields=['content_type', 'object_id', 'fecha'], name='mantenimien_content_b85184_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordenmantenimiento',
+            index=models.Index(fields=['content_type', 'object_id', 'fecha_apertura'], name='mantenimien_content_e249fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='programacionmantenimiento',
+            index=models.Index(fields=['content_type', 'object_id', 'proximo_servicio'], name='mantenimien_content_ca7f52_idx'),
+        ),
+    ]
@@ -28,6 +28,9 @@ class OrdenMantenimiento(models.Model):
     costo_mano_obra = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     observaciones = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["content_type", "object_id", "fecha_apertura"])]
+
     def __str__(self):
         return f"{self.activo} - {self.estatus}".strip()
 
@@ -55,6 +58,9 @@ class ProgramacionMantenimiento(models.Model):
     proximo_servicio = models.DateField(null=True, blank=True)
     activo_registro = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["content_type", "object_id", "proximo_servicio"])]
+
     def __str__(self):
         return f"{self.activo} - {self.proximo_servicio}".strip()
 
@@ -74,5 +80,8 @@ class Inspeccion(models.Model):
         "usuarios.Empleado", null=True, blank=True, on_delete=models.SET_NULL
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["content_type", "object_id", "fecha"])]
+
     def __str__(self):
         return f"{self.activo} - {self.resultado}".strip()
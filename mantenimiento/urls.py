@@ -14,6 +14,7 @@ from .views import (
     OrdenMantenimientoDeleteView,
     OrdenMantenimientoListView,
     OrdenMantenimientoUpdateView,
+    OrdenDetallesView,
     ProgramacionMantenimientoCreateView,
     ProgramacionMantenimientoDeleteView,
     ProgramacionMantenimientoListView,
@@ -36,6 +37,11 @@ urlpatterns = [
         OrdenMantenimientoDeleteView.as_view(),
         name="orden_delete",
     ),
+    path(
+        "ordenes/<int:pk>/refacciones/",
+        OrdenDetallesView.as_view(),
+        name="orden_detalles",
+    ),
     path("detalles/", DetalleMantenimientoListView.as_view(), name="detalle_list"),
     path("detalles/nuevo/", DetalleMantenimientoCreateView.as_view(), name="detalle_create"),
     path(
@@ -1,16 +1,22 @@
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
+from django.http import HttpResponseRedirect
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, DeleteView, ListView, TemplateView, UpdateView
 
+from .consumo import guardar_detalles
 from .forms import (
+    DetalleFormSet,
     DetalleMantenimientoForm,
     InspeccionForm,
     OrdenMantenimientoForm,
     ProgramacionMantenimientoForm,
 )
 from .models import DetalleMantenimiento, Inspeccion, OrdenMantenimiento, ProgramacionMantenimiento
+from activos.inventario import StockInsuficiente
 from activos.models import Vehiculo
 
 
@@ -132,7 +138,9 @@ class OrdenMantenimientoListView(LoginRequiredMixin, MantenimientoPermissionMixi
     default_order = "-fecha_apertura"
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # prefetch_related sobre el GenericForeignKey agrupa por content_type:
+        # una consulta por tipo de activo en lugar de una por fila.
+        queryset = super().get_queryset().select_related("tecnico").prefetch_related("activo")
         activo_type = self.request.GET.get("activo_type")
         activo_id = self.request.GET.get("activo_id")
         if activo_type == "vehiculo" and activo_id:
@@ -176,7 +184,20 @@ class DetalleMantenimientoListView(LoginRequiredMixin, MantenimientoPermissionMi
     default_order = "-id"
 
 
-class DetalleMantenimientoCreateView(LoginRequiredMixin, MantenimientoPermissionMixin, CreateView):
+class ConsumoMixin:
+    """Guarda la linea con su salida de inventario en lugar de ``form.save()``."""
+
+    def form_valid(self, form):
+        try:
+            guardar_detalles([form.instance], usuario=self.request.user)
+        except StockInsuficiente as exc:
+            form.add_error("cantidad", str(exc))
+            return self.form_invalid(form)
+        self.object = form.instance
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class DetalleMantenimientoCreateView(LoginRequiredMixin, MantenimientoPermissionMixin, ConsumoMixin, CreateView):
     model = DetalleMantenimiento
     permission_required = "mantenimiento.add_detallemantenimiento"
     form_class = DetalleMantenimientoForm
@@ -184,7 +205,7 @@ class DetalleMantenimientoCreateView(LoginRequiredMixin, MantenimientoPermission
     success_url = reverse_lazy("mantenimiento:detalle_list")
 
 
-class DetalleMantenimientoUpdateView(LoginRequiredMixin, MantenimientoPermissionMixin, UpdateView):
+class DetalleMantenimientoUpdateView(LoginRequiredMixin, MantenimientoPermissionMixin, ConsumoMixin, UpdateView):
     model = DetalleMantenimiento
     permission_required = "mantenimiento.change_detallemantenimiento"
     form_class = DetalleMantenimientoForm
@@ -192,6 +213,59 @@ class DetalleMantenimientoUpdateView(LoginRequiredMixin, MantenimientoPermission
     success_url = reverse_lazy("mantenimiento:detalle_list")
 
 
+class OrdenDetallesView(LoginRequiredMixin, MantenimientoPermissionMixin, TemplateView):
+    permission_required = (
+        "mantenimiento.add_detallemantenimiento",
+        "mantenimiento.change_detallemantenimiento",
+        "mantenimiento.delete_detallemantenimiento",
+    )
+    template_name = "mantenimiento/orden_detalles.html"
+
+    def get_orden(self):
+        # Se carga despues de login y permisos para no revelar que ids existen.
+        if not hasattr(self, "orden"):
+            self.orden = get_object_or_404(OrdenMantenimiento, pk=self.kwargs.get("pk"))
+        return self.orden
+
+    def get_formset(self, data=None):
+        formset = DetalleFormSet(
+            data, instance=self.get_orden(), queryset=DetalleMantenimiento.objects.select_related("refaccion").order_by("id")
+        )
+        # Un solo query de refacciones para todos los selects.
+        if formset.forms:
+            choices = list(formset.forms[0].fields["refaccion"].choices)
+            for form in formset.forms + [formset.empty_form]:
+                form.fields["refaccion"].choices = choices
+        return formset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["orden"] = self.get_orden()
+        context.setdefault("formset", self.get_formset())
+        return context
+
+    def post(self, request, *args, **kwargs):
+        formset = self.get_formset(request.POST)
+        if formset.is_valid():
+            eliminados = [form.instance for form in formset.deleted_forms if form.instance.pk]
+            detalles = [
+                form.instance
+                for form in formset.forms
+                if form.has_changed() and form not in formset.deleted_forms
+            ]
+            try:
+                guardar_detalles(detalles, eliminados, usuario=request.user)
+            except StockInsuficiente as exc:
+                for form in formset.forms:
+                    refaccion = form.cleaned_data.get("refaccion")
+                    if refaccion and refaccion.pk == exc.refaccion_id and form not in formset.deleted_forms:
+                        form.add_error("cantidad", str(exc))
+            else:
+                messages.success(request, "Refacciones guardadas.")
+                return redirect("mantenimiento:orden_detalles", pk=self.get_orden().pk)
+        return self.render_to_response(self.get_context_data(formset=formset))
+
+
 class DetalleMantenimientoDeleteView(LoginRequiredMixin, MantenimientoPermissionMixin, DeleteView):
     model = DetalleMantenimiento
     permission_required = "mantenimiento.delete_detallemantenimiento"
@@ -212,6 +286,9 @@ class ProgramacionMantenimientoListView(
     )
     default_order = "-proximo_servicio"
 
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related("activo")
+
 
 class ProgramacionMantenimientoCreateView(
     LoginRequiredMixin, MantenimientoPermissionMixin, CreateView
@@ -255,6 +332,9 @@ class InspeccionListView(LoginRequiredMixin, MantenimientoPermissionMixin, Searc
     )
     default_order = "-fecha"
 
+    def get_queryset(self):
+        return super().get_queryset().select_related("realizado_por").prefetch_related("activo")
+
 
 class InspeccionCreateView(LoginRequiredMixin, MantenimientoPermissionMixin, CreateView):
     model = Inspeccion
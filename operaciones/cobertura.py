@@ -0,0 +1,140 @@
+from collections import defaultdict
+
+from django.db.models import Count, Q, Sum
+
+from activos.models import AsignacionActivo
+from asignaciones.models import AsignacionEmpleado
+
+from .models import Requerimiento
+
+
+def _vigente(queryset, fecha, prefijo=""):
+    return queryset.filter(**{f"{prefijo}fecha_inicio__lte": fecha}).filter(
+        Q(**{f"{prefijo}fecha_fin__isnull": True}) | Q(**{f"{prefijo}fecha_fin__gte": fecha})
+    )
+
+
+def cobertura(fecha, turnos, cliente_id=None, contrato_id=None):
+    """Personal y activos requeridos contra asignados por cliente, contrato y sitio.
+
+    Son tres consultas agregadas sin importar cuantas asignaciones haya:
+    requerimientos sumados por sitio, empleados distintos por sitio y turno,
+    y activos por sitio y tipo. ``cantidad_guardias`` se pide por turno, igual
+    que en la generacion de plantilla; una asignacion sin turno cubre todos.
+    """
+    requerimientos = _vigente(
+        Requerimiento.objects.filter(contrato__estatus="activo", sitio__estatus="activo"), fecha, "contrato__"
+    )
+    filtros = {}
+    if cliente_id:
+        filtros["contrato__cliente_id"] = cliente_id
+    if contrato_id:
+        filtros["contrato_id"] = contrato_id
+    requerimientos = (
+        requerimientos.filter(**filtros)
+        .values(
+            "contrato_id",
+            "contrato__numero",
+            "contrato__cliente_id",
+            "contrato__cliente__nombre",
+            "sitio_id",
+            "sitio__nombre",
+        )
+        .annotate(
+            guardias=Sum("cantidad_guardias"),
+            caninos=Sum("cantidad_caninos"),
+            vehiculos=Sum("vehiculos_requeridos"),
+            armamento=Sum("armamento_requerido"),
+        )
+        .order_by("contrato__cliente__nombre", "contrato__numero", "sitio__nombre")
+    )
+
+    asignacion_filtros = {f"asignacion__{campo}": valor for campo, valor in filtros.items()}
+    empleados = defaultdict(dict)
+    for contrato, sitio, turno, total in (
+        _vigente(
+            _vigente(AsignacionEmpleado.objects.filter(estatus="activo", asignacion__estatus="activo"), fecha),
+            fecha,
+            "asignacion__",
+        )
+        .filter(asignacion__sitio__isnull=False, **asignacion_filtros)
+        .values_list("asignacion__contrato_id", "asignacion__sitio_id", "asignacion__turno_id")
+        .annotate(total=Count("empleado_id", distinct=True))
+        .order_by()
+    ):
+        empleados[(contrato, sitio)][turno] = total
+
+    activos = defaultdict(dict)
+    for contrato, sitio, modelo, total in (
+        _vigente(
+            _vigente(AsignacionActivo.objects.filter(estatus="activo", asignacion__estatus="activo"), fecha),
+            fecha,
+            "asignacion__",
+        )
+        .filter(asignacion__sitio__isnull=False, **asignacion_filtros)
+        .values_list("asignacion__contrato_id", "asignacion__sitio_id", "content_type__model")
+        .annotate(total=Count("id"))
+        .order_by()
+    ):
+        activos[(contrato, sitio)][modelo] = total
+
+    filas = []
+    for requerimiento in requerimientos:
+        clave = (requerimiento["contrato_id"], requerimiento["sitio_id"])
+        por_turno = empleados.get(clave, {})
+        todo_el_dia = por_turno.get(None, 0)
+        turnos_fila = [
+            {"turno": turno, "asignados": por_turno.get(turno.pk, 0) + todo_el_dia} for turno in turnos
+        ]
+        requeridos = requerimiento["guardias"] * len(turnos)
+        asignados = sum(min(t["asignados"], requerimiento["guardias"]) for t in turnos_fila)
+        vehiculos = activos.get(clave, {}).get("vehiculo", 0)
+        armamento = activos.get(clave, {}).get("armamento", 0)
+        faltantes = (
+            requeridos
+            - asignados
+            + max(requerimiento["vehiculos"] - vehiculos, 0)
+            + max(requerimiento["armamento"] - armamento, 0)
+        )
+        filas.append(
+            {
+                "cliente_id": requerimiento["contrato__cliente_id"],
+                "cliente": requerimiento["contrato__cliente__nombre"],
+                "contrato_id": requerimiento["contrato_id"],
+                "contrato": requerimiento["contrato__numero"],
+                "sitio_id": requerimiento["sitio_id"],
+                "sitio": requerimiento["sitio__nombre"],
+                "guardias": requerimiento["guardias"],
+                "turnos": turnos_fila,
+                "guardias_requeridos": requeridos,
+                "guardias_asignados": asignados,
+                "caninos": requerimiento["caninos"],
+                "vehiculos_requeridos": requerimiento["vehiculos"],
+                "vehiculos_asignados": vehiculos,
+                "armamento_requerido": requerimiento["armamento"],
+                "armamento_asignado": armamento,
+                "faltantes": faltantes,
+            }
+        )
+    return filas
+
+
+def resumir(filas, campo):
+    """Totales de las filas agrupados por ``campo`` (``cliente`` o ``contrato``)."""
+    totales = {}
+    for fila in filas:
+        total = totales.setdefault(
+            fila[f"{campo}_id"],
+            {
+                "nombre": fila[campo],
+                "sitios": 0,
+                "guardias_requeridos": 0,
+                "guardias_asignados": 0,
+                "faltantes": 0,
+            },
+        )
+        total["sitios"] += 1
+        total["guardias_requeridos"] += fila["guardias_requeridos"]
+        total["guardias_asignados"] += fila["guardias_asignados"]
+        total["faltantes"] += fila["faltantes"]
+    return list(totales.values())
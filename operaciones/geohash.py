@@ -0,0 +1,144 @@
+import math
+from functools import reduce
+from operator import or_
+
+import numpy as np
+from django.db.models import Q
+
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 9
+RADIO_TIERRA_M = 6371008.8
+METROS_POR_GRADO = math.pi * RADIO_TIERRA_M / 180.0
+
+
+def codificar(latitud, longitud, precision=PRECISION):
+    """Geohash de ``precision`` caracteres para una coordenada en grados."""
+    latitud, longitud = float(latitud), float(longitud)
+    lat_min, lat_max = -90.0, 90.0
+    lon_min, lon_max = -180.0, 180.0
+    resultado = []
+    bits = 0
+    valor = 0
+    par = True
+    while len(resultado) < precision:
+        if par:
+            medio = (lon_min + lon_max) / 2
+            if longitud >= medio:
+                valor = (valor << 1) | 1
+                lon_min = medio
+            else:
+                valor <<= 1
+                lon_max = medio
+        else:
+            medio = (lat_min + lat_max) / 2
+            if latitud >= medio:
+                valor = (valor << 1) | 1
+                lat_min = medio
+            else:
+                valor <<= 1
+                lat_max = medio
+        par = not par
+        bits += 1
+        if bits == 5:
+            resultado.append(BASE32[valor])
+            bits = 0
+            valor = 0
+    return "".join(resultado)
+
+
+def geohash_de(latitud, longitud):
+    if latitud is None or longitud is None:
+        return ""
+    return codificar(latitud, longitud)
+
+
+def tamano_celda(precision):
+    """Alto y ancho de una celda en grados: ``(lat, lon)``."""
+    bits = precision * 5
+    bits_lon = (bits + 1) // 2
+    bits_lat = bits // 2
+    return 180.0 / (1 << bits_lat), 360.0 / (1 << bits_lon)
+
+
+def vecinos(latitud, longitud, precision):
+    """La celda de la coordenada y sus 8 vecinas (sin repetir en los polos)."""
+    alto, ancho = tamano_celda(precision)
+    celdas = set()
+    for dlat in (-alto, 0.0, alto):
+        lat = latitud + dlat
+        if lat < -90.0 or lat > 90.0:
+            continue
+        for dlon in (-ancho, 0.0, ancho):
+            lon = (longitud + dlon + 180.0) % 360.0 - 180.0
+            celdas.add(codificar(lat, lon, precision))
+    return celdas
+
+
+def precision_para_radio(latitud, radio_metros):
+    """Mayor precision cuya celda mide al menos ``radio_metros`` por lado.
+
+    Con esa precision la celda del punto y sus vecinas cubren el circulo.
+    """
+    lat_extrema = min(abs(float(latitud)) + radio_metros / METROS_POR_GRADO, 89.0)
+    cos_lat = math.cos(math.radians(lat_extrema))
+    for precision in range(PRECISION, 0, -1):
+        alto, ancho = tamano_celda(precision)
+        if min(alto, ancho * cos_lat) * METROS_POR_GRADO >= radio_metros:
+            return precision
+    return 0
+
+
+def filtro_celdas(celdas, campo="geohash"):
+    return reduce(or_, (Q(**{f"{campo}__startswith": celda}) for celda in sorted(celdas)))
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Distancia en metros entre arreglos de coordenadas en grados (con broadcasting)."""
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2.0) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    )
+    return 2.0 * RADIO_TIERRA_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _con_distancia(objetos, latitud, longitud):
+    if not objetos:
+        return []
+    lat = np.array([float(o.latitud) for o in objetos])
+    lon = np.array([float(o.longitud) for o in objetos])
+    distancias = haversine_m(float(latitud), float(longitud), lat, lon)
+    for objeto, distancia in zip(objetos, distancias):
+        objeto.distancia_metros = float(distancia)
+    return sorted(objetos, key=lambda o: o.distancia_metros)
+
+
+def en_radio(queryset, latitud, longitud, radio_metros, campo="geohash"):
+    """Objetos del queryset a no mas de ``radio_metros``, del mas cercano al mas lejano.
+
+    Solo se leen las celdas geohash que tocan el circulo; la distancia exacta
+    se calcula despues sobre esos candidatos y queda en ``distancia_metros``.
+    """
+    latitud, longitud = float(latitud), float(longitud)
+    precision = precision_para_radio(latitud, radio_metros)
+    if precision:
+        queryset = queryset.filter(filtro_celdas(vecinos(latitud, longitud, precision), campo))
+    objetos = _con_distancia(list(queryset.exclude(**{campo: ""})), latitud, longitud)
+    return [o for o in objetos if o.distancia_metros <= radio_metros]
+
+
+def mas_cercanos(queryset, latitud, longitud, k=5, campo="geohash"):
+    """Los ``k`` objetos mas cercanos a la coordenada.
+
+    Se agranda la celda hasta juntar ``k`` candidatos; la distancia al k-esimo
+    acota el radio de una busqueda exacta con :func:`en_radio`.
+    """
+    latitud, longitud = float(latitud), float(longitud)
+    for precision in range(PRECISION, 0, -1):
+        celdas = vecinos(latitud, longitud, precision)
+        candidatos = list(queryset.filter(filtro_celdas(celdas, campo)))
+        if len(candidatos) >= k:
+            radio = _con_distancia(candidatos, latitud, longitud)[k - 1].distancia_metros
+            return en_radio(queryset, latitud, longitud, radio, campo)[:k]
+    return _con_distancia(list(queryset.exclude(**{campo: ""})), latitud, longitud)[:k]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operaciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitio',
+            name='radio_metros',
+            field=models.PositiveIntegerField(default=100),
+        ),
+    ]
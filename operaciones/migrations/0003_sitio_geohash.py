@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operaciones', '0002_sitio_radio_metros'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitio',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .geohash import geohash_de
+
 
 ESTATUS_CHOICES = [
     ("activo", "Activo"),
@@ -36,11 +38,20 @@ class Sitio(models.Model):
     estado = models.CharField(max_length=80, blank=True)
     latitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    radio_metros = models.PositiveIntegerField(default=100)
+    geohash = models.CharField(max_length=12, blank=True, editable=False, db_index=True)
     estatus = models.CharField(max_length=20, choices=ESTATUS_CHOICES, default="activo")
 
     def __str__(self):
         return f"{self.cliente} - {self.nombre}".strip()
 
+    def save(self, *args, **kwargs):
+        self.geohash = geohash_de(self.latitud, self.longitud)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitud", "longitud"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
+
 
 class Servicio(models.Model):
     nombre = models.CharField(max_length=120)
@@ -5,6 +5,7 @@ from .views import (
     ClienteDeleteView,
     ClienteListView,
     ClienteUpdateView,
+    CoberturaView,
     ContratoCreateView,
     ContratoDeleteView,
     ContratoListView,
@@ -40,4 +41,5 @@ urlpatterns = [
     path("contratos/nuevo/", ContratoCreateView.as_view(), name="contrato_create"),
     path("contratos/<int:pk>/editar/", ContratoUpdateView.as_view(), name="contrato_update"),
     path("contratos/<int:pk>/eliminar/", ContratoDeleteView.as_view(), name="contrato_delete"),
+    path("cobertura/", CoberturaView.as_view(), name="cobertura"),
 ]
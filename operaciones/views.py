@@ -1,8 +1,13 @@
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.db.models import Q
 from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.views.generic import CreateView, DeleteView, ListView, TemplateView, UpdateView
 
+from usuarios.models import Turno
+
+from .cobertura import cobertura, resumir
 from .forms import ClienteForm, ContratoForm, ServicioForm, SitioForm
 from .models import Cliente, Contrato, Servicio, Sitio
 
@@ -253,3 +258,43 @@ class ContratoDeleteView(LoginRequiredMixin, OperacionesPermissionMixin, DeleteV
     permission_required = "operaciones.delete_contrato"
     template_name = "operaciones/contrato_confirm_delete.html"
     success_url = reverse_lazy("operaciones:contrato_list")
+
+
+class CoberturaView(LoginRequiredMixin, OperacionesPermissionMixin, TemplateView):
+    permission_required = "operaciones.view_contrato"
+    template_name = "operaciones/cobertura.html"
+
+    def get_fecha(self):
+        try:
+            fecha = parse_date(self.request.GET.get("fecha", ""))
+        except ValueError:
+            fecha = None
+        return fecha or timezone.localdate()
+
+    def get_id(self, nombre):
+        valor = self.request.GET.get(nombre, "")
+        return int(valor) if valor.isdigit() else None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        fecha = self.get_fecha()
+        turnos = Turno.objects.order_by("hora_inicio", "pk")
+        turno_id = self.get_id("turno")
+        if turno_id:
+            turnos = turnos.filter(pk=turno_id)
+        turnos = list(turnos)
+        filas = cobertura(fecha, turnos, self.get_id("cliente"), self.get_id("contrato"))
+        context.update(
+            fecha=fecha,
+            turnos=turnos,
+            totales_cliente=resumir(filas, "cliente"),
+            totales_contrato=resumir(filas, "contrato"),
+            clientes=Cliente.objects.order_by("nombre"),
+            contratos=Contrato.objects.filter(estatus="activo").order_by("numero"),
+            todos_turnos=Turno.objects.order_by("hora_inicio", "pk"),
+            solo_faltantes=bool(self.request.GET.get("faltantes")),
+        )
+        if context["solo_faltantes"]:
+            filas = [fila for fila in filas if fila["faltantes"]]
+        context["filas"] = filas
+        return context
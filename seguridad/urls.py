@@ -19,8 +19,11 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from usuarios.views import CambioContrasenaView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('accounts/password_change/', CambioContrasenaView.as_view(), name='password_change'),
     path('accounts/', include('django.contrib.auth.urls')),
     path('', include('usuarios.urls')),
     path('operaciones/', include('operaciones.urls')),
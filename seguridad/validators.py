@@ -2,6 +2,8 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext as _
 
+from usuarios.models import ContrasenaTemporal
+
 
 class DefaultPasswordValidator:
     def validate(self, password, user=None):
@@ -12,5 +14,12 @@ class DefaultPasswordValidator:
                 code="password_default",
             )
 
+    def password_changed(self, password, user=None):
+        # Django llama este gancho en cada set_password guardado (cambio,
+        # reset por correo, admin, changepassword), no solo en la vista propia.
+        default_password = getattr(settings, "DEFAULT_INITIAL_PASSWORD", None)
+        if user is not None and user.pk and password != default_password:
+            ContrasenaTemporal.objects.filter(user_id=user.pk).delete()
+
     def get_help_text(self):
         return _("No uses la contrasena temporal como contrasena final.")
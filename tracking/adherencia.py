@@ -0,0 +1,174 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from asignaciones.models import AsignacionEmpleado, RutaPunto
+from operaciones.geohash import RADIO_TIERRA_M, haversine_m
+
+from .historial import puntos_recorrido
+
+
+TOLERANCIA_METROS = getattr(settings, "TRACKING_ADHERENCIA_TOLERANCIA_METROS", 200.0)
+
+
+def _proyectar(latitud, longitud, lat0):
+    # Equirectangular local: suficiente para las distancias de una ruta urbana.
+    x = np.radians(longitud) * np.cos(np.radians(lat0)) * RADIO_TIERRA_M
+    y = np.radians(latitud) * RADIO_TIERRA_M
+    return x, y
+
+
+def distancia_a_segmentos(px, py, ax, ay, bx, by):
+    """Distancia minima de cada punto (n) a una polilinea de s segmentos: matriz n x s."""
+    dx, dy = bx - ax, by - ay
+    largo2 = dx * dx + dy * dy
+    largo2 = np.where(largo2 == 0, 1.0, largo2)
+    t = ((px[:, None] - ax[None, :]) * dx[None, :] + (py[:, None] - ay[None, :]) * dy[None, :]) / largo2[None, :]
+    t = np.clip(t, 0.0, 1.0)
+    cx = ax[None, :] + t * dx[None, :]
+    cy = ay[None, :] + t * dy[None, :]
+    return np.hypot(px[:, None] - cx, py[:, None] - cy)
+
+
+def analizar_recorrido(epochs, latitudes, longitudes, paradas, tolerancia=TOLERANCIA_METROS):
+    """Compara un recorrido contra la secuencia de paradas de una ruta.
+
+    ``paradas`` es una lista ordenada de ``(id, latitud, longitud, radio)``.
+    Una parada se visita cuando algun punto cae dentro de su radio; el orden
+    se evalua con la primera visita. La desviacion es la distancia de cada
+    punto a la polilinea de la ruta.
+    """
+    ids = np.array([p[0] for p in paradas])
+    stop_lat = np.array([p[1] for p in paradas], dtype=np.float64)
+    stop_lon = np.array([p[2] for p in paradas], dtype=np.float64)
+    radios = np.array([p[3] for p in paradas], dtype=np.float64)
+    resultado = {
+        "puntos": int(len(epochs)),
+        "paradas": int(len(ids)),
+        "visitadas": 0,
+        "omitidas": ids.tolist(),
+        "fuera_de_orden": [],
+        "desviacion_max_m": None,
+        "desviacion_media_m": None,
+        "puntos_fuera": 0,
+    }
+    if not len(epochs) or not len(ids):
+        return resultado
+
+    distancias = haversine_m(latitudes[:, None], longitudes[:, None], stop_lat[None, :], stop_lon[None, :])
+    dentro = distancias <= radios[None, :]
+    visitada = dentro.any(axis=0)
+    primera = np.where(visitada, epochs[dentro.argmax(axis=0)], np.inf)
+
+    orden = primera[visitada]
+    previo = np.concatenate(([-np.inf], np.maximum.accumulate(orden)[:-1]))
+    fuera = ids[visitada][orden < previo]
+
+    lat0 = float(stop_lat.mean())
+    px, py = _proyectar(latitudes, longitudes, lat0)
+    sx, sy = _proyectar(stop_lat, stop_lon, lat0)
+    if len(ids) > 1:
+        desviacion = distancia_a_segmentos(px, py, sx[:-1], sy[:-1], sx[1:], sy[1:]).min(axis=1)
+    else:
+        desviacion = distancias[:, 0]
+
+    resultado.update(
+        visitadas=int(visitada.sum()),
+        omitidas=ids[~visitada].tolist(),
+        fuera_de_orden=fuera.tolist(),
+        desviacion_max_m=round(float(desviacion.max()), 1),
+        desviacion_media_m=round(float(desviacion.mean()), 1),
+        puntos_fuera=int((desviacion > tolerancia).sum()),
+    )
+    return resultado
+
+
+def ventana_turno(fecha, turno=None):
+    """Inicio y fin del turno en ``fecha``; sin turno es el dia completo."""
+    if turno is None:
+        inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+        return inicio, inicio + timedelta(days=1)
+    inicio = timezone.make_aware(datetime.combine(fecha, turno.hora_inicio))
+    fin = timezone.make_aware(datetime.combine(fecha, turno.hora_fin))
+    if fin <= inicio:
+        fin += timedelta(days=1)
+    return inicio, fin
+
+
+def paradas_por_ruta(ruta_ids):
+    paradas = defaultdict(list)
+    for pk, ruta_id, latitud, longitud, radio in (
+        RutaPunto.objects.filter(ruta_id__in=ruta_ids, latitud__isnull=False, longitud__isnull=False)
+        .order_by("ruta_id", "orden", "id")
+        .values_list("pk", "ruta_id", "latitud", "longitud", "radio_metros")
+    ):
+        paradas[ruta_id].append((pk, float(latitud), float(longitud), radio))
+    return paradas
+
+
+def analizar_adherencia(desde, hasta, ruta_id=None, empleado_id=None, tolerancia=TOLERANCIA_METROS):
+    """Adherencia de cada empleado asignado a una ruta, por dia, entre dos fechas.
+
+    El recorrido de cada empleado se lee una sola vez para todo el rango y se
+    corta por turno con ``searchsorted``. Regresa una lista de dicts.
+    """
+    asignaciones = (
+        AsignacionEmpleado.objects.filter(
+            estatus="activo",
+            asignacion__estatus="activo",
+            asignacion__tipo="ruta",
+            asignacion__ruta__isnull=False,
+            fecha_inicio__lte=hasta,
+        )
+        .filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=desde))
+        .select_related("asignacion__turno")
+        .order_by("empleado_id", "fecha_inicio")
+    )
+    if ruta_id:
+        asignaciones = asignaciones.filter(asignacion__ruta_id=ruta_id)
+    if empleado_id:
+        asignaciones = asignaciones.filter(empleado_id=empleado_id)
+    asignaciones = list(asignaciones)
+    paradas = paradas_por_ruta({a.asignacion.ruta_id for a in asignaciones})
+
+    por_empleado = defaultdict(list)
+    for asignacion_empleado in asignaciones:
+        if paradas.get(asignacion_empleado.asignacion.ruta_id):
+            por_empleado[asignacion_empleado.empleado_id].append(asignacion_empleado)
+
+    resultados = []
+    for empleado, propias in por_empleado.items():
+        ventanas = []
+        for asignacion_empleado in propias:
+            asignacion = asignacion_empleado.asignacion
+            fecha = max(desde, asignacion_empleado.fecha_inicio, asignacion.fecha_inicio)
+            ultimo = min(
+                fecha_fin
+                for fecha_fin in (hasta, asignacion_empleado.fecha_fin, asignacion.fecha_fin)
+                if fecha_fin is not None
+            )
+            while fecha <= ultimo:
+                ventanas.append((fecha, asignacion, *ventana_turno(fecha, asignacion.turno)))
+                fecha += timedelta(days=1)
+        if not ventanas:
+            continue
+
+        track = puntos_recorrido(empleado, min(v[2] for v in ventanas), max(v[3] for v in ventanas))
+        epochs = np.fromiter((p[0].timestamp() for p in track), dtype=np.float64, count=len(track))
+        latitudes = np.fromiter((p[1] for p in track), dtype=np.float64, count=len(track))
+        longitudes = np.fromiter((p[2] for p in track), dtype=np.float64, count=len(track))
+
+        for fecha, asignacion, inicio, fin in ventanas:
+            a, b = np.searchsorted(epochs, [inicio.timestamp(), fin.timestamp()], side="left")
+            resultado = analizar_recorrido(
+                epochs[a:b], latitudes[a:b], longitudes[a:b], paradas[asignacion.ruta_id], tolerancia
+            )
+            resultado.update(
+                empleado_id=empleado, asignacion_id=asignacion.pk, ruta_id=asignacion.ruta_id, fecha=fecha
+            )
+            resultados.append(resultado)
+    return resultados
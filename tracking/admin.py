@@ -1,7 +1,19 @@
 from django.contrib import admin
 
-from .models import Dispositivo, PermisoGPS, Ubicacion
+from .models import (
+    CambioSync,
+    Dispositivo,
+    EventoGeocerca,
+    PermisoGPS,
+    RecorridoResumen,
+    UltimaUbicacion,
+    Ubicacion,
+)
 
 admin.site.register(Dispositivo)
 admin.site.register(PermisoGPS)
 admin.site.register(Ubicacion)
+admin.site.register(UltimaUbicacion)
+admin.site.register(RecorridoResumen)
+admin.site.register(EventoGeocerca)
+admin.site.register(CambioSync)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TrackingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tracking"
+
+    def ready(self):
+        from . import permisos, sincronizacion
+
+        permisos.conectar()
+        sincronizacion.conectar()
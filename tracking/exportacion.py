@@ -0,0 +1,132 @@
+import csv
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from usuarios.models import Empleado
+
+from .historial import iterar_por_llave
+
+
+CAMPOS = ("empleado_id", "dispositivo_id", "latitud", "longitud", "bateria", "precision", "origen")
+ENCABEZADOS = ("id", "timestamp") + CAMPOS
+
+FORMATOS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "geojson": ("application/geo+json", "geojson"),
+}
+
+
+class _Eco:
+    def write(self, value):
+        return value
+
+
+def _valor(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _fila(row):
+    timestamp, pk, *resto = row
+    return (pk, timestamp) + tuple(resto)
+
+
+def _filas(queryset, resumenes):
+    """Filas en el orden de ``ENCABEZADOS``: primero los dias compactados, luego las crudas.
+
+    Los puntos de un RecorridoResumen ya no tienen id, bateria, precision
+    ni origen; esas columnas salen vacias.
+    """
+    if resumenes is not None:
+        compactados = resumenes.order_by("fecha", "empleado_id", "dispositivo_id").values_list(
+            "empleado_id", "dispositivo_id", "puntos"
+        )
+        for empleado_id, dispositivo_id, puntos in compactados:
+            for epoch, latitud, longitud in puntos:
+                timestamp = datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+                yield (None, timestamp, empleado_id, dispositivo_id, latitud, longitud, None, None, None)
+    for row in iterar_por_llave(queryset, CAMPOS):
+        yield _fila(row)
+
+
+def exportar_csv(queryset, resumenes=None):
+    writer = csv.writer(_Eco())
+    yield writer.writerow(ENCABEZADOS)
+    for fila in _filas(queryset, resumenes):
+        yield writer.writerow(["" if v is None else _valor(v) for v in fila])
+
+
+def exportar_ndjson(queryset, resumenes=None):
+    for fila in _filas(queryset, resumenes):
+        data = {key: _valor(value) for key, value in zip(ENCABEZADOS, fila)}
+        yield json.dumps(data, separators=(",", ":")) + "\n"
+
+
+def exportar_geojson(queryset, resumenes=None):
+    """Un Feature por empleado: LineString con su recorrido, o Point si solo hay un punto.
+
+    Si se reciben ``resumenes`` (RecorridoResumen), sus puntos compactados
+    preceden a las ubicaciones crudas del mismo empleado.
+    """
+    empleado_ids = set(queryset.order_by().values_list("empleado_id", flat=True).distinct())
+    if resumenes is not None:
+        empleado_ids.update(resumenes.order_by().values_list("empleado_id", flat=True).distinct())
+    nombres = {e.pk: str(e) for e in Empleado.objects.filter(pk__in=empleado_ids)}
+
+    yield '{"type":"FeatureCollection","features":['
+    separador = ""
+    for empleado_id in sorted(empleado_ids):
+        puntos = _coordenadas_empleado(queryset, resumenes, empleado_id)
+        primero = next(puntos, None)
+        if primero is None:
+            continue
+        properties = json.dumps(
+            {
+                "empleado_id": empleado_id,
+                "empleado": nombres.get(empleado_id, ""),
+                "inicio": primero[0].isoformat(),
+            },
+            separators=(",", ":"),
+        )
+        coord = f"[{primero[1]},{primero[2]}]"
+        segundo = next(puntos, None)
+        if segundo is None:
+            yield f'{separador}{{"type":"Feature","properties":{properties},"geometry":{{"type":"Point","coordinates":{coord}}}}}'
+            separador = ","
+            continue
+        yield (
+            f'{separador}{{"type":"Feature","properties":{properties},'
+            f'"geometry":{{"type":"LineString","coordinates":[{coord},[{segundo[1]},{segundo[2]}]'
+        )
+        for _, longitud, latitud in puntos:
+            yield f",[{longitud},{latitud}]"
+        yield "]}}"
+        separador = ","
+    yield "]}"
+
+
+def _coordenadas_empleado(queryset, resumenes, empleado_id):
+    """Genera ``(timestamp, longitud, latitud)`` del empleado en orden cronologico."""
+    if resumenes is not None:
+        compactados = []
+        for resumen_puntos in resumenes.filter(empleado_id=empleado_id).values_list("puntos", flat=True):
+            compactados.extend(resumen_puntos)
+        compactados.sort()
+        for epoch, latitud, longitud in compactados:
+            yield datetime.fromtimestamp(epoch, tz=dt_timezone.utc), longitud, latitud
+    for timestamp, _, longitud, latitud in iterar_por_llave(
+        queryset.filter(empleado_id=empleado_id), ("longitud", "latitud")
+    ):
+        yield timestamp, longitud, latitud
+
+
+EXPORTADORES = {
+    "csv": exportar_csv,
+    "ndjson": exportar_ndjson,
+    "geojson": exportar_geojson,
+}
@@ -0,0 +1,140 @@
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from asignaciones.models import AsignacionEmpleado
+from operaciones.geohash import haversine_m
+from operaciones.models import Sitio
+
+from .models import EventoGeocerca
+
+
+def sitios_asignados(empleado_id, desde, hasta):
+    """Sitios con coordenadas de las asignaciones activas del empleado entre dos fechas."""
+    asignaciones = (
+        AsignacionEmpleado.objects.filter(
+            empleado_id=empleado_id,
+            estatus="activo",
+            asignacion__estatus="activo",
+            asignacion__sitio__latitud__isnull=False,
+            asignacion__sitio__longitud__isnull=False,
+            fecha_inicio__lte=hasta,
+            asignacion__fecha_inicio__lte=hasta,
+        )
+        .filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=desde))
+        .filter(Q(asignacion__fecha_fin__isnull=True) | Q(asignacion__fecha_fin__gte=desde))
+        .values_list("asignacion_id", "asignacion__sitio_id")
+        .order_by("-fecha_inicio")
+    )
+    por_sitio = {}
+    for asignacion_id, sitio_id in asignaciones:
+        por_sitio.setdefault(sitio_id, asignacion_id)
+    return por_sitio
+
+
+def _estado_actual(empleado_id, sitio_ids):
+    ultimo = EventoGeocerca.objects.filter(empleado_id=empleado_id, sitio_id=OuterRef("pk")).order_by(
+        "-timestamp", "-id"
+    )
+    return {
+        row["pk"]: row
+        for row in Sitio.objects.filter(pk__in=sitio_ids)
+        .annotate(
+            ultimo_tipo=Subquery(ultimo.values("tipo")[:1]),
+            ultimo_timestamp=Subquery(ultimo.values("timestamp")[:1]),
+        )
+        .values("pk", "latitud", "longitud", "radio_metros", "ultimo_tipo", "ultimo_timestamp")
+    }
+
+
+def evaluar_geocercas(empleado_id, ubicaciones, dispositivo_id=None):
+    """Detecta entradas y salidas de los sitios asignados y guarda los eventos.
+
+    Las distancias de todos los puntos contra todos los sitios se calculan
+    en una sola matriz NumPy; solo se recorren en Python los cambios de
+    estado. Los puntos anteriores al ultimo evento registrado por sitio se
+    ignoran para no reescribir la historia con lotes atrasados.
+    """
+    if not ubicaciones:
+        return []
+    ubicaciones = sorted(ubicaciones, key=lambda u: u.timestamp)
+    desde = timezone.localtime(ubicaciones[0].timestamp).date()
+    hasta = timezone.localtime(ubicaciones[-1].timestamp).date()
+    asignaciones = sitios_asignados(empleado_id, desde, hasta)
+    if not asignaciones:
+        return []
+    sitios = _estado_actual(empleado_id, list(asignaciones))
+    sitio_ids = list(sitios)
+
+    lat = np.fromiter((float(u.latitud) for u in ubicaciones), dtype=np.float64, count=len(ubicaciones))
+    lon = np.fromiter((float(u.longitud) for u in ubicaciones), dtype=np.float64, count=len(ubicaciones))
+    ts = np.fromiter((u.timestamp.timestamp() for u in ubicaciones), dtype=np.float64, count=len(ubicaciones))
+    sitio_lat = np.array([float(sitios[s]["latitud"]) for s in sitio_ids])
+    sitio_lon = np.array([float(sitios[s]["longitud"]) for s in sitio_ids])
+    radios = np.array([sitios[s]["radio_metros"] for s in sitio_ids], dtype=np.float64)
+
+    distancias = haversine_m(lat[:, None], lon[:, None], sitio_lat[None, :], sitio_lon[None, :])
+    dentro = distancias <= radios[None, :]
+
+    eventos = []
+    for columna, sitio_id in enumerate(sitio_ids):
+        estado = sitios[sitio_id]
+        validos = np.ones(len(ubicaciones), dtype=bool)
+        if estado["ultimo_timestamp"] is not None:
+            validos = ts > estado["ultimo_timestamp"].timestamp()
+        indices = np.flatnonzero(validos)
+        if not len(indices):
+            continue
+        serie = np.concatenate(([estado["ultimo_tipo"] == "entrada"], dentro[indices, columna]))
+        for cambio in np.flatnonzero(serie[1:] != serie[:-1]):
+            index = indices[cambio]
+            eventos.append(
+                EventoGeocerca(
+                    empleado_id=empleado_id,
+                    sitio_id=sitio_id,
+                    asignacion_id=asignaciones[sitio_id],
+                    dispositivo_id=dispositivo_id,
+                    tipo="entrada" if serie[cambio + 1] else "salida",
+                    timestamp=ubicaciones[index].timestamp,
+                    distancia_metros=round(float(distancias[index, columna]), 2),
+                )
+            )
+    if eventos:
+        EventoGeocerca.objects.bulk_create(eventos)
+    return eventos
+
+
+def tiempo_en_sitio(empleado_id, inicio, fin, sitio_id=None):
+    """Tiempo acumulado por sitio entre ``inicio`` y ``fin`` a partir de los eventos.
+
+    Regresa ``{sitio_id: timedelta}``. Una estancia abierta al inicio del
+    rango se cuenta desde ``inicio`` y una que sigue abierta hasta ``fin``.
+    """
+    eventos = EventoGeocerca.objects.filter(empleado_id=empleado_id)
+    if sitio_id:
+        eventos = eventos.filter(sitio_id=sitio_id)
+    previos = eventos.filter(timestamp__lt=inicio)
+    ultimo_previo = previos.filter(sitio_id=OuterRef("sitio_id")).order_by("-timestamp", "-id")
+    abiertos = set(
+        previos.annotate(ultimo_tipo=Subquery(ultimo_previo.values("tipo")[:1]))
+        .filter(ultimo_tipo="entrada")
+        .values_list("sitio_id", flat=True)
+        .distinct()
+    )
+
+    totales = {}
+    entradas = {sitio: inicio for sitio in abiertos}
+    for sitio, tipo, timestamp in (
+        eventos.filter(timestamp__gte=inicio, timestamp__lt=fin)
+        .order_by("timestamp", "id")
+        .values_list("sitio_id", "tipo", "timestamp")
+    ):
+        if tipo == "entrada":
+            entradas.setdefault(sitio, timestamp)
+        elif sitio in entradas:
+            totales[sitio] = totales.get(sitio, timedelta()) + (timestamp - entradas.pop(sitio))
+    for sitio, entrada in entradas.items():
+        totales[sitio] = totales.get(sitio, timedelta()) + (fin - entrada)
+    return totales
@@ -0,0 +1,105 @@
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+
+from .models import Dispositivo
+
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_FLUSH = getattr(settings, "TRACKING_HEARTBEAT_INTERVALO", 5.0)
+MAX_PENDIENTES = getattr(settings, "TRACKING_HEARTBEAT_MAX_PENDIENTES", 1000)
+
+
+class HeartbeatBuffer:
+    """Acumula el ultimo ping por dispositivo y lo escribe en un solo UPDATE.
+
+    Un hilo de fondo vacia el buffer cada ``intervalo`` segundos, de modo que
+    ``Dispositivo.ultimo_ping`` nunca queda atrasado mas de ese intervalo
+    (mas lo que tarde el UPDATE). Tambien se vacia al llegar a
+    ``max_pendientes`` dispositivos y al terminar el proceso.
+    """
+
+    def __init__(self, intervalo=INTERVALO_FLUSH, max_pendientes=MAX_PENDIENTES):
+        self.intervalo = intervalo
+        self.max_pendientes = max_pendientes
+        self._pendientes = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._stop = threading.Event()
+
+    def registrar(self, dispositivo_id, timestamp):
+        self._asegurar_hilo()
+        with self._lock:
+            actual = self._pendientes.get(dispositivo_id)
+            if actual is None or timestamp > actual:
+                self._pendientes[dispositivo_id] = timestamp
+            lleno = len(self._pendientes) >= self.max_pendientes
+        if lleno:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, {}
+        if not pendientes:
+            return 0
+        try:
+            return escribir_pings(pendientes)
+        except Exception:
+            logger.exception("No se pudieron guardar %s heartbeats.", len(pendientes))
+            with self._lock:
+                for dispositivo_id, timestamp in pendientes.items():
+                    actual = self._pendientes.get(dispositivo_id)
+                    if actual is None or timestamp > actual:
+                        self._pendientes[dispositivo_id] = timestamp
+            return 0
+
+    def detener(self):
+        self._stop.set()
+        self.flush()
+
+    def _asegurar_hilo(self):
+        # Tras un fork (gunicorn --preload) el hilo del padre no existe en el hijo.
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._stop.clear()
+            hilo = threading.Thread(target=self._loop, name="heartbeat-flush", daemon=True)
+            hilo.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.intervalo):
+            try:
+                self.flush()
+            finally:
+                connections.close_all()
+
+
+def escribir_pings(pendientes):
+    """Actualiza ultimo_ping de varios dispositivos con un UPDATE ... CASE.
+
+    Nunca retrocede un ultimo_ping que ya sea mas reciente.
+    """
+    casos = [
+        When(
+            Q(pk=dispositivo_id) & (Q(ultimo_ping__isnull=True) | Q(ultimo_ping__lt=timestamp)),
+            then=Value(timestamp),
+        )
+        for dispositivo_id, timestamp in pendientes.items()
+    ]
+    return Dispositivo.objects.filter(pk__in=list(pendientes)).update(
+        ultimo_ping=Case(*casos, default=F("ultimo_ping"), output_field=DateTimeField())
+    )
+
+
+heartbeats = HeartbeatBuffer()
+atexit.register(heartbeats.detener)
@@ -0,0 +1,93 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import RecorridoResumen, Ubicacion
+
+
+def rango_timestamp(date_from=None, date_to=None):
+    """Convierte fechas locales en un rango semiabierto [inicio, fin) de datetimes.
+
+    Las fechas se interpretan en la zona horaria configurada. Filtrar con
+    ``timestamp__gte`` / ``timestamp__lt`` permite usar los indices sobre
+    ``timestamp``, a diferencia de ``timestamp__date`` que envuelve la
+    columna en una funcion.
+    """
+    inicio = fin = None
+    if date_from:
+        fecha = parse_date(date_from) if isinstance(date_from, str) else date_from
+        if fecha:
+            inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+    if date_to:
+        fecha = parse_date(date_to) if isinstance(date_to, str) else date_to
+        if fecha:
+            fin = timezone.make_aware(datetime.combine(fecha + timedelta(days=1), time.min))
+    return inicio, fin
+
+
+def filtrar_rango(queryset, field, date_from=None, date_to=None):
+    inicio, fin = rango_timestamp(date_from, date_to)
+    if inicio:
+        queryset = queryset.filter(**{f"{field}__gte": inicio})
+    if fin:
+        queryset = queryset.filter(**{f"{field}__lt": fin})
+    return queryset
+
+
+def iterar_por_llave(queryset, campos, chunk_size=5000):
+    """Recorre el queryset ordenado por (timestamp, id) en bloques de ``chunk_size``.
+
+    Usa paginacion por llave en lugar de ``.iterator()``: con PyMySQL el
+    cursor del cliente carga todo el resultado en memoria, mientras que
+    cada bloque aqui es una consulta acotada sobre los indices de timestamp.
+    Cada fila es una tupla ``(timestamp, id, *campos)``.
+    """
+    queryset = queryset.order_by("timestamp", "id")
+    ultimo = None
+    while True:
+        bloque_qs = queryset
+        if ultimo is not None:
+            timestamp, pk = ultimo
+            bloque_qs = bloque_qs.filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk))
+        bloque = list(bloque_qs.values_list("timestamp", "id", *campos)[:chunk_size])
+        if not bloque:
+            return
+        yield from bloque
+        if len(bloque) < chunk_size:
+            return
+        ultimo = bloque[-1][:2]
+
+
+def puntos_recorrido(empleado_id, inicio=None, fin=None, dispositivo_id=None):
+    """Recorrido de un empleado como lista de ``(timestamp, latitud, longitud)``.
+
+    Combina los resumenes diarios compactados con las ubicaciones crudas,
+    de modo que el historial antiguo se sigue pudiendo dibujar aunque ya no
+    exista en Ubicacion.
+    """
+    resumenes = RecorridoResumen.objects.filter(empleado_id=empleado_id)
+    crudas = Ubicacion.objects.filter(empleado_id=empleado_id)
+    if dispositivo_id:
+        resumenes = resumenes.filter(dispositivo_id=dispositivo_id)
+        crudas = crudas.filter(dispositivo_id=dispositivo_id)
+    if inicio:
+        resumenes = resumenes.filter(fin__gte=inicio)
+        crudas = crudas.filter(timestamp__gte=inicio)
+    if fin:
+        resumenes = resumenes.filter(inicio__lt=fin)
+        crudas = crudas.filter(timestamp__lt=fin)
+
+    puntos = []
+    for resumen_puntos in resumenes.values_list("puntos", flat=True):
+        for epoch, latitud, longitud in resumen_puntos:
+            timestamp = datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+            if (inicio is None or timestamp >= inicio) and (fin is None or timestamp < fin):
+                puntos.append((timestamp, latitud, longitud))
+    puntos.extend(
+        (timestamp, float(latitud), float(longitud))
+        for timestamp, _, latitud, longitud in iterar_por_llave(crudas, ("latitud", "longitud"))
+    )
+    puntos.sort(key=lambda punto: punto[0])
+    return puntos
@@ -0,0 +1,235 @@
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from operaciones.geohash import geohash_de
+
+from .geocercas import evaluar_geocercas
+from .models import ORIGEN_CHOICES, UltimaUbicacion, Ubicacion
+from .permisos import gps_permitido
+from .tiempo_real import publicar_ubicaciones
+
+
+MAX_PUNTOS_LOTE = getattr(settings, "TRACKING_MAX_PUNTOS_LOTE", 1000)
+
+COORD_QUANT = Decimal("0.000001")
+PRECISION_QUANT = Decimal("0.01")
+ORIGENES = {value for value, _ in ORIGEN_CHOICES}
+_campo_precision = Ubicacion._meta.get_field("precision")
+# Limite exclusivo que cabe en la columna (max_digits / decimal_places).
+PRECISION_MAXIMA = Decimal(10) ** (_campo_precision.max_digits - _campo_precision.decimal_places)
+ULTIMA_UBICACION_CAMPOS = ["latitud", "longitud", "bateria", "timestamp", "precision", "origen", "geohash"]
+
+
+class LoteInvalido(Exception):
+    pass
+
+
+class SinPermisoGPS(Exception):
+    pass
+
+
+def parse_lote(body, content_type=""):
+    """Convierte el cuerpo de la peticion (JSON o NDJSON) en una lista de puntos."""
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        raise LoteInvalido("El cuerpo debe estar en UTF-8.") from exc
+
+    if "ndjson" in content_type:
+        puntos = []
+        for numero, linea in enumerate(text.splitlines(), start=1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                puntos.append(json.loads(linea))
+            except ValueError as exc:
+                raise LoteInvalido(f"Linea {numero}: JSON invalido.") from exc
+    else:
+        try:
+            data = json.loads(text or "null")
+        except ValueError as exc:
+            raise LoteInvalido("JSON invalido.") from exc
+        puntos = data.get("puntos") if isinstance(data, dict) else data
+
+    if not isinstance(puntos, list):
+        raise LoteInvalido("Se esperaba una lista de puntos.")
+    if len(puntos) > MAX_PUNTOS_LOTE:
+        raise LoteInvalido(f"El lote excede el maximo de {MAX_PUNTOS_LOTE} puntos.")
+    return puntos
+
+
+def _decimal(value, quant):
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    try:
+        number = Decimal(str(value))
+        if not number.is_finite():
+            return None
+        return number.quantize(quant)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _timestamp(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def validar_punto(punto):
+    """Regresa (valores, errores) para un punto crudo del lote."""
+    if not isinstance(punto, dict):
+        return None, ["El punto debe ser un objeto."]
+
+    errores = []
+    latitud = _decimal(punto.get("latitud", punto.get("lat")), COORD_QUANT)
+    longitud = _decimal(punto.get("longitud", punto.get("lon")), COORD_QUANT)
+    timestamp = _timestamp(punto.get("timestamp"))
+    bateria = punto.get("bateria", 0)
+    precision = punto.get("precision")
+    origen = punto.get("origen") or "app"
+
+    if latitud is None or latitud < -90 or latitud > 90:
+        errores.append("Latitud fuera de rango.")
+    if longitud is None or longitud < -180 or longitud > 180:
+        errores.append("Longitud fuera de rango.")
+    if timestamp is None:
+        errores.append("Timestamp invalido.")
+    if not isinstance(bateria, int) or isinstance(bateria, bool) or bateria < 0 or bateria > 100:
+        errores.append("Bateria fuera de rango (0-100).")
+    if precision is not None:
+        precision = _decimal(precision, PRECISION_QUANT)
+        if precision is None or precision < 0 or precision >= PRECISION_MAXIMA:
+            errores.append("Precision invalida.")
+    if origen not in ORIGENES:
+        errores.append("Origen invalido.")
+
+    if errores:
+        return None, errores
+    return {
+        "latitud": latitud,
+        "longitud": longitud,
+        "timestamp": timestamp,
+        "bateria": bateria,
+        "precision": precision,
+        "origen": origen,
+    }, []
+
+
+def ingestar_ubicaciones(dispositivo, puntos):
+    """Valida un lote de puntos de un dispositivo y guarda los aceptados en bloque.
+
+    Regresa una lista de resultados por punto, en el mismo orden del lote.
+    Lanza ``SinPermisoGPS`` si el empleado no tiene permiso vigente.
+    """
+    if not gps_permitido(dispositivo.empleado_id):
+        raise SinPermisoGPS("El empleado no tiene permiso GPS vigente.")
+    resultados = []
+    nuevas = []
+    for index, punto in enumerate(puntos):
+        valores, errores = validar_punto(punto)
+        if errores:
+            resultados.append({"index": index, "estatus": "rechazado", "errores": errores})
+            continue
+        nuevas.append(
+            Ubicacion(
+                empleado_id=dispositivo.empleado_id,
+                dispositivo_id=dispositivo.pk,
+                geohash=geohash_de(valores["latitud"], valores["longitud"]),
+                **valores,
+            )
+        )
+        resultados.append({"index": index, "estatus": "aceptado"})
+
+    if nuevas:
+        with transaction.atomic():
+            Ubicacion.objects.bulk_create(nuevas, batch_size=500)
+            actualizar_ultimas_ubicaciones(nuevas)
+            eventos = evaluar_geocercas(dispositivo.empleado_id, nuevas, dispositivo.pk)
+            publicar_ubicaciones(nuevas, eventos)
+    return resultados
+
+
+def upsert_ultimas_ubicaciones(filas):
+    """Inserta o reemplaza filas de UltimaUbicacion por (empleado, dispositivo)."""
+    kwargs = {"update_conflicts": True, "update_fields": ULTIMA_UBICACION_CAMPOS}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs["unique_fields"] = ["empleado", "dispositivo"]
+    UltimaUbicacion.objects.bulk_create(filas, batch_size=500, **kwargs)
+
+
+def actualizar_ultimas_ubicaciones(ubicaciones):
+    """Actualiza la ultima posicion conocida con las ubicaciones mas recientes del lote.
+
+    Solo se escribe cuando el punto es mas nuevo que el registrado, para que
+    un lote atrasado no regrese la posicion en el mapa.
+    """
+    recientes = {}
+    for ubicacion in ubicaciones:
+        key = (ubicacion.empleado_id, ubicacion.dispositivo_id)
+        actual = recientes.get(key)
+        if actual is None or ubicacion.timestamp > actual.timestamp:
+            recientes[key] = ubicacion
+    if not recientes:
+        return
+
+    empleados = {empleado_id for empleado_id, _ in recientes}
+    dispositivos = {dispositivo_id for _, dispositivo_id in recientes}
+    existentes = {
+        (empleado_id, dispositivo_id): timestamp
+        for empleado_id, dispositivo_id, timestamp in UltimaUbicacion.objects.select_for_update()
+        .filter(empleado_id__in=empleados, dispositivo_id__in=dispositivos)
+        .values_list("empleado_id", "dispositivo_id", "timestamp")
+    }
+    filas = [
+        UltimaUbicacion(
+            empleado_id=empleado_id,
+            dispositivo_id=dispositivo_id,
+            **{campo: getattr(ubicacion, campo) for campo in ULTIMA_UBICACION_CAMPOS},
+        )
+        for (empleado_id, dispositivo_id), ubicacion in recientes.items()
+        if existentes.get((empleado_id, dispositivo_id)) is None
+        or ubicacion.timestamp > existentes[(empleado_id, dispositivo_id)]
+    ]
+    if filas:
+        upsert_ultimas_ubicaciones(filas)
+
+
+def refrescar_ultimas_ubicaciones(pares):
+    """Recalcula la ultima posicion de cada ``(empleado_id, dispositivo_id)`` desde Ubicacion.
+
+    Para ediciones y bajas, donde el punto mas reciente puede dejar de
+    serlo; si ya no quedan puntos del par se borra su fila.
+    """
+    for empleado_id, dispositivo_id in set(pares):
+        ultima = (
+            Ubicacion.objects.filter(empleado_id=empleado_id, dispositivo_id=dispositivo_id)
+            .order_by("-timestamp", "-id")
+            .first()
+        )
+        if ultima is None:
+            UltimaUbicacion.objects.filter(empleado_id=empleado_id, dispositivo_id=dispositivo_id).delete()
+        else:
+            UltimaUbicacion.objects.update_or_create(
+                empleado_id=empleado_id,
+                dispositivo_id=dispositivo_id,
+                defaults={campo: getattr(ultima, campo) for campo in ULTIMA_UBICACION_CAMPOS},
+            )
@@ -0,0 +1,44 @@
+import time as reloj
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tracking.adherencia import TOLERANCIA_METROS, analizar_adherencia
+
+
+class Command(BaseCommand):
+    help = "Compara los recorridos GPS de los empleados con las paradas de sus rutas asignadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", help="Fecha inicial (YYYY-MM-DD). Por defecto, ayer.")
+        parser.add_argument("--hasta", help="Fecha final inclusive (YYYY-MM-DD). Por defecto, --desde.")
+        parser.add_argument("--ruta", type=int)
+        parser.add_argument("--empleado", type=int)
+        parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_METROS)
+
+    def handle(self, *args, **options):
+        try:
+            desde = date.fromisoformat(options["desde"]) if options["desde"] else timezone.localdate() - timedelta(days=1)
+            hasta = date.fromisoformat(options["hasta"]) if options["hasta"] else desde
+        except ValueError as exc:
+            raise CommandError("Fecha invalida, usa YYYY-MM-DD.") from exc
+
+        inicio = reloj.monotonic()
+        resultados = analizar_adherencia(
+            desde,
+            hasta,
+            ruta_id=options["ruta"],
+            empleado_id=options["empleado"],
+            tolerancia=options["tolerancia"],
+        )
+        for r in resultados:
+            self.stdout.write(
+                f"{r['fecha']} empleado={r['empleado_id']} ruta={r['ruta_id']} "
+                f"paradas={r['visitadas']}/{r['paradas']} omitidas={r['omitidas']} "
+                f"fuera_de_orden={r['fuera_de_orden']} desviacion_max={r['desviacion_max_m']}m "
+                f"puntos_fuera={r['puntos_fuera']}/{r['puntos']}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Turnos analizados: {len(resultados)} en {reloj.monotonic() - inicio:.2f}s.")
+        )
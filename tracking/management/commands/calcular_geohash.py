@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from operaciones.geohash import geohash_de
+from operaciones.models import Sitio
+from tracking.models import UltimaUbicacion, Ubicacion
+
+
+MODELOS = (Sitio, Ubicacion, UltimaUbicacion)
+
+
+class Command(BaseCommand):
+    help = "Calcula el geohash de sitios y ubicaciones existentes que no lo tienen."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=5000)
+        parser.add_argument(
+            "--todos",
+            action="store_true",
+            help="Recalcula tambien las filas que ya tienen geohash.",
+        )
+
+    def handle(self, *args, **options):
+        for model in MODELOS:
+            total = self._calcular(model, options["batch"], options["todos"])
+            self.stdout.write(f"{model.__name__}: {total} actualizados.")
+        self.stdout.write(self.style.SUCCESS("Geohash calculado."))
+
+    def _calcular(self, model, batch, todos):
+        queryset = model.objects.all()
+        if not todos:
+            queryset = queryset.filter(geohash="")
+        queryset = queryset.exclude(latitud__isnull=True).exclude(longitud__isnull=True)
+
+        total = 0
+        ultimo = 0
+        while True:
+            objetos = list(
+                queryset.filter(pk__gt=ultimo).order_by("pk").only("pk", "latitud", "longitud", "geohash")[:batch]
+            )
+            if not objetos:
+                return total
+            cambios = []
+            for objeto in objetos:
+                geohash = geohash_de(objeto.latitud, objeto.longitud)
+                if geohash != objeto.geohash:
+                    objeto.geohash = geohash
+                    cambios.append(objeto)
+            if cambios:
+                with transaction.atomic():
+                    model.objects.bulk_update(cambios, ["geohash"], batch_size=500)
+            total += len(cambios)
+            ultimo = objetos[-1].pk
@@ -0,0 +1,107 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from tracking.historial import iterar_por_llave
+from tracking.models import RecorridoResumen, Ubicacion
+from tracking.simplificacion import douglas_peucker
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacta ubicaciones anteriores a la ventana de retencion en resumenes diarios "
+        "por empleado/dispositivo y elimina las filas crudas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=getattr(settings, "TRACKING_RETENCION_DIAS", 30),
+            help="Dias que se conservan con resolucion completa.",
+        )
+        parser.add_argument(
+            "--tolerancia",
+            type=float,
+            default=getattr(settings, "TRACKING_TOLERANCIA_METROS", 10.0),
+            help="Tolerancia en metros para Douglas-Peucker.",
+        )
+        parser.add_argument("--batch", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        self.tolerancia = options["tolerancia"]
+        self.batch = options["batch"]
+        self.dry_run = options["dry_run"]
+        limite = timezone.make_aware(
+            datetime.combine(timezone.localdate() - timedelta(days=options["dias"]), time.min)
+        )
+
+        antiguas = Ubicacion.objects.filter(timestamp__lt=limite)
+        pares = list(
+            antiguas.order_by().values_list("empleado_id", "dispositivo_id").distinct()
+        )
+        dias = originales = conservados = 0
+        for empleado_id, dispositivo_id in pares:
+            queryset = antiguas.filter(empleado_id=empleado_id, dispositivo_id=dispositivo_id)
+            fecha_actual, puntos, ids = None, [], []
+            for timestamp, pk, latitud, longitud in iterar_por_llave(
+                queryset, ("latitud", "longitud"), chunk_size=self.batch
+            ):
+                fecha = timezone.localtime(timestamp).date()
+                if fecha != fecha_actual and puntos:
+                    conservados += self._compactar_dia(empleado_id, dispositivo_id, fecha_actual, puntos, ids)
+                    originales += len(puntos)
+                    dias += 1
+                    puntos, ids = [], []
+                fecha_actual = fecha
+                puntos.append((timestamp.timestamp(), float(latitud), float(longitud)))
+                ids.append(pk)
+            if puntos:
+                conservados += self._compactar_dia(empleado_id, dispositivo_id, fecha_actual, puntos, ids)
+                originales += len(puntos)
+                dias += 1
+
+        prefijo = "[dry-run] " if self.dry_run else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefijo}Dias compactados: {dias}. Puntos: {originales} -> {conservados}."
+            )
+        )
+
+    def _compactar_dia(self, empleado_id, dispositivo_id, fecha, puntos, ids):
+        existente = RecorridoResumen.objects.filter(
+            empleado_id=empleado_id, dispositivo_id=dispositivo_id, fecha=fecha
+        ).first()
+        originales = len(puntos)
+        if existente:
+            # Puntos que llegaron tarde para un dia ya compactado.
+            puntos = sorted([tuple(p) for p in existente.puntos] + puntos)
+            originales += existente.puntos_originales
+        simplificados = douglas_peucker(puntos, self.tolerancia)
+        if self.dry_run:
+            return len(simplificados)
+
+        with transaction.atomic():
+            RecorridoResumen.objects.update_or_create(
+                empleado_id=empleado_id,
+                dispositivo_id=dispositivo_id,
+                fecha=fecha,
+                defaults={
+                    "inicio": datetime.fromtimestamp(simplificados[0][0], tz=dt_timezone.utc),
+                    "fin": datetime.fromtimestamp(simplificados[-1][0], tz=dt_timezone.utc),
+                    "puntos": [
+                        [round(epoch, 3), round(lat, 6), round(lon, 6)]
+                        for epoch, lat, lon in simplificados
+                    ],
+                    "puntos_originales": originales,
+                },
+            )
+            # Solo las filas que entraron al resumen: un punto tardio insertado
+            # mientras tanto se queda para la siguiente corrida.
+            for start in range(0, len(ids), self.batch):
+                Ubicacion.objects.filter(pk__in=ids[start : start + self.batch]).delete()
+        return len(simplificados)
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from tracking.models import CambioSync
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina la bitacora de cambios para sincronizacion anterior a la ventana indicada. "
+        "Los telefonos con un token mas viejo reciben una sincronizacion completa."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=getattr(settings, "TRACKING_SYNC_RETENCION_DIAS", 30),
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options["dias"])
+        # Se conserva siempre el ultimo registro para que el token no retroceda.
+        ultimo = CambioSync.objects.aggregate(ultimo=Max("id"))["ultimo"]
+        if ultimo is None:
+            self.stdout.write(self.style.SUCCESS("Cambios eliminados: 0."))
+            return
+        eliminados, _ = CambioSync.objects.filter(fecha__lt=limite, id__lt=ultimo).delete()
+        self.stdout.write(self.style.SUCCESS(f"Cambios eliminados: {eliminados}."))
@@ -0,0 +1,51 @@
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Q
+
+from tracking.ingesta import ULTIMA_UBICACION_CAMPOS
+from tracking.models import UltimaUbicacion, Ubicacion
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla de ultima ubicacion por empleado y dispositivo desde Ubicacion."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=200)
+
+    def handle(self, *args, **options):
+        chunk = options["chunk"]
+        maximos = list(
+            Ubicacion.objects.values("empleado_id", "dispositivo_id")
+            .annotate(ultimo=Max("timestamp"))
+            .order_by()
+        )
+
+        filas = {}
+        for start in range(0, len(maximos), chunk):
+            grupo = maximos[start : start + chunk]
+            filtro = reduce(
+                or_,
+                (
+                    Q(
+                        empleado_id=row["empleado_id"],
+                        dispositivo_id=row["dispositivo_id"],
+                        timestamp=row["ultimo"],
+                    )
+                    for row in grupo
+                ),
+            )
+            # Si hay empates en el timestamp gana el id mayor.
+            for ubicacion in Ubicacion.objects.filter(filtro).order_by("id"):
+                filas[(ubicacion.empleado_id, ubicacion.dispositivo_id)] = UltimaUbicacion(
+                    empleado_id=ubicacion.empleado_id,
+                    dispositivo_id=ubicacion.dispositivo_id,
+                    **{campo: getattr(ubicacion, campo) for campo in ULTIMA_UBICACION_CAMPOS},
+                )
+
+        with transaction.atomic():
+            UltimaUbicacion.objects.all().delete()
+            UltimaUbicacion.objects.bulk_create(filas.values(), batch_size=500)
+        self.stdout.write(self.style.SUCCESS(f"Ultimas ubicaciones reconstruidas: {len(filas)}."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0001_initial'),
+        ('usuarios', '0003_migrate_contrasena_temporal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UltimaUbicacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitud', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitud', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('bateria', models.PositiveSmallIntegerField(default=0)),
+                ('timestamp', models.DateTimeField()),
+                ('precision', models.DecimalField(blank=True, decimal_places=2, max_digits=9, null=True)),
+                ('origen', models.CharField(choices=[('app', 'App'), ('web', 'Web')], default='app', max_length=20)),
+                ('dispositivo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tracking.dispositivo')),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='usuarios.empleado')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['timestamp'], name='tracking_ul_timesta_0bf7f0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('empleado', 'dispositivo'), name='tracking_ultima_ubicacion_unica')],
+            },
+        ),
+    ]
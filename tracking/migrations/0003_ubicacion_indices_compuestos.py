@@ -0,0 +1,22 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0002_ultimaubicacion'),
+        ('usuarios', '0003_migrate_contrasena_temporal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ubicacion',
+            index=models.Index(fields=['empleado', 'timestamp'], name='tracking_ub_emplead_4ec2e8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ubicacion',
+            index=models.Index(fields=['dispositivo', 'timestamp'], name='tracking_ub_disposi_86ca41_idx'),
+        ),
+    ]
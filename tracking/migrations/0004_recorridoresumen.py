@@ -0,0 +1,32 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0003_ubicacion_indices_compuestos'),
+        ('usuarios', '0003_migrate_contrasena_temporal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecorridoResumen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('inicio', models.DateTimeField()),
+                ('fin', models.DateTimeField()),
+                ('puntos', models.JSONField(default=list)),
+                ('puntos_originales', models.PositiveIntegerField(default=0)),
+                ('dispositivo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tracking.dispositivo')),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='usuarios.empleado')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['empleado', 'fecha'], name='tracking_re_emplead_0c1f28_idx')],
+                'constraints': [models.UniqueConstraint(fields=('empleado', 'dispositivo', 'fecha'), name='tracking_recorrido_resumen_unico')],
+            },
+        ),
+    ]
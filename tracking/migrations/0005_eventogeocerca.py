@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asignaciones', '0004_migrate_ruta_points'),
+        ('operaciones', '0002_sitio_radio_metros'),
+        ('tracking', '0004_recorridoresumen'),
+        ('usuarios', '0003_migrate_contrasena_temporal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoGeocerca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('salida', 'Salida')], max_length=20)),
+                ('timestamp', models.DateTimeField()),
+                ('distancia_metros', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('asignacion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='asignaciones.asignacion')),
+                ('dispositivo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tracking.dispositivo')),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='usuarios.empleado')),
+                ('sitio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='operaciones.sitio')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['empleado', 'sitio', 'timestamp'], name='tracking_ev_emplead_bac8a5_idx'), models.Index(fields=['sitio', 'timestamp'], name='tracking_ev_sitio_i_da26c8_idx')],
+            },
+        ),
+    ]
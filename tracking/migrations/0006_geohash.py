@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0005_eventogeocerca'),
+        ('usuarios', '0003_migrate_contrasena_temporal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ubicacion',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='ultimaubicacion',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='ubicacion',
+            index=models.Index(fields=['geohash', 'timestamp'], name='tracking_ub_geohash_212383_idx'),
+        ),
+    ]
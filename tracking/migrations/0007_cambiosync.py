@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0006_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=60)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('empleado_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('eliminado', models.BooleanField(default=False)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha'], name='tracking_ca_fecha_21b631_idx'), models.Index(fields=['empleado_id', 'id'], name='tracking_ca_emplead_a74c85_idx')],
+            },
+        ),
+    ]
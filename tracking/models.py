@@ -1,5 +1,7 @@
 from django.db import models
 
+from operaciones.geohash import geohash_de
+
 
 ESTATUS_CHOICES = [
     ("activo", "Activo"),
@@ -17,6 +19,11 @@ ORIGEN_CHOICES = [
     ("web", "Web"),
 ]
 
+EVENTO_GEOCERCA_CHOICES = [
+    ("entrada", "Entrada"),
+    ("salida", "Salida"),
+]
+
 
 class Dispositivo(models.Model):
     empleado = models.ForeignKey("usuarios.Empleado", on_delete=models.CASCADE)
@@ -51,9 +58,105 @@ class Ubicacion(models.Model):
     timestamp = models.DateTimeField()
     precision = models.DecimalField(max_digits=9, decimal_places=2, null=True, blank=True)
     origen = models.CharField(max_length=20, choices=ORIGEN_CHOICES, default="app")
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
 
     class Meta:
-        indexes = [models.Index(fields=["timestamp"]) ]
+        indexes = [
+            models.Index(fields=["timestamp"]),
+            models.Index(fields=["empleado", "timestamp"]),
+            models.Index(fields=["dispositivo", "timestamp"]),
+            models.Index(fields=["geohash", "timestamp"]),
+        ]
 
     def __str__(self):
         return f"{self.empleado} - {self.timestamp}".strip()
+
+    def save(self, *args, **kwargs):
+        self.geohash = geohash_de(self.latitud, self.longitud)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitud", "longitud"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
+
+
+class UltimaUbicacion(models.Model):
+    empleado = models.ForeignKey("usuarios.Empleado", on_delete=models.CASCADE)
+    dispositivo = models.ForeignKey("Dispositivo", on_delete=models.CASCADE)
+    latitud = models.DecimalField(max_digits=9, decimal_places=6)
+    longitud = models.DecimalField(max_digits=9, decimal_places=6)
+    bateria = models.PositiveSmallIntegerField(default=0)
+    timestamp = models.DateTimeField()
+    precision = models.DecimalField(max_digits=9, decimal_places=2, null=True, blank=True)
+    origen = models.CharField(max_length=20, choices=ORIGEN_CHOICES, default="app")
+    geohash = models.CharField(max_length=12, blank=True, editable=False, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["empleado", "dispositivo"], name="tracking_ultima_ubicacion_unica"
+            )
+        ]
+        indexes = [models.Index(fields=["timestamp"])]
+
+    def __str__(self):
+        return f"{self.empleado} - {self.timestamp}".strip()
+
+
+class RecorridoResumen(models.Model):
+    empleado = models.ForeignKey("usuarios.Empleado", on_delete=models.CASCADE)
+    dispositivo = models.ForeignKey("Dispositivo", on_delete=models.CASCADE)
+    fecha = models.DateField()
+    inicio = models.DateTimeField()
+    fin = models.DateTimeField()
+    # Lista de [epoch, latitud, longitud] ya simplificada.
+    puntos = models.JSONField(default=list)
+    puntos_originales = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["empleado", "dispositivo", "fecha"], name="tracking_recorrido_resumen_unico"
+            )
+        ]
+        indexes = [models.Index(fields=["empleado", "fecha"])]
+
+    def __str__(self):
+        return f"{self.empleado} - {self.fecha}".strip()
+
+
+class EventoGeocerca(models.Model):
+    empleado = models.ForeignKey("usuarios.Empleado", on_delete=models.CASCADE)
+    sitio = models.ForeignKey("operaciones.Sitio", on_delete=models.CASCADE)
+    asignacion = models.ForeignKey(
+        "asignaciones.Asignacion", null=True, blank=True, on_delete=models.SET_NULL
+    )
+    dispositivo = models.ForeignKey("Dispositivo", null=True, blank=True, on_delete=models.SET_NULL)
+    tipo = models.CharField(max_length=20, choices=EVENTO_GEOCERCA_CHOICES)
+    timestamp = models.DateTimeField()
+    distancia_metros = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["empleado", "sitio", "timestamp"]),
+            models.Index(fields=["sitio", "timestamp"]),
+        ]
+
+    def __str__(self):
+        return f"{self.empleado} - {self.sitio} - {self.tipo}".strip()
+
+
+class CambioSync(models.Model):
+    modelo = models.CharField(max_length=60)
+    objeto_id = models.PositiveBigIntegerField()
+    empleado_id = models.PositiveBigIntegerField(null=True, blank=True)
+    eliminado = models.BooleanField(default=False)
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["fecha"]),
+            models.Index(fields=["empleado_id", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id} - {self.pk}".strip()
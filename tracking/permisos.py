@@ -0,0 +1,74 @@
+import itertools
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import PermisoGPS
+
+
+# Cuanto tarda, como maximo, un worker en ver un cambio hecho en otro proceso.
+TTL = getattr(settings, "TRACKING_PERMISO_GPS_TTL", 30)
+
+# {empleado_id: (permitido, vence)} de este proceso.
+_permisos = {}
+# Avanza con cada invalidacion; una lectura que la cruza no se guarda.
+_invalidaciones = itertools.count(1)
+_version = 0
+
+
+def gps_permitidos(empleado_ids):
+    """Mapa ``{empleado_id: bool}`` con permiso GPS otorgado y no revocado.
+
+    Se lee de un mapa en memoria del worker, sin consultas mientras la
+    entrada no venza; solo los empleados que faltan van a la base, en una
+    sola consulta. Las senales de PermisoGPS borran la entrada al guardar o
+    eliminar, asi que en el worker que hace el cambio la revocacion aplica
+    en la siguiente peticion; los demas la ven cuando vence ``TTL``.
+    """
+    ahora = time.monotonic()
+    permitidos = {}
+    for empleado_id in set(empleado_ids):
+        entrada = _permisos.get(empleado_id)
+        if entrada is not None and entrada[1] > ahora:
+            permitidos[empleado_id] = entrada[0]
+    faltantes = set(empleado_ids) - set(permitidos)
+    if faltantes:
+        version = _version
+        activos = set(
+            PermisoGPS.objects.filter(empleado_id__in=faltantes, otorgado=True, revocado=False).values_list(
+                "empleado_id", flat=True
+            )
+        )
+        nuevos = {pk: pk in activos for pk in faltantes}
+        if version == _version:
+            vence = ahora + TTL
+            _permisos.update({pk: (valor, vence) for pk, valor in nuevos.items()})
+        permitidos.update(nuevos)
+    return permitidos
+
+
+def gps_permitido(empleado_id):
+    return gps_permitidos([empleado_id])[empleado_id]
+
+
+def _descartar(empleado_id):
+    global _version
+    _version = next(_invalidaciones)
+    _permisos.pop(empleado_id, None)
+
+
+def invalidar(empleado_id):
+    _descartar(empleado_id)
+    # Otra peticion podria volver a guardar el valor viejo antes del commit.
+    transaction.on_commit(lambda: _descartar(empleado_id))
+
+
+def _al_cambiar(sender, instance, **kwargs):
+    invalidar(instance.empleado_id)
+
+
+def conectar():
+    post_save.connect(_al_cambiar, sender=PermisoGPS, dispatch_uid="tracking-permiso-gps-save")
+    post_delete.connect(_al_cambiar, sender=PermisoGPS, dispatch_uid="tracking-permiso-gps-delete")
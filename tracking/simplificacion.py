@@ -0,0 +1,50 @@
+import math
+
+
+RADIO_TIERRA_M = 6371008.8
+
+
+def _proyectar(puntos):
+    # Proyeccion equirectangular local: suficiente para distancias de un recorrido diario.
+    lat0 = math.radians(sum(p[1] for p in puntos) / len(puntos))
+    escala = math.cos(lat0)
+    return [
+        (math.radians(lon) * RADIO_TIERRA_M * escala, math.radians(lat) * RADIO_TIERRA_M)
+        for _, lat, lon in puntos
+    ]
+
+
+def _distancia_segmento(p, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    if dx == 0 and dy == 0:
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return math.hypot(p[0] - (a[0] + t * dx), p[1] - (a[1] + t * dy))
+
+
+def douglas_peucker(puntos, tolerancia_m):
+    """Simplifica una lista de ``(epoch, latitud, longitud)`` ordenada por tiempo.
+
+    Conserva los extremos y todo punto que se aleje mas de ``tolerancia_m``
+    metros de la linea simplificada. Iterativo para no depender del limite
+    de recursion en recorridos largos.
+    """
+    if len(puntos) <= 2:
+        return list(puntos)
+    xy = _proyectar(puntos)
+    conservar = [False] * len(puntos)
+    conservar[0] = conservar[-1] = True
+    pila = [(0, len(puntos) - 1)]
+    while pila:
+        inicio, fin = pila.pop()
+        max_dist, max_index = 0.0, None
+        for index in range(inicio + 1, fin):
+            dist = _distancia_segmento(xy[index], xy[inicio], xy[fin])
+            if dist > max_dist:
+                max_dist, max_index = dist, index
+        if max_index is not None and max_dist > tolerancia_m:
+            conservar[max_index] = True
+            pila.append((inicio, max_index))
+            pila.append((max_index, fin))
+    return [punto for punto, keep in zip(puntos, conservar) if keep]
@@ -0,0 +1,163 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Max, Min, Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import CambioSync
+
+
+# Nombre en la respuesta -> modelo rastreado.
+MODELOS = {
+    "asignacion": "asignaciones.Asignacion",
+    "asignacion_empleado": "asignaciones.AsignacionEmpleado",
+    "ruta": "asignaciones.Ruta",
+    "ruta_punto": "asignaciones.RutaPunto",
+    "sitio": "operaciones.Sitio",
+    "turno": "usuarios.Turno",
+}
+# Campos que no viajan al telefono.
+EXCLUIDOS = {"geohash"}
+# Un token solo avanza hasta cambios con esta antiguedad: un id menor que aun
+# no se confirma en otra transaccion no se pierde, a costa de reenviar unas
+# filas (idempotentes) en la siguiente sincronizacion.
+MARGEN_TOKEN = timedelta(seconds=getattr(settings, "TRACKING_SYNC_MARGEN_SEGUNDOS", 30))
+
+
+def _etiqueta(model):
+    return model._meta.label_lower
+
+
+def registrar_cambios(model, ids, eliminado=False, empleado_id=None):
+    """Anota cambios hechos sin senales (``update()``, ``bulk_create``...).
+
+    ``ids`` puede ser un dict ``{pk: empleado_id}`` cuando cada fila es de un
+    empleado distinto (p. ej. AsignacionEmpleado creadas en bloque).
+    """
+    empleados = ids if isinstance(ids, dict) else dict.fromkeys(ids, empleado_id)
+    CambioSync.objects.bulk_create(
+        [
+            CambioSync(modelo=_etiqueta(model), objeto_id=pk, eliminado=eliminado, empleado_id=empleado)
+            for pk, empleado in empleados.items()
+        ],
+        batch_size=500,
+    )
+
+
+def _al_guardar(sender, instance, **kwargs):
+    CambioSync.objects.create(
+        modelo=_etiqueta(sender), objeto_id=instance.pk, empleado_id=getattr(instance, "empleado_id", None)
+    )
+
+
+def _al_eliminar(sender, instance, **kwargs):
+    CambioSync.objects.create(
+        modelo=_etiqueta(sender),
+        objeto_id=instance.pk,
+        empleado_id=getattr(instance, "empleado_id", None),
+        eliminado=True,
+    )
+
+
+def conectar():
+    for label in MODELOS.values():
+        model = apps.get_model(label)
+        post_save.connect(_al_guardar, sender=model, dispatch_uid=f"sync-save-{label}")
+        post_delete.connect(_al_eliminar, sender=model, dispatch_uid=f"sync-delete-{label}")
+
+
+def alcance(empleado_id):
+    """Ids por modelo que el telefono del empleado debe tener hoy."""
+    hoy = timezone.localdate()
+    AsignacionEmpleado = apps.get_model("asignaciones", "AsignacionEmpleado")
+    Asignacion = apps.get_model("asignaciones", "Asignacion")
+    RutaPunto = apps.get_model("asignaciones", "RutaPunto")
+    Empleado = apps.get_model("usuarios", "Empleado")
+
+    vigentes = AsignacionEmpleado.objects.filter(
+        empleado_id=empleado_id,
+        estatus="activo",
+        asignacion__estatus="activo",
+        fecha_inicio__lte=hoy,
+    ).filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=hoy))
+    ids = {nombre: set() for nombre in MODELOS}
+    for pk, asignacion_id in vigentes.values_list("pk", "asignacion_id"):
+        ids["asignacion_empleado"].add(pk)
+        ids["asignacion"].add(asignacion_id)
+    for sitio_id, ruta_id, turno_id in Asignacion.objects.filter(pk__in=ids["asignacion"]).values_list(
+        "sitio_id", "ruta_id", "turno_id"
+    ):
+        ids["sitio"].add(sitio_id)
+        ids["ruta"].add(ruta_id)
+        ids["turno"].add(turno_id)
+    ids["turno"].add(Empleado.objects.filter(pk=empleado_id).values_list("turno_preferido_id", flat=True).first())
+    ids["ruta_punto"].update(RutaPunto.objects.filter(ruta_id__in=ids["ruta"]).values_list("pk", flat=True))
+    for valores in ids.values():
+        valores.discard(None)
+    return ids
+
+
+def _cambia_alcance(cambios, empleado_id, asignaciones_empleado):
+    for modelo, objeto_id, cambio_empleado_id in cambios:
+        if modelo == "asignaciones.asignacionempleado" and cambio_empleado_id == empleado_id:
+            return True
+        if modelo == "asignaciones.asignacion" and objeto_id in asignaciones_empleado:
+            return True
+    return False
+
+
+def _filas(model, ids):
+    campos = [f.attname for f in model._meta.concrete_fields if f.attname not in EXCLUIDOS]
+    filas = [list(row) for row in model.objects.filter(pk__in=ids).order_by("pk").values_list(*campos)]
+    return campos, filas
+
+
+def sincronizar(empleado_id, desde=0):
+    """Cambios para el telefono del empleado a partir del token ``desde``.
+
+    Regresa ``completo=True`` (el cliente reemplaza todo) si el token es 0,
+    ya no esta en la bitacora, o cambiaron las asignaciones del empleado; si
+    no, solo las filas que cambiaron y dentro del alcance, y como eliminados
+    los ids que cambiaron pero ya no le corresponden.
+    """
+    limites = CambioSync.objects.aggregate(minimo=Min("id"), maximo=Max("id"))
+    piso = (limites["minimo"] or 1) - 1
+    valido = 0 < desde <= (limites["maximo"] or 0) and desde >= piso
+    base = desde if valido else piso
+    completo = not valido
+
+    ids = alcance(empleado_id)
+    cambiados = {nombre: set() for nombre in MODELOS}
+    if not completo:
+        cambios = list(
+            CambioSync.objects.filter(id__gt=desde).values_list("modelo", "objeto_id", "empleado_id").distinct()
+        )
+        AsignacionEmpleado = apps.get_model("asignaciones", "AsignacionEmpleado")
+        propias = set(
+            AsignacionEmpleado.objects.filter(empleado_id=empleado_id).values_list("asignacion_id", flat=True)
+        )
+        completo = _cambia_alcance(cambios, empleado_id, propias)
+        etiquetas = {label.lower(): nombre for nombre, label in MODELOS.items()}
+        for modelo, objeto_id, _ in cambios:
+            if modelo in etiquetas:
+                cambiados[etiquetas[modelo]].add(objeto_id)
+
+    seguro = CambioSync.objects.filter(id__gt=base, fecha__lt=timezone.now() - MARGEN_TOKEN).aggregate(
+        token=Max("id")
+    )["token"]
+    token = seguro or base
+
+    modelos = {}
+    for nombre, label in MODELOS.items():
+        if completo:
+            enviar, eliminados = ids[nombre], set()
+        else:
+            enviar = cambiados[nombre] & ids[nombre]
+            eliminados = cambiados[nombre] - ids[nombre]
+        if not enviar and not eliminados and not completo:
+            continue
+        campos, filas = _filas(apps.get_model(label), enviar)
+        modelos[nombre] = {"campos": campos, "filas": filas, "eliminados": sorted(eliminados)}
+    return {"token": token, "completo": completo, "modelos": modelos}
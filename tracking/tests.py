@@ -0,0 +1,156 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from usuarios.models import Empleado
+
+from .historial import filtrar_rango
+from .ingesta import SinPermisoGPS, ingestar_ubicaciones
+from .models import Dispositivo, PermisoGPS, Ubicacion
+from . import permisos
+from .permisos import gps_permitido
+
+
+def _indice(*campos):
+    for index in Ubicacion._meta.indexes:
+        if tuple(index.fields) == campos:
+            return index.name
+    raise AssertionError(f"Ubicacion no tiene indice sobre {campos}")
+
+
+class PlanRangoUbicacionTests(TestCase):
+    """Los filtros de historial deben resolverse con los indices compuestos."""
+
+    EMPLEADOS = 20
+    PUNTOS_POR_EMPLEADO = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        inicio = timezone.now() - timedelta(days=30)
+        cls.dispositivos = []
+        filas = []
+        for n in range(cls.EMPLEADOS):
+            empleado = Empleado.objects.create(nombres=f"E{n}", apellidos="X")
+            dispositivo = Dispositivo.objects.create(empleado=empleado, plataforma="android")
+            cls.dispositivos.append(dispositivo)
+            filas.extend(
+                Ubicacion(
+                    empleado=empleado,
+                    dispositivo=dispositivo,
+                    latitud=19,
+                    longitud=-99,
+                    timestamp=inicio + timedelta(minutes=i * 40),
+                )
+                for i in range(cls.PUNTOS_POR_EMPLEADO)
+            )
+        Ubicacion.objects.bulk_create(filas, batch_size=2000)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Ubicacion._meta.db_table}")
+        cls.desde = timezone.localdate() - timedelta(days=7)
+        cls.hasta = timezone.localdate() - timedelta(days=5)
+
+    def assertUsaIndice(self, queryset, nombre):
+        plan = queryset.explain()
+        self.assertIn(nombre, plan, plan)
+
+    def test_rango_por_empleado(self):
+        dispositivo = self.dispositivos[3]
+        queryset = filtrar_rango(
+            Ubicacion.objects.filter(empleado_id=dispositivo.empleado_id), "timestamp", self.desde, self.hasta
+        )
+        self.assertUsaIndice(queryset, _indice("empleado", "timestamp"))
+
+    def test_rango_por_dispositivo(self):
+        queryset = filtrar_rango(
+            Ubicacion.objects.filter(dispositivo_id=self.dispositivos[5].pk), "timestamp", self.desde, self.hasta
+        )
+        self.assertUsaIndice(queryset, _indice("dispositivo", "timestamp"))
+
+    def test_rango_sin_funcion_sobre_la_columna(self):
+        queryset = filtrar_rango(Ubicacion.objects.all(), "timestamp", self.desde, self.hasta)
+        sql = str(queryset.query).lower()
+        self.assertNotIn("django_datetime_cast_date", sql)
+        self.assertNotIn("date(", sql)
+
+
+class PermisoGPSCacheTests(TestCase):
+    def setUp(self):
+        permisos._permisos.clear()
+        self.empleado = Empleado.objects.create(nombres="E", apellidos="X")
+        self.dispositivo = Dispositivo.objects.create(empleado=self.empleado, plataforma="android")
+        self.permiso = PermisoGPS.objects.create(empleado=self.empleado, otorgado=True)
+
+    def consultas(self, funcion):
+        with CaptureQueriesContext(connection) as capturadas:
+            resultado = funcion()
+        return resultado, [q["sql"] for q in capturadas.captured_queries]
+
+    def test_sin_consultas_en_estado_estable(self):
+        self.assertTrue(gps_permitido(self.empleado.pk))
+        permitido, consultas = self.consultas(lambda: gps_permitido(self.empleado.pk))
+        self.assertTrue(permitido)
+        self.assertEqual(consultas, [])
+
+    def test_revocacion_inmediata(self):
+        self.assertTrue(gps_permitido(self.empleado.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.permiso.revocado = True
+            self.permiso.save()
+        self.assertFalse(gps_permitido(self.empleado.pk))
+
+    def test_eliminar_permiso_revoca(self):
+        self.assertTrue(gps_permitido(self.empleado.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.permiso.delete()
+        self.assertFalse(gps_permitido(self.empleado.pk))
+
+    def test_otro_worker_ve_el_cambio_al_vencer_el_ttl(self):
+        self.assertTrue(gps_permitido(self.empleado.pk))
+        # El cambio llega por otro proceso: aqui no corre ninguna senal.
+        PermisoGPS.objects.filter(pk=self.permiso.pk).update(revocado=True)
+        self.assertTrue(gps_permitido(self.empleado.pk))
+        vencido = time.monotonic() + permisos.TTL + 1
+        with mock.patch("tracking.permisos.time.monotonic", return_value=vencido):
+            self.assertFalse(gps_permitido(self.empleado.pk))
+
+    def test_lectura_cruzada_con_invalidacion_no_se_guarda(self):
+        original = PermisoGPS.objects.filter
+
+        def filtrar_e_invalidar(*args, **kwargs):
+            permisos.invalidar(self.empleado.pk)
+            return original(*args, **kwargs)
+
+        with mock.patch.object(PermisoGPS.objects, "filter", side_effect=filtrar_e_invalidar):
+            self.assertTrue(gps_permitido(self.empleado.pk))
+        self.assertNotIn(self.empleado.pk, permisos._permisos)
+
+    def test_lote_rechazado_tras_revocar(self):
+        puntos = [{"lat": 19, "lon": -99, "timestamp": timezone.now().timestamp()}]
+        self.assertEqual(ingestar_ubicaciones(self.dispositivo, puntos)[0]["estatus"], "aceptado")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.permiso.revocado = True
+            self.permiso.save()
+        with self.assertRaises(SinPermisoGPS):
+            ingestar_ubicaciones(self.dispositivo, puntos)
+
+
+class PosicionStreamWsgiTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "", "x"))
+
+    def test_stream_responde_204_bajo_wsgi(self):
+        response = self.client.get(reverse("tracking:posicion_stream"))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    def test_pagina_no_abre_el_stream_bajo_wsgi(self):
+        response = self.client.get(reverse("tracking:ultima_ubicacion_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "EventSource")
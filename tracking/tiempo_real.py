@@ -0,0 +1,169 @@
+import asyncio
+import itertools
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+MAX_COLA = getattr(settings, "TRACKING_SSE_MAX_COLA", 500)
+KEEPALIVE = getattr(settings, "TRACKING_SSE_KEEPALIVE", 15.0)
+
+
+class Suscripcion:
+    def __init__(self, canal, empleados=None, max_cola=MAX_COLA):
+        self.canal = canal
+        self.empleados = set(empleados or ())
+        self.loop = asyncio.get_running_loop()
+        self.cola = asyncio.Queue(maxsize=max_cola)
+        self.descartados = 0
+
+    def acepta(self, mensaje):
+        return not self.empleados or mensaje["empleado_id"] in self.empleados
+
+    def _entregar(self, mensaje):
+        # Corre en el loop del suscriptor; un cliente lento pierde mensajes
+        # en lugar de hacer crecer la memoria del worker.
+        try:
+            self.cola.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            self.descartados += 1
+
+    async def siguiente(self, timeout=None):
+        return await asyncio.wait_for(self.cola.get(), timeout)
+
+    def cerrar(self):
+        self.canal.cancelar(self)
+
+
+class Canal:
+    """Pub/sub en proceso para el feed en vivo.
+
+    Cada suscriptor tiene una ``asyncio.Queue`` en el loop del worker ASGI,
+    asi que cientos de conexiones inactivas solo cuestan una corrutina cada
+    una. ``publicar`` puede llamarse desde cualquier hilo (las vistas
+    sincronas corren en el thread pool de asgiref). Solo reparte mensajes
+    dentro del mismo proceso: con varios workers hace falta un broker
+    externo con la misma interfaz.
+    """
+
+    def __init__(self):
+        self._suscripciones = set()
+        self._lock = threading.Lock()
+        self._secuencia = itertools.count(1)
+
+    def suscribir(self, empleados=None):
+        suscripcion = Suscripcion(self, empleados)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def __len__(self):
+        return len(self._suscripciones)
+
+    def publicar(self, tipo, datos):
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+        for dato in datos:
+            mensaje = {"id": next(self._secuencia), "tipo": tipo, **dato}
+            for suscripcion in suscripciones:
+                if not suscripcion.acepta(mensaje):
+                    continue
+                try:
+                    suscripcion.loop.call_soon_threadsafe(suscripcion._entregar, mensaje)
+                except RuntimeError:
+                    # El loop ya se cerro (worker apagandose).
+                    self.cancelar(suscripcion)
+
+
+canal = Canal()
+
+
+def _posicion(ubicacion):
+    return {
+        "empleado_id": ubicacion.empleado_id,
+        "dispositivo_id": ubicacion.dispositivo_id,
+        "latitud": str(ubicacion.latitud),
+        "longitud": str(ubicacion.longitud),
+        "bateria": ubicacion.bateria,
+        "timestamp": ubicacion.timestamp.isoformat(),
+    }
+
+
+def _evento(evento):
+    return {
+        "empleado_id": evento.empleado_id,
+        "dispositivo_id": evento.dispositivo_id,
+        "sitio_id": evento.sitio_id,
+        "evento": evento.tipo,
+        "distancia_metros": float(evento.distancia_metros),
+        "timestamp": evento.timestamp.isoformat(),
+    }
+
+
+def publicar_ubicaciones(ubicaciones, eventos=()):
+    """Publica la posicion mas reciente por dispositivo y los eventos de geocerca.
+
+    Se programa con ``on_commit`` para no anunciar datos que luego se revierten.
+    """
+    if not len(canal):
+        return
+    recientes = {}
+    for ubicacion in ubicaciones:
+        actual = recientes.get(ubicacion.dispositivo_id)
+        if actual is None or ubicacion.timestamp > actual.timestamp:
+            recientes[ubicacion.dispositivo_id] = ubicacion
+    posiciones = [_posicion(u) for u in recientes.values()]
+    geocercas = [_evento(e) for e in eventos]
+
+    def enviar():
+        canal.publicar("posicion", posiciones)
+        canal.publicar("geocerca", geocercas)
+
+    transaction.on_commit(enviar)
+
+
+def stream_disponible(request):
+    """El feed solo funciona bajo ASGI.
+
+    Con WSGI, ``StreamingHttpResponse`` junta el iterador asincrono en una
+    lista antes de enviar el primer byte: el flujo infinito nunca responde y
+    ocupa el hilo del worker para siempre.
+    """
+    return isinstance(request, ASGIRequest)
+
+
+def formato_sse(mensaje):
+    datos = {k: v for k, v in mensaje.items() if k not in ("id", "tipo")}
+    return f"id: {mensaje['id']}\nevent: {mensaje['tipo']}\ndata: {json.dumps(datos, separators=(',', ':'))}\n\n"
+
+
+async def flujo_sse(empleados=None, keepalive=KEEPALIVE):
+    """Genera el cuerpo ``text/event-stream`` hasta que el cliente se desconecta.
+
+    La suscripcion se crea al empezar a iterar, ya dentro del loop del
+    servidor ASGI, y no en la vista (que puede correr adaptada en otro loop).
+    """
+    suscripcion = canal.suscribir(empleados)
+    try:
+        yield f"retry: 5000\n: {len(canal)} suscriptores\n\n"
+        while True:
+            try:
+                mensaje = await suscripcion.siguiente(keepalive)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield formato_sse(mensaje)
+    finally:
+        suscripcion.cerrar()
+        if suscripcion.descartados:
+            logger.info("Suscriptor SSE cerrado con %s mensajes descartados.", suscripcion.descartados)
@@ -4,16 +4,22 @@ from .views import (
     DispositivoCreateView,
     DispositivoDeleteView,
     DispositivoListView,
+    DispositivoPingView,
     DispositivoUpdateView,
     HomeView,
     PermisoGPSCreateView,
     PermisoGPSDeleteView,
     PermisoGPSListView,
     PermisoGPSUpdateView,
+    PosicionStreamView,
+    SincronizacionView,
     UbicacionCreateView,
     UbicacionDeleteView,
+    UbicacionExportView,
     UbicacionListView,
+    UbicacionLoteView,
     UbicacionUpdateView,
+    UltimaUbicacionListView,
 )
 
 app_name = "tracking"
@@ -44,7 +50,25 @@ urlpatterns = [
         PermisoGPSDeleteView.as_view(),
         name="permiso_delete",
     ),
+    path(
+        "dispositivos/<int:pk>/ping/",
+        DispositivoPingView.as_view(),
+        name="dispositivo_ping",
+    ),
+    path(
+        "dispositivos/<int:pk>/ubicaciones/lote/",
+        UbicacionLoteView.as_view(),
+        name="ubicacion_lote",
+    ),
+    path(
+        "dispositivos/<int:pk>/sync/",
+        SincronizacionView.as_view(),
+        name="dispositivo_sync",
+    ),
+    path("posiciones/", UltimaUbicacionListView.as_view(), name="ultima_ubicacion_list"),
+    path("posiciones/stream/", PosicionStreamView.as_view(), name="posicion_stream"),
     path("ubicaciones/", UbicacionListView.as_view(), name="ubicacion_list"),
+    path("ubicaciones/exportar/", UbicacionExportView.as_view(), name="ubicacion_export"),
     path("ubicaciones/nuevo/", UbicacionCreateView.as_view(), name="ubicacion_create"),
     path(
         "ubicaciones/<int:pk>/editar/",
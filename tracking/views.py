@@ -1,10 +1,37 @@
-from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin, PermissionRequiredMixin
+from django.db import models, transaction
 from django.db.models import Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
-from django.views.generic import CreateView, DeleteView, ListView, TemplateView, UpdateView
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from django.views.generic import CreateView, DeleteView, ListView, TemplateView, UpdateView, View
 
+from operaciones.geohash import en_radio
+from operaciones.models import Sitio
+
+from .exportacion import EXPORTADORES, FORMATOS
 from .forms import DispositivoForm, PermisoGPSForm, UbicacionForm
-from .models import Dispositivo, PermisoGPS, Ubicacion
+from .geocercas import evaluar_geocercas
+from .heartbeat import heartbeats
+from .historial import filtrar_rango, rango_timestamp
+from .ingesta import (
+    LoteInvalido,
+    SinPermisoGPS,
+    actualizar_ultimas_ubicaciones,
+    ingestar_ubicaciones,
+    parse_lote,
+    refrescar_ultimas_ubicaciones,
+)
+from .models import Dispositivo, PermisoGPS, RecorridoResumen, UltimaUbicacion, Ubicacion
+from .sincronizacion import sincronizar
+from .tiempo_real import flujo_sse, publicar_ubicaciones, stream_disponible
+
+
+RADIO_CERCANIA_M = 2000.0
 
 
 class HomeView(LoginRequiredMixin, TemplateView):
@@ -40,10 +67,13 @@ class SearchableListView(ListView):
         if self.date_field:
             date_from = self.request.GET.get("date_from")
             date_to = self.request.GET.get("date_to")
-            if date_from:
-                queryset = queryset.filter(**{f"{self.date_field}__gte": date_from})
-            if date_to:
-                queryset = queryset.filter(**{f"{self.date_field}__lte": date_to})
+            if isinstance(self.model._meta.get_field(self.date_field), models.DateTimeField):
+                queryset = filtrar_rango(queryset, self.date_field, date_from, date_to)
+            else:
+                if date_from:
+                    queryset = queryset.filter(**{f"{self.date_field}__gte": date_from})
+                if date_to:
+                    queryset = queryset.filter(**{f"{self.date_field}__lte": date_to})
 
         status = self.request.GET.get("status")
         if self.status_field and status:
@@ -194,13 +224,103 @@ class UbicacionListView(LoginRequiredMixin, TrackingPermissionMixin, SearchableL
     search_fields = ("empleado__nombres", "empleado__apellidos", "dispositivo__alias")
     empleado_field = "empleado"
     plataforma_field = "dispositivo__plataforma"
-    date_field = "timestamp__date"
+    date_field = "timestamp"
+    order_choices = (
+        ("-timestamp", "Timestamp (reciente)"),
+        ("timestamp", "Timestamp (antiguo)"),
+    )
+    default_order = "-timestamp"
+
+    def get_queryset(self):
+        return super().get_queryset().select_related("empleado", "dispositivo", "dispositivo__empleado")
+
+    def get_resumenes(self):
+        # Mismos filtros que la lista, aplicados a los recorridos ya compactados.
+        resumenes = RecorridoResumen.objects.all()
+        query = self.request.GET.get("q", "").strip()
+        if query:
+            filters = Q()
+            for field in self.search_fields:
+                filters |= Q(**{f"{field}__icontains": query})
+            resumenes = resumenes.filter(filters)
+        empleado = self.request.GET.get("empleado")
+        if empleado:
+            resumenes = resumenes.filter(empleado=empleado)
+        plataforma = self.request.GET.get("plataforma")
+        if plataforma:
+            resumenes = resumenes.filter(dispositivo__plataforma=plataforma)
+        inicio, fin = rango_timestamp(self.request.GET.get("date_from"), self.request.GET.get("date_to"))
+        if inicio:
+            resumenes = resumenes.filter(fin__gte=inicio)
+        if fin:
+            resumenes = resumenes.filter(inicio__lt=fin)
+        return resumenes
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Los dias compactados ya no tienen filas crudas; se listan aparte.
+        resumenes = self.get_resumenes().select_related("empleado", "dispositivo").order_by("-fecha", "empleado_id")
+        context["resumenes"] = resumenes[: self.paginate_by]
+        context["total_resumenes"] = resumenes.count()
+        return context
+
+
+class UbicacionExportView(UbicacionListView):
+    def get(self, request, *args, **kwargs):
+        formato = request.GET.get("formato", "csv")
+        if formato not in EXPORTADORES:
+            return JsonResponse({"error": "Formato no soportado."}, status=400)
+        content_type, extension = FORMATOS[formato]
+        queryset = self.get_queryset().select_related(None)
+        contenido = EXPORTADORES[formato](queryset, self.get_resumenes())
+        response = StreamingHttpResponse(contenido, content_type=content_type)
+        filename = f"ubicaciones_{timezone.localdate():%Y%m%d}.{extension}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class UltimaUbicacionListView(LoginRequiredMixin, TrackingPermissionMixin, SearchableListView):
+    model = UltimaUbicacion
+    permission_required = "tracking.view_ubicacion"
+    template_name = "tracking/ultima_ubicacion_list.html"
+    search_fields = ("empleado__nombres", "empleado__apellidos", "dispositivo__alias")
+    empleado_field = "empleado"
+    plataforma_field = "dispositivo__plataforma"
     order_choices = (
         ("-timestamp", "Timestamp (reciente)"),
         ("timestamp", "Timestamp (antiguo)"),
     )
     default_order = "-timestamp"
 
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related("empleado", "dispositivo", "dispositivo__empleado")
+        sitio = self.get_sitio()
+        if sitio is not None:
+            cercanas = en_radio(queryset, sitio.latitud, sitio.longitud, self.get_radio())
+            queryset = queryset.filter(pk__in=[posicion.pk for posicion in cercanas])
+        return queryset
+
+    def get_sitio(self):
+        sitio_id = self.request.GET.get("sitio")
+        if not sitio_id or not sitio_id.isdigit():
+            return None
+        return Sitio.objects.filter(
+            pk=sitio_id, latitud__isnull=False, longitud__isnull=False
+        ).first()
+
+    def get_radio(self):
+        try:
+            return max(float(self.request.GET.get("radio") or RADIO_CERCANIA_M), 1.0)
+        except ValueError:
+            return RADIO_CERCANIA_M
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["sitios"] = Sitio.objects.exclude(geohash="").order_by("nombre")
+        context["radio"] = self.get_radio()
+        context["stream_disponible"] = stream_disponible(self.request)
+        return context
+
 
 class UbicacionCreateView(LoginRequiredMixin, TrackingPermissionMixin, CreateView):
     model = Ubicacion
@@ -209,6 +329,14 @@ class UbicacionCreateView(LoginRequiredMixin, TrackingPermissionMixin, CreateVie
     template_name = "tracking/ubicacion_form.html"
     success_url = reverse_lazy("tracking:ubicacion_list")
 
+    @transaction.atomic
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        actualizar_ultimas_ubicaciones([self.object])
+        eventos = evaluar_geocercas(self.object.empleado_id, [self.object], self.object.dispositivo_id)
+        publicar_ubicaciones([self.object], eventos)
+        return response
+
 
 class UbicacionUpdateView(LoginRequiredMixin, TrackingPermissionMixin, UpdateView):
     model = Ubicacion
@@ -217,9 +345,109 @@ class UbicacionUpdateView(LoginRequiredMixin, TrackingPermissionMixin, UpdateVie
     template_name = "tracking/ubicacion_form.html"
     success_url = reverse_lazy("tracking:ubicacion_list")
 
+    @transaction.atomic
+    def form_valid(self, form):
+        previo = (form.initial.get("empleado"), form.initial.get("dispositivo"))
+        response = super().form_valid(form)
+        refrescar_ultimas_ubicaciones([previo, (self.object.empleado_id, self.object.dispositivo_id)])
+        return response
+
 
 class UbicacionDeleteView(LoginRequiredMixin, TrackingPermissionMixin, DeleteView):
     model = Ubicacion
     permission_required = "tracking.delete_ubicacion"
     template_name = "tracking/ubicacion_confirm_delete.html"
     success_url = reverse_lazy("tracking:ubicacion_list")
+
+    @transaction.atomic
+    def form_valid(self, form):
+        par = (self.object.empleado_id, self.object.dispositivo_id)
+        response = super().form_valid(form)
+        refrescar_ultimas_ubicaciones([par])
+        return response
+
+
+class DispositivoApiMixin(AccessMixin):
+    raise_exception = True
+    http_method_names = ["post"]
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        self.dispositivo = get_object_or_404(
+            Dispositivo.objects.select_related("empleado"), pk=self.kwargs.get("pk")
+        )
+        es_propio = self.dispositivo.empleado.user_id == request.user.pk
+        if not es_propio and not request.user.has_perm("tracking.add_ubicacion"):
+            return JsonResponse({"error": "Sin permiso para este dispositivo."}, status=403)
+        if self.dispositivo.estatus != "activo":
+            return JsonResponse({"error": "El dispositivo esta inactivo."}, status=409)
+        response = super().dispatch(request, *args, **kwargs)
+        # Solo una peticion aceptada cuenta como senal de vida del dispositivo.
+        if response.status_code < 400:
+            heartbeats.registrar(self.dispositivo.pk, timezone.now())
+        return response
+
+
+class DispositivoPingView(DispositivoApiMixin, View):
+    def post(self, request, *args, **kwargs):
+        return HttpResponse(status=204)
+
+
+class UbicacionLoteView(DispositivoApiMixin, View):
+    def post(self, request, *args, **kwargs):
+        dispositivo = self.dispositivo
+        try:
+            puntos = parse_lote(request.body, request.content_type or "")
+        except LoteInvalido as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+
+        try:
+            resultados = ingestar_ubicaciones(dispositivo, puntos)
+        except SinPermisoGPS as exc:
+            return JsonResponse({"error": str(exc)}, status=403)
+        aceptados = sum(1 for r in resultados if r["estatus"] == "aceptado")
+        return JsonResponse(
+            {
+                "aceptados": aceptados,
+                "rechazados": len(resultados) - aceptados,
+                "resultados": resultados,
+            }
+        )
+
+
+@method_decorator(gzip_page, name="dispatch")
+class SincronizacionView(DispositivoApiMixin, View):
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        desde = request.GET.get("token", "0")
+        if not desde.isdigit():
+            return JsonResponse({"error": "Token invalido."}, status=400)
+        datos = sincronizar(self.dispositivo.empleado_id, int(desde))
+        return JsonResponse(datos, json_dumps_params={"separators": (",", ":")})
+
+
+class PosicionStreamView(View):
+    """Feed SSE de posiciones y eventos de geocerca para el centro de control.
+
+    Es asincrona: bajo ASGI cada cliente conectado es una corrutina esperando
+    en su cola, no un hilo del servidor. Bajo WSGI responde 204, que le
+    indica a ``EventSource`` que no vuelva a conectar.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        if not stream_disponible(request):
+            return HttpResponse(status=204)
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+        if not await sync_to_async(user.has_perm)("tracking.view_ubicacion"):
+            return HttpResponse(status=403)
+        empleados = {int(e) for e in request.GET.getlist("empleado") if e.isdigit()}
+        response = StreamingHttpResponse(
+            flujo_sse(empleados), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
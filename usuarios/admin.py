@@ -3,6 +3,7 @@ from django.contrib import admin
 from .models import (
     Certificacion,
     ContactoEmergencia,
+    ContrasenaTemporal,
     DocumentoEmpleado,
     Empleado,
     EmpleadoCertificacion,
@@ -17,3 +18,4 @@ admin.site.register(Certificacion)
 admin.site.register(EmpleadoCertificacion)
 admin.site.register(DocumentoEmpleado)
 admin.site.register(ContactoEmergencia)
+admin.site.register(ContrasenaTemporal)
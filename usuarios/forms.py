@@ -11,6 +11,7 @@ from django.db import transaction
 from .models import (
     Certificacion,
     ContactoEmergencia,
+    ContrasenaTemporal,
     DocumentoEmpleado,
     Empleado,
     EmpleadoCertificacion,
@@ -132,6 +133,7 @@ class UserCreateForm(UserCreationForm):
         if commit:
             user.save()
             self.save_m2m()
+            ContrasenaTemporal.objects.get_or_create(user=user)
         return user
 
 
@@ -254,6 +256,7 @@ class UserEmpleadoCreateForm(UserCreationForm):
         if commit:
             user.save()
             user.groups.set(self.cleaned_data.get("groups"))
+            ContrasenaTemporal.objects.get_or_create(user=user)
         empleado_email = self.cleaned_data.get("email_empleado") or user.email
         Empleado.objects.create(
             user=user,
@@ -0,0 +1,65 @@
+import time as reloj
+
+from django.conf import settings
+from django.contrib.auth import login
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from usuarios.middleware import ForcePasswordChangeMiddleware
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo por peticion de ForcePasswordChangeMiddleware contra el "
+        "check_password que hacia antes en cada peticion."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--peticiones", type=int, default=20)
+
+    def handle(self, *args, **options):
+        default_password = getattr(settings, "DEFAULT_INITIAL_PASSWORD", None)
+        if not default_password:
+            raise CommandError("DEFAULT_INITIAL_PASSWORD no esta configurado.")
+        peticiones = options["peticiones"]
+        # El usuario de prueba y su sesion se descartan al terminar.
+        with transaction.atomic():
+            user = User.objects.create_user("medicion-middleware", password="contrasena-definitiva-123")
+            antes = self.medir(peticiones, lambda: user.check_password(default_password))
+
+            factory = RequestFactory()
+            sesiones = SessionMiddleware(lambda request: HttpResponse())
+            middleware = SessionMiddleware(
+                AuthenticationMiddleware(ForcePasswordChangeMiddleware(lambda request: HttpResponse()))
+            )
+            request = factory.get("/")
+            sesiones.process_request(request)
+            login(request, user, backend="django.contrib.auth.backends.ModelBackend")
+            request.session.save()
+            cookie = request.session.session_key
+
+            def peticion():
+                request = factory.get("/")
+                request.COOKIES[settings.SESSION_COOKIE_NAME] = cookie
+                middleware(request)
+                if not request.user.is_authenticated:
+                    raise CommandError("La sesion de prueba no quedo autenticada.")
+
+            peticion()  # La primera lectura de ContrasenaTemporal queda en la sesion.
+            ahora = self.medir(peticiones, peticion)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"check_password por peticion (antes): {antes * 1000:.2f} ms")
+        self.stdout.write(f"Peticion completa con el middleware (ahora): {ahora * 1000:.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Promedio de {peticiones} peticiones; {antes / ahora:.0f}x mas rapido."))
+
+    def medir(self, peticiones, funcion):
+        inicio = reloj.perf_counter()
+        for _ in range(peticiones):
+            funcion()
+        return (reloj.perf_counter() - inicio) / peticiones
@@ -3,6 +3,21 @@ from django.contrib import messages
 from django.shortcuts import redirect
 from django.urls import reverse
 
+from .models import ContrasenaTemporal
+
+
+SESSION_KEY = "contrasena_temporal"
+
+
+def requiere_cambio_contrasena(request):
+    # El hash de la contrasena es costoso (PBKDF2); la decision se guarda en
+    # ContrasenaTemporal al crear el usuario y se cachea en la sesion.
+    cached = request.session.get(SESSION_KEY)
+    if cached is None:
+        cached = ContrasenaTemporal.objects.filter(user_id=request.user.pk).exists()
+        request.session[SESSION_KEY] = cached
+    return cached
+
 
 class ForcePasswordChangeMiddleware:
     def __init__(self, get_response):
@@ -11,7 +26,7 @@ class ForcePasswordChangeMiddleware:
     def __call__(self, request):
         if request.user.is_authenticated:
             default_password = getattr(settings, "DEFAULT_INITIAL_PASSWORD", None)
-            if default_password and request.user.check_password(default_password):
+            if default_password and requiere_cambio_contrasena(request):
                 allowed = {
                     reverse("password_change"),
                     reverse("password_change_done"),
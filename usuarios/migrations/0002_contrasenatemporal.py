@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContrasenaTemporal',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='contrasena_temporal', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('fecha_asignada', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
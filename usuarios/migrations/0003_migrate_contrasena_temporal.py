@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    ContrasenaTemporal = apps.get_model("usuarios", "ContrasenaTemporal")
+
+    default_password = getattr(settings, "DEFAULT_INITIAL_PASSWORD", None)
+    if not default_password:
+        return
+    for user_id, password in User.objects.values_list("id", "password"):
+        if password and check_password(default_password, password):
+            ContrasenaTemporal.objects.get_or_create(user_id=user_id)
+
+
+def backwards(apps, schema_editor):
+    ContrasenaTemporal = apps.get_model("usuarios", "ContrasenaTemporal")
+    ContrasenaTemporal.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("usuarios", "0002_contrasenatemporal"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
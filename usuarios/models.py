@@ -97,3 +97,16 @@ class ContactoEmergencia(models.Model):
 
     def __str__(self):
         return f"{self.empleado} - {self.nombre}".strip()
+
+
+class ContrasenaTemporal(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="contrasena_temporal",
+    )
+    fecha_asignada = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user} - temporal".strip()
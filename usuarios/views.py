@@ -2,6 +2,7 @@ from datetime import date
 
 from django.contrib import messages
 from django.contrib.auth import get_user_model
+from django.contrib.auth import views as auth_views
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.auth.models import Group
 from django.db.models import Q
@@ -24,9 +25,11 @@ from .forms import (
     UserEmpleadoCreateForm,
     UserUpdateForm,
 )
+from .middleware import SESSION_KEY as CONTRASENA_TEMPORAL_SESSION_KEY
 from .models import (
     Certificacion,
     ContactoEmergencia,
+    ContrasenaTemporal,
     DocumentoEmpleado,
     Empleado,
     EmpleadoCertificacion,
@@ -40,6 +43,14 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = "usuarios/dashboard.html"
 
 
+class CambioContrasenaView(auth_views.PasswordChangeView):
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        ContrasenaTemporal.objects.filter(user=self.request.user).delete()
+        self.request.session[CONTRASENA_TEMPORAL_SESSION_KEY] = False
+        return response
+
+
 class PerfilView(LoginRequiredMixin, TemplateView):
     template_name = "usuarios/perfil.html"
 
@@ -65,7 +76,9 @@ class PerfilView(LoginRequiredMixin, TemplateView):
                 )
                 .order_by("-fecha_inicio")
             )
-            activos = AsignacionActivo.objects.filter(asignacion__in=[a.asignacion for a in asignaciones])
+            activos = AsignacionActivo.objects.filter(
+                asignacion__in=[a.asignacion for a in asignaciones]
+            ).prefetch_related("activo")
             activos_por_asignacion = {}
             for activo in activos:
                 activos_por_asignacion.setdefault(activo.asignacion_id, []).append(activo)
@@ -115,7 +128,9 @@ class AsignacionesHistoriaView(LoginRequiredMixin, TemplateView):
                 )
                 .order_by("-fecha_inicio")
             )
-            activos = AsignacionActivo.objects.filter(asignacion__in=[a.asignacion for a in asignaciones])
+            activos = AsignacionActivo.objects.filter(
+                asignacion__in=[a.asignacion for a in asignaciones]
+            ).prefetch_related("activo")
             activos_por_asignacion = {}
             for activo in activos:
                 activos_por_asignacion.setdefault(activo.asignacion_id, []).append(activo)